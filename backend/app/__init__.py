@@ -22,6 +22,15 @@ def create_app(config_class=DevelopmentConfig):
     migrate.init_app(app, db, directory="backend/migrations")
     jwt.init_app(app)
 
+    from . import activity, authz, cache, catalog, covers, events, outbox
+    activity.init_app(app)
+    authz.init_app(app)
+    cache.init_app(app)
+    catalog.init_app(app)
+    covers.init_app(app)
+    events.init_app(app)
+    outbox.init_app(app)
+
     # Enable CORS for React frontend
     CORS(
         app,
@@ -77,4 +86,11 @@ def create_app(config_class=DevelopmentConfig):
     from .routes.borrowing_cart import bp as borrowing_cart_bp
     app.register_blueprint(borrowing_cart_bp, url_prefix="/borrowingCart")
 
+    from .routes.events import bp as events_bp
+    app.register_blueprint(events_bp, url_prefix="/events")
+
+    # Register CLI commands
+    from .cli import register_commands
+    register_commands(app)
+
     return app
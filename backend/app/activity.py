@@ -0,0 +1,223 @@
+"""
+Activity log writes and queries.
+
+Handlers record audit entries with log_activity() instead of adding ActivityLog rows to their
+own transaction. Entries are held on the session until it commits (and dropped on rollback),
+then handed to an ActivitySink, which queues them in memory and writes them from a background
+thread in multi-row INSERTs of up to ACTIVITY_LOG_BATCH_SIZE rows, at least every
+ACTIVITY_LOG_FLUSH_INTERVAL seconds. The queue is drained when the process exits. With
+ACTIVITY_LOG_ASYNC off, or when the queue is full, entries are written synchronously.
+
+activity_logs is the fastest-growing table, so listings are always keyset-paginated over
+(created_at, id), newest first, and filters are plain column comparisons that the
+(created_at, id), (action, created_at), (user_id, created_at) and per-entity
+(book_id / request_id / order_id, created_at) indexes can serve.
+Date filters are half-open ranges: ?date=YYYY-MM-DD means [that day, the next day).
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, insert
+from .extensions import db
+from .models import ActivityLog, gen_id
+from .utils import get_limit, keyset_paginate
+
+_PENDING_KEY = "activity_pending"
+
+
+def init_app(app):
+    app.extensions["activity_sink"] = ActivitySink(app)
+    if not event.contains(db.session, "after_commit", _hand_off):
+        event.listen(db.session, "after_commit", _hand_off)
+        event.listen(db.session, "after_rollback", _discard)
+
+
+# -------------------------
+# Writing
+# -------------------------
+class ActivitySink:
+    """
+    In-memory queue of activity_logs rows, flushed in batches by a daemon thread.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.batch_size = app.config.get("ACTIVITY_LOG_BATCH_SIZE", 500)
+        self.flush_interval = app.config.get("ACTIVITY_LOG_FLUSH_INTERVAL", 1.0)
+        self.queue = queue.Queue(maxsize=app.config.get("ACTIVITY_LOG_QUEUE_SIZE", 10000))
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _ensure_thread(self):
+        # Started on first use, and again in a forked worker where the parent's thread is gone
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="activity-log-sink", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, rows):
+        self._ensure_thread()
+        overflow = []
+        for row in rows:
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                overflow.append(row)
+        if overflow:
+            self.write(overflow)
+
+    def write(self, rows):
+        """
+        Insert `rows` in one statement on a connection of its own.
+        """
+        with self.app.app_context():
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(ActivityLog.__table__), rows)
+            except Exception:
+                self.app.logger.exception("Failed to write %d activity log row(s)", len(rows))
+
+    def _take_batch(self, timeout):
+        batch = []
+        deadline = time.monotonic() + timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._take_batch(self.flush_interval)
+            if batch:
+                self.write(batch)
+
+    def flush(self):
+        """
+        Write everything queued so far from the calling thread.
+        """
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self.write(batch)
+
+    def close(self):
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+def log_activity(user_id, action, item, description=None, book_id=None, request_id=None, order_id=None):
+    """
+    Record an audit entry. It is written after the current transaction commits.
+    Pass the ids of the book, pending request and order involved so the entry shows up in
+    their history (GET /logs/books/<id> etc.).
+    """
+    row = {
+        "id": gen_id(),
+        "user_id": user_id,
+        "action": action,
+        "item": item[:255],
+        "description": description,
+        "book_id": book_id,
+        "request_id": request_id,
+        "order_id": order_id,
+        "created_at": datetime.utcnow(),
+    }
+    if not current_app.config.get("ACTIVITY_LOG_ASYNC", True):
+        db.session.add(ActivityLog(**row))
+        return
+    db.session.info.setdefault(_PENDING_KEY, []).append(row)
+
+
+def _hand_off(session):
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        current_app.extensions["activity_sink"].enqueue(rows)
+
+
+def _discard(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+# -------------------------
+# Reading
+# -------------------------
+def _parse_timestamp(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or timestamp")
+
+
+def filter_logs(query, args):
+    """
+    Apply ?action=, ?user_id=, ?book_id=, ?request_id=, ?order_id=, ?date= and
+    ?from=/&to= (from inclusive, to exclusive).
+    Raises ValueError with a readable message.
+    """
+    action = args.get("action", "All")
+    if action and action != "All":
+        query = query.filter(ActivityLog.action == action)
+    for column in ("user_id", "book_id", "order_id"):
+        if args.get(column):
+            query = query.filter(getattr(ActivityLog, column) == args[column])
+    if args.get("request_id"):
+        try:
+            query = query.filter(ActivityLog.request_id == int(args["request_id"]))
+        except ValueError:
+            raise ValueError("request_id must be an integer")
+
+    start = _parse_timestamp(args["from"], "from") if args.get("from") else None
+    end = _parse_timestamp(args["to"], "to") if args.get("to") else None
+    if args.get("date"):
+        try:
+            day = datetime.strptime(args["date"], "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("Invalid date format")
+        start = max(start, day) if start else day
+        end = min(end, day + timedelta(days=1)) if end else day + timedelta(days=1)
+    if start:
+        query = query.filter(ActivityLog.created_at >= start)
+    if end:
+        query = query.filter(ActivityLog.created_at < end)
+    return query
+
+
+def list_logs(args):
+    """
+    One newest-first page of logs matching `args`. Returns (logs, next_cursor).
+    Raises ValueError for invalid filters, limits or cursors.
+    """
+    query = filter_logs(ActivityLog.query, args)
+    try:
+        limit = get_limit(default=current_app.config["PAGE_SIZE"])
+    except ValueError:
+        raise ValueError("limit must be a positive integer")
+    try:
+        return keyset_paginate(
+            query, ActivityLog.created_at, ActivityLog.id, limit,
+            after=args.get("after"), descending=True
+        )
+    except ValueError:
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,237 @@
+"""
+Activity log retention and archival.
+
+On Postgres activity_logs is range-partitioned by month on created_at (one
+activity_logs_yYYYYmMM table per month plus activity_logs_default), so an admin query over a
+date range only touches the matching months and an expired month is dropped as a whole
+table. ensure_partitions() creates the partitions for the coming months ahead of time; it runs
+daily with `flask logs archive` (cron job in render.yaml). Rows that reached the default
+partition because a month had no partition yet are moved into it when it is created.
+SQLite has no partitioning; there an expired month is removed with one range DELETE on the
+created_at index.
+
+archive_expired() moves every month older than ACTIVITY_LOG_RETENTION_MONTHS into the
+activity_log_archives table as gzipped NDJSON chunks (newest first, one log per line). The
+chunks are written in the same transaction that drops the month, so a month is never gone
+from activity_logs without its archive, and the web service and the cron job see the same
+archive without shared disk. read_archive() streams an archived month back on demand.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, delete, insert, text
+from .extensions import db
+from .models import ActivityLog, ActivityLogArchive
+from .utils import dialect_name
+
+MONTH_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+DEFAULT_PARTITION = "activity_logs_default"
+
+
+# -------------------------
+# Months
+# -------------------------
+def month_start(when):
+    return datetime(when.year, when.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def parse_month(value):
+    """
+    "YYYY-MM" -> first instant of that month. Raises ValueError.
+    """
+    if not value or not MONTH_RE.match(value):
+        raise ValueError("month must be YYYY-MM")
+    return datetime.strptime(value, "%Y-%m")
+
+
+def partition_name(month):
+    return f"activity_logs_y{month.year:04d}m{month.month:02d}"
+
+
+def _create_partition(month):
+    name = partition_name(month)
+    bounds = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    in_range = {"start": month, "end": add_months(month, 1)}
+    stray = db.session.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+    ), in_range).scalar()
+    if not stray:
+        db.session.execute(text(f"CREATE TABLE {name} PARTITION OF activity_logs {bounds}"))
+        return
+    # Postgres refuses a partition whose range the default partition already has rows for:
+    # take the default out, create the month, move its rows over and put the default back
+    db.session.execute(text(f"ALTER TABLE activity_logs DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.session.execute(text(f"CREATE TABLE {name} PARTITION OF activity_logs {bounds}"))
+    db.session.execute(text(
+        f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end"
+    ), in_range)
+    db.session.execute(text(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end"
+    ), in_range)
+    db.session.execute(text(f"ALTER TABLE activity_logs ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+def ensure_partitions(ahead=3, now=None):
+    """
+    Postgres: create the monthly partitions from the current month to `ahead` months later,
+    moving rows of those months out of the default partition. Returns the names of the
+    partitions created. No-op on other databases.
+    """
+    if dialect_name() != "postgresql":
+        return []
+    # One run at a time: a second one waits here and then finds the partitions in place
+    db.session.execute(text("SELECT pg_advisory_xact_lock(hashtext('activity_logs_partitions'))"))
+    current = month_start(now or datetime.utcnow())
+    existing = set(db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'activity_logs'"
+    )).scalars())
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        _create_partition(month)
+        created.append(name)
+    db.session.commit()
+    return created
+
+
+# -------------------------
+# Archiving
+# -------------------------
+CHUNK_ROWS = 1000
+
+
+def _pack(logs):
+    return gzip.compress("".join(json.dumps(log) + "\n" for log in logs).encode("utf-8"))
+
+
+def _unpack(data):
+    return [json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines() if line]
+
+
+def archived_months():
+    return [
+        month for (month,) in
+        db.session.query(ActivityLogArchive.month).distinct().order_by(ActivityLogArchive.month.desc())
+    ]
+
+
+def archive_month(month):
+    """
+    Move the logs of `month` into activity_log_archives, in the same transaction that
+    removes them from activity_logs. Chunks from an earlier run for that month are kept.
+    Returns the number of rows moved.
+    """
+    start, end = month, add_months(month, 1)
+    archived_at = datetime.utcnow()
+    statement = (
+        db.session.query(ActivityLog)
+        .filter(ActivityLog.created_at >= start, ActivityLog.created_at < end)
+        .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+        .statement.execution_options(yield_per=CHUNK_ROWS)
+    )
+    chunks = []
+    for partition in db.session.execute(statement).scalars().partitions():
+        chunks.append({
+            "month": f"{month:%Y-%m}",
+            "rows": len(partition),
+            "data": _pack(log.to_dict() for log in partition),
+            "archived_at": archived_at,
+        })
+    if not chunks:
+        return 0
+    count = sum(chunk["rows"] for chunk in chunks)
+    db.session.execute(insert(ActivityLogArchive), chunks)
+
+    if dialect_name() == "postgresql":
+        name = partition_name(month)
+        exists = db.session.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists:
+            db.session.execute(text(f"DROP TABLE {name}"))
+    db.session.execute(
+        delete(ActivityLog)
+        .where(ActivityLog.created_at >= start, ActivityLog.created_at < end)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return count
+
+
+def archive_expired(retention_months=None, now=None):
+    """
+    Archive every month older than the retention window. Returns {"YYYY-MM": rows}.
+    """
+    if retention_months is None:
+        retention_months = current_app.config.get("ACTIVITY_LOG_RETENTION_MONTHS", 12)
+    cutoff = add_months(month_start(now or datetime.utcnow()), -retention_months)
+    oldest = db.session.query(func.min(ActivityLog.created_at)).scalar()
+    moved = {}
+    month = month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        moved[f"{month:%Y-%m}"] = archive_month(month)
+        month = add_months(month, 1)
+    return moved
+
+
+def import_files(directory):
+    """
+    Load YYYY-MM.ndjson.gz files written by earlier versions into activity_log_archives.
+    Returns {"YYYY-MM": rows}.
+    """
+    imported = {}
+    for name in sorted(os.listdir(directory)):
+        month = name[:-len(".ndjson.gz")]
+        if not name.endswith(".ndjson.gz") or not MONTH_RE.match(month):
+            continue
+        with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as stream:
+            logs = [json.loads(line) for line in stream if line.strip()]
+        for i in range(0, len(logs), CHUNK_ROWS):
+            chunk = logs[i:i + CHUNK_ROWS]
+            db.session.add(ActivityLogArchive(month=month, rows=len(chunk), data=_pack(chunk)))
+        imported[month] = len(logs)
+        db.session.commit()
+    return imported
+
+
+# -------------------------
+# Reading
+# -------------------------
+def read_archive(month, action=None, user_id=None, offset=0, limit=None):
+    """
+    Logs of an archived month, newest first, filtered like the live listing.
+    Returns (logs, has_more), or None when the month was never archived.
+    """
+    chunks = (
+        db.session.query(ActivityLogArchive.data)
+        .filter(ActivityLogArchive.month == f"{month:%Y-%m}")
+        .order_by(ActivityLogArchive.archived_at.desc(), ActivityLogArchive.id)
+        .yield_per(1)
+    )
+    found, logs, skipped = False, [], 0
+    for (data,) in chunks:
+        found = True
+        for log in _unpack(data):
+            if action and action != "All" and log["action"] != action:
+                continue
+            if user_id and log["user_id"] != user_id:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            if limit is not None and len(logs) == limit:
+                return logs, True
+            logs.append(log)
+    if not found:
+        return None
+    return logs, False
@@ -0,0 +1,120 @@
+"""
+Authorization helpers shared by all blueprints.
+
+auth.login puts the user's role in the JWT, so admin checks read the `role` claim instead of
+loading the user. A small per-process TTL cache of (role, exists) per user backs the claim,
+so demoting or deleting a user takes effect within AUTHZ_CACHE_TTL seconds without a DB
+round trip on every admin call. Any ORM write of User.role and any user deletion drops that
+user's entry when the transaction commits, so it applies immediately in this worker.
+"""
+import threading
+import time
+from functools import wraps
+from flask import jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from .extensions import db
+from .models import User
+
+_cache = {}
+_lock = threading.Lock()
+_CHANGED_KEY = "authz_changed_users"
+
+
+def init_app(app):
+    if not event.contains(db.session, "after_commit", _forget_changed):
+        event.listen(User.role, "set", _role_set)
+        event.listen(User, "after_delete", _user_deleted)
+        event.listen(db.session, "after_commit", _forget_changed)
+        event.listen(db.session, "after_rollback", _discard_changed)
+
+
+def _mark_changed(user):
+    session = object_session(user) or db.session
+    if user.id is not None:
+        session.info.setdefault(_CHANGED_KEY, set()).add(user.id)
+
+
+def _role_set(user, value, oldvalue, initiator):
+    if value != oldvalue:
+        _mark_changed(user)
+
+
+def _user_deleted(mapper, connection, user):
+    _mark_changed(user)
+
+
+def _forget_changed(session):
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        forget_user(user_id)
+
+
+def _discard_changed(session):
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def _normalize(role):
+    # Users created without a role are customers, in the database and in their tokens alike
+    return role or "customer"
+
+
+def _lookup(user_id):
+    """
+    Return the user's current role, or None when the user no longer exists.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(user_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    row = db.session.query(User.role).filter(User.id == user_id).first()
+    value = _normalize(row.role) if row else None
+    ttl = current_app.config.get("AUTHZ_CACHE_TTL", 30)
+    with _lock:
+        _cache[user_id] = (now + ttl, value)
+        if len(_cache) > current_app.config.get("AUTHZ_CACHE_SIZE", 10000):
+            _cache.pop(next(iter(_cache)))
+    return value
+
+
+def forget_user(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def current_role():
+    """
+    Role of the authenticated user: the token's claim, provided the user still exists and
+    still holds that role. Returns None for revoked users. Call inside a @jwt_required view.
+    """
+    claimed = _normalize(get_jwt().get("role"))
+    actual = _lookup(get_jwt_identity())
+    if actual is None or actual != claimed:
+        return None
+    return actual
+
+
+def is_admin():
+    """
+    True when the authenticated user is an admin. Call inside a @jwt_required view.
+    """
+    return current_role() == "admin"
+
+
+def revoked():
+    """
+    Response for a token whose user was deleted or whose role changed since login.
+    """
+    return jsonify({"msg": "Token is no longer valid, please log in again"}), 401
+
+
+def admin_required(fn):
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not is_admin():
+            return jsonify({"msg": "Admin access required"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
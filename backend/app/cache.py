@@ -0,0 +1,149 @@
+"""
+In-process cache of serialized book payloads for GET /books/<id>.
+
+Entries are tagged with the version conditional_catalog computed for the book (the catalog
+version plus the book's last stock change, see app.catalog), so a write in any worker makes
+every worker's copy stale on its next read. Writers also purge
+the affected ids locally after commit. Storage goes through a CacheBackend so the local LRU
+can later be swapped for a shared store via BOOK_CACHE_BACKEND.
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from werkzeug.utils import import_string
+
+
+# -------------------------
+# Backends
+# -------------------------
+class CacheBackend:
+    """
+    Minimal key/value interface a cache backend has to provide.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class LocalLRUBackend(CacheBackend):
+    """
+    Bounded, thread-safe LRU with a per-entry TTL, local to one worker process.
+    """
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# -------------------------
+# Book cache
+# -------------------------
+class BookCache:
+    """
+    One backend entry per book: (version, {variant: payload}), so invalidating a book drops
+    every variant (e.g. cover size) of it at once.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, book_id, version, variant=None):
+        entry = self.backend.get(book_id)
+        if entry is None or entry[0] != version or variant not in entry[1]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1][variant]
+
+    def set(self, book_id, version, payload, variant=None):
+        entry = self.backend.get(book_id)
+        variants = dict(entry[1]) if entry is not None and entry[0] == version else {}
+        variants[variant] = payload
+        self.backend.set(book_id, (version, variants))
+
+    def invalidate(self, book_ids):
+        for book_id in book_ids:
+            self.backend.delete(book_id)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            **self.backend.stats(),
+        }
+
+
+def init_app(app):
+    backend_cls = app.config.get("BOOK_CACHE_BACKEND", "app.cache.LocalLRUBackend")
+    if isinstance(backend_cls, str):
+        backend_cls = import_string(backend_cls)
+    backend = backend_cls(
+        maxsize=app.config.get("BOOK_CACHE_SIZE", 1024),
+        ttl=app.config.get("BOOK_CACHE_TTL", 300),
+    )
+    app.extensions["book_cache"] = BookCache(backend)
+
+
+def get_book_cache():
+    return current_app.extensions["book_cache"]
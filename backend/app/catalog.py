@@ -0,0 +1,167 @@
+"""
+Catalog versioning for conditional GETs.
+
+Every handler that writes books calls mark_catalog_changed() before committing, which bumps
+the catalog_version row in the same transaction. Catalog read endpoints wrapped with
+@conditional_catalog derive a strong ETag from that version and the request URL, so a
+matching If-None-Match is answered with 304 after a single lookup.
+
+Stock reservations (app.inventory) would turn that row into a hot spot and invalidate every
+cached book, so they leave it alone and only set books.updated_at. The version a conditional
+GET tags with therefore also includes the latest books.updated_at: of the one book for
+/books/<book_id>, of the whole catalog (an index lookup) for listings.
+
+The ids passed to mark_catalog_changed() are also purged from the book cache once the
+transaction commits.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import request, make_response, g, current_app
+from sqlalchemy import update, delete, select, event, exists, func
+from .extensions import db
+from .models import CatalogVersion, Book, PurchaseCart, PurchaseCartItem, PendingRequest, Order
+from . import search, counters
+
+CATALOG_ROW_ID = 1
+_DIRTY_KEY = "catalog_dirty_books"
+
+
+def init_app(app):
+    if not event.contains(db.session, "after_commit", _purge_cache):
+        event.listen(db.session, "after_commit", _purge_cache)
+        event.listen(db.session, "after_rollback", _discard_dirty)
+
+
+def _purge_cache(session):
+    book_ids = session.info.pop(_DIRTY_KEY, None)
+    if book_ids:
+        current_app.extensions["book_cache"].invalidate(book_ids)
+
+
+def _discard_dirty(session):
+    session.info.pop(_DIRTY_KEY, None)
+
+
+def mark_catalog_changed(*book_ids):
+    """
+    Bump the catalog version inside the current transaction and queue `book_ids`
+    for cache invalidation on commit.
+    """
+    if book_ids:
+        db.session.info.setdefault(_DIRTY_KEY, set()).update(book_ids)
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == CATALOG_ROW_ID)
+        .values(version=CatalogVersion.version + 1, last_modified=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.session.add(CatalogVersion(id=CATALOG_ROW_ID, version=1, last_modified=now))
+
+
+def delete_books(book_ids):
+    """
+    Delete books together with their purchase-cart items and pending requests, and drop the
+    carts those items leave empty. Runs a fixed number of set-based statements whatever the
+    number of books or carts; the caller commits. Returns the number of deleted books.
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return 0
+
+    # Only carts that held one of these books can become empty
+    cart_ids = db.session.scalars(
+        select(PurchaseCartItem.cart_id).where(PurchaseCartItem.book_id.in_(book_ids)).distinct()
+    ).all()
+
+    db.session.execute(
+        delete(PurchaseCartItem).where(PurchaseCartItem.book_id.in_(book_ids))
+        .execution_options(synchronize_session=False)
+    )
+    pending = db.session.execute(
+        delete(PendingRequest).where(PendingRequest.book_id.in_(book_ids), PendingRequest.status == "pending")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.execute(
+        delete(PendingRequest).where(PendingRequest.book_id.in_(book_ids))
+        .execution_options(synchronize_session=False)
+    )
+    counters.increment(counters.PENDING, -pending)
+    if cart_ids:
+        db.session.execute(
+            delete(PurchaseCart).where(
+                PurchaseCart.id.in_(cart_ids),
+                ~exists().where(PurchaseCartItem.cart_id == PurchaseCart.id),
+                ~exists().where(Order.cart_id == PurchaseCart.id),
+            ).execution_options(synchronize_session=False)
+        )
+
+    search.remove_books(book_ids)
+    deleted = db.session.execute(
+        delete(Book).where(Book.id.in_(book_ids)).execution_options(synchronize_session=False)
+    ).rowcount
+    mark_catalog_changed(*book_ids)
+    counters.increment(counters.BOOKS, -deleted)
+    return deleted
+
+
+def current_version(book_id=None):
+    """
+    Return (version, last_modified) of the catalog, or of one book's view of it when
+    `book_id` is given. The version is "<catalog version>:<latest stock change>".
+    """
+    catalog = select(CatalogVersion).where(CatalogVersion.id == CATALOG_ROW_ID)
+    stock = select(func.max(Book.updated_at))
+    if book_id is not None:
+        stock = stock.where(Book.id == book_id)
+    row = db.session.execute(select(
+        catalog.with_only_columns(CatalogVersion.version).scalar_subquery(),
+        catalog.with_only_columns(CatalogVersion.last_modified).scalar_subquery(),
+        stock.scalar_subquery(),
+    )).one()
+    version, last_modified, stock_changed = row
+    version = f"{version or 0}:{stock_changed.isoformat() if stock_changed else ''}"
+    if stock_changed and (last_modified is None or stock_changed > last_modified):
+        last_modified = stock_changed
+    return version, last_modified
+
+
+def catalog_etag(version, *parts):
+    raw = ":".join([str(version), *parts])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def conditional_catalog(fn):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 when the catalog has not changed
+    since the client's copy, and tag successful responses with ETag and Last-Modified.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        # A single book's response only depends on that book's stock
+        version, last_modified = current_version(kwargs.get("book_id"))
+        g.catalog_version = version
+        etag = catalog_etag(version, request.full_path)
+
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            since = request.if_modified_since
+            not_modified = bool(
+                since and last_modified and last_modified.replace(microsecond=0) <= since.replace(tzinfo=None)
+            )
+        if not_modified:
+            response = make_response("", 304)
+        else:
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        response.cache_control.no_cache = True  # always revalidate
+        return response
+    return wrapper
@@ -0,0 +1,127 @@
+import click
+from flask.cli import AppGroup
+
+search_cli = AppGroup("search", help="Book catalog search index.")
+
+
+@search_cli.command("reindex")
+def reindex():
+    """Rebuild the full-text search index from the books table."""
+    from .search import rebuild_index
+    count = rebuild_index()
+    click.echo(f"Indexed {count} book(s)")
+
+
+books_cli = AppGroup("books", help="Book catalog maintenance.")
+
+
+@books_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), help="Defaults to the file extension.")
+@click.option("--batch-size", type=int, default=None, help="Rows per INSERT batch.")
+def import_books(path, fmt, batch_size):
+    """Bulk import (upsert on ISBN) books from a CSV or NDJSON file."""
+    from .importer import import_books as run_import
+    fmt = fmt or ("csv" if path.endswith(".csv") else "ndjson")
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        report = run_import(stream, fmt, batch_size=batch_size).to_dict()
+    for error in report["errors"]:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    click.echo(
+        f"{report['imported']} of {report['rows']} row(s) imported, {report['superseded']} superseded by a "
+        f"later row with the same ISBN, {report['failed']} failed "
+        f"in {report['seconds']}s ({report['rows_per_second'] or 0} rows/s)"
+    )
+
+
+counters_cli = AppGroup("counters", help="Dashboard counters.")
+
+
+@counters_cli.command("reconcile")
+def reconcile_counters():
+    """Recompute dashboard counters from the source tables."""
+    from .counters import reconcile
+    for name, value in reconcile().items():
+        click.echo(f"{name}: {value}")
+
+
+reports_cli = AppGroup("reports", help="Reporting rollups.")
+
+
+@reports_cli.command("rollup")
+@click.option("--rebuild", is_flag=True, help="Discard the rollups and rebuild them from all history.")
+def rollup(rebuild):
+    """Fold new lendings and orders into the daily reporting rollups."""
+    from . import rollups
+    touched = rollups.rebuild() if rebuild else rollups.build()
+    click.echo(f"Updated {touched} day/category bucket(s)")
+
+
+logs_cli = AppGroup("logs", help="Activity log retention.")
+
+
+@logs_cli.command("archive")
+@click.option("--months", type=int, default=None, help="Retention window in months (default ACTIVITY_LOG_RETENTION_MONTHS).")
+def archive_logs(months):
+    """Create upcoming partitions and archive activity logs older than the retention window."""
+    from . import archive
+    for name in archive.ensure_partitions():
+        click.echo(f"Created partition {name}")
+    moved = archive.archive_expired(retention_months=months)
+    for month, count in moved.items():
+        click.echo(f"{month}: archived {count} log(s)")
+    if not moved:
+        click.echo("Nothing to archive")
+
+
+@logs_cli.command("import-archive")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+def import_archive(directory):
+    """Load YYYY-MM.ndjson.gz archive files from DIRECTORY into the database."""
+    from . import archive
+    for month, count in archive.import_files(directory).items():
+        click.echo(f"{month}: imported {count} log(s)")
+
+
+events_cli = AppGroup("events", help="Server-sent event history.")
+
+
+@events_cli.command("purge")
+@click.option("--hours", type=int, default=None, help="Keep this many hours (default EVENTS_RETENTION_HOURS).")
+def purge_events(hours):
+    """Delete streamed events older than the retention window."""
+    from .events import purge
+    click.echo(f"Deleted {purge(hours=hours)} event(s)")
+
+
+outbox_cli = AppGroup("outbox", help="Domain event outbox.")
+
+
+@outbox_cli.command("dispatch")
+def dispatch_outbox():
+    """Deliver every due outbox message now."""
+    from flask import current_app
+    from .outbox import stuck
+    delivered = current_app.extensions["outbox_dispatcher"].drain()
+    click.echo(f"Processed {delivered} message(s)")
+    failed = stuck()
+    if failed:
+        click.echo(f"{failed} message(s) ran out of attempts", err=True)
+
+
+@outbox_cli.command("purge")
+@click.option("--hours", type=int, default=None, help="Keep this many hours (default OUTBOX_RETENTION_HOURS).")
+def purge_outbox(hours):
+    """Delete delivered outbox messages older than the retention window."""
+    from .outbox import purge
+    click.echo(f"Deleted {purge(hours=hours)} message(s)")
+
+
+def register_commands(app):
+    app.cli.add_command(search_cli)
+    app.cli.add_command(books_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(reports_cli)
+    app.cli.add_command(logs_cli)
+    app.cli.add_command(events_cli)
+    app.cli.add_command(outbox_cli)
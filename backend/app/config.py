@@ -10,11 +10,67 @@ class Config:
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "dev-secret")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
 
+    # how long a user's role / existence is trusted before re-checking the database
+    AUTHZ_CACHE_TTL = int(os.getenv("AUTHZ_CACHE_TTL", 30))
+
      # Token expiry for password reset links or similar
     RESET_TOKEN_EXPIRES = timedelta(minutes=30)
 
     # pagination defaults
     PAGE_SIZE = int(os.getenv("PAGE_SIZE", 10))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+
+    # price bucket edges for GET /books/facets
+    PRICE_BUCKETS = [0, 10, 20, 50, 100]
+
+    # reporting rollups: source rows newer than the lag are left for the next build
+    ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", 300))
+
+    # activity logs are written after commit by a background thread, in batches
+    ACTIVITY_LOG_ASYNC = os.getenv("ACTIVITY_LOG_ASYNC", "true").lower() == "true"
+    ACTIVITY_LOG_BATCH_SIZE = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", 500))
+    ACTIVITY_LOG_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL", 1.0))
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.getenv("ACTIVITY_LOG_QUEUE_SIZE", 10000))
+
+    # activity logs older than this many whole months are moved to compressed chunks in the
+    # activity_log_archives table
+    ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv("ACTIVITY_LOG_RETENTION_MONTHS", 12))
+
+    # GET /events: streams poll the events table and end after EVENTS_STREAM_SECONDS;
+    # clients reconnect with Last-Event-ID. Events younger than EVENTS_READ_LAG seconds are
+    # reread, in case a lower id commits after them
+    EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", 1.0))
+    EVENTS_READ_LAG = float(os.getenv("EVENTS_READ_LAG", 5.0))
+    EVENTS_STREAM_SECONDS = int(os.getenv("EVENTS_STREAM_SECONDS", 25))
+    EVENTS_KEEPALIVE_SECONDS = int(os.getenv("EVENTS_KEEPALIVE_SECONDS", 15))
+    EVENTS_RETENTION_HOURS = int(os.getenv("EVENTS_RETENTION_HOURS", 24))
+
+    # domain events: outbox messages are delivered to app.subscribers by a dispatcher thread
+    # per worker, in batches (with OUTBOX_ASYNC off, synchronously after each commit)
+    OUTBOX_ASYNC = os.getenv("OUTBOX_ASYNC", "true").lower() == "true"
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 2.0))
+    OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 60))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+    OUTBOX_RETENTION_HOURS = int(os.getenv("OUTBOX_RETENTION_HOURS", 24))
+
+    # most ids accepted by POST /pendingRequests/bulk
+    BULK_REQUEST_LIMIT = int(os.getenv("BULK_REQUEST_LIMIT", 1000))
+
+    # bulk catalog import
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", 1000))
+    BULK_IMPORT_USE_COPY = os.getenv("BULK_IMPORT_USE_COPY", "true").lower() == "true"
+
+    # cover uploads (COVER_STORAGE_DIR defaults to <instance>/covers)
+    COVER_STORAGE_DIR = os.getenv("COVER_STORAGE_DIR")
+    COVER_THUMBNAIL_SIZES = [150, 300]
+    COVER_MAX_BYTES = int(os.getenv("COVER_MAX_BYTES", 5 * 1024 * 1024))
+    COVER_WORKERS = int(os.getenv("COVER_WORKERS", 2))
+
+    # serialized book cache (GET /books/<id>)
+    BOOK_CACHE_BACKEND = os.getenv("BOOK_CACHE_BACKEND", "app.cache.LocalLRUBackend")
+    BOOK_CACHE_SIZE = int(os.getenv("BOOK_CACHE_SIZE", 1024))
+    BOOK_CACHE_TTL = int(os.getenv("BOOK_CACHE_TTL", 300))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,120 @@
+"""
+Maintained totals for the dashboards.
+
+Write paths call increment() in the same transaction as the change they count, so reading
+the dashboard is a single primary-key lookup per counter instead of COUNT(*)/SUM scans.
+reconcile() recomputes the totals from the source tables. It runs from
+`flask counters reconcile` (scheduled hourly in render.yaml), never from a read.
+"""
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func, update
+from .extensions import db
+from .models import Counter, User, Book, Lending, PendingRequest, Payment
+from .utils import dialect_insert
+
+USERS = "users"
+BOOKS = "books"
+BORROWED = "borrowed_lendings"
+PENDING = "pending_requests"
+
+
+def sales_key(when=None):
+    """
+    Counter holding completed payment totals of the month of `when` (default: now).
+    """
+    return "sales:" + (when or datetime.utcnow()).strftime("%Y-%m")
+
+
+def _month_start(when=None):
+    return (when or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _sources():
+    """
+    Queries computing each counter from its source table.
+    """
+    return {
+        USERS: lambda: db.session.query(func.count(User.id)).scalar(),
+        BOOKS: lambda: db.session.query(func.count(Book.id)).scalar(),
+        BORROWED: lambda: db.session.query(func.count(Lending.id)).filter(Lending.status == "borrowed").scalar(),
+        PENDING: lambda: db.session.query(func.count(PendingRequest.id)).filter(PendingRequest.status == "pending").scalar(),
+        sales_key(): lambda: db.session.query(func.sum(Payment.amount)).filter(
+            Payment.status == "completed", Payment.created_at >= _month_start()
+        ).scalar() or 0,
+    }
+
+
+# -------------------------
+# Writes
+# -------------------------
+def _upsert(values, add):
+    """
+    Insert or update counters in `values` (name -> value); `add` adds to the stored value
+    instead of replacing it.
+    """
+    if not values:
+        return
+    table = Counter.__table__
+    stmt = dialect_insert(table)
+    new_value = table.c.value + stmt.excluded.value if add else stmt.excluded.value
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={"value": new_value, "updated_at": stmt.excluded.updated_at},
+    )
+    now = datetime.utcnow()
+    db.session.execute(stmt, [{"name": k, "value": v, "updated_at": now} for k, v in values.items()])
+
+
+def increment(name, delta=1):
+    """
+    Add `delta` to a counter inside the current transaction.
+    """
+    if delta:
+        _upsert({name: delta}, add=True)
+
+
+def record_payment(amount, when=None):
+    """
+    Add a completed payment to the sales counter of its month.
+    """
+    if amount:
+        increment(sales_key(when), Decimal(str(amount)))
+
+
+def reconcile(names=None):
+    """
+    Recompute counters from the source tables and commit. Returns the new values.
+
+    The counter rows are written (and so locked) before counting: a concurrent increment
+    either committed before the lock, and is in the count, or waits for the lock and is
+    applied on top of the recomputed value. On SQLite the first write takes the database
+    write lock, with the same effect.
+    """
+    sources = {name: query for name, query in _sources().items() if names is None or name in names}
+    db.session.execute(
+        update(Counter)
+        .where(Counter.name.in_(list(sources)))
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    values = {name: query() for name, query in sources.items()}
+    _upsert(values, add=False)
+    db.session.commit()
+    return values
+
+
+# -------------------------
+# Reads
+# -------------------------
+def snapshot():
+    """
+    Current value of every dashboard counter (counts as int, sales as Decimal).
+    """
+    names = [USERS, BOOKS, BORROWED, PENDING, sales_key()]
+    rows = dict(db.session.query(Counter.name, Counter.value).filter(Counter.name.in_(names)).all())
+    values = {name: rows.get(name) or 0 for name in names}
+    for name in (USERS, BOOKS, BORROWED, PENDING):
+        values[name] = int(values[name])
+    values["sales"] = Decimal(values.pop(sales_key()))
+    return values
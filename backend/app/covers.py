@@ -0,0 +1,154 @@
+"""
+Cover image storage.
+
+Uploaded originals are stored content-addressed under COVER_STORAGE_DIR, named after the
+SHA-256 of their bytes, so identical uploads share one file and a URL never changes meaning.
+Fixed-width WebP thumbnails (COVER_THUMBNAIL_SIZES) are generated by a small background
+worker pool after the upload is committed. Because every URL is tied to the content hash,
+both originals and thumbnails can be served with long-lived immutable cache headers.
+
+Thumbnails need Pillow; without it uploads still work and the original is served instead.
+"""
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_request_context, url_for
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional
+    Image = None
+
+ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif"}
+CHUNK_SIZE = 64 * 1024
+
+
+def init_app(app):
+    if not app.config.get("COVER_STORAGE_DIR"):
+        app.config["COVER_STORAGE_DIR"] = os.path.join(app.instance_path, "covers")
+    app.extensions["cover_workers"] = ThreadPoolExecutor(
+        max_workers=app.config.get("COVER_WORKERS", 2), thread_name_prefix="cover-thumbs"
+    )
+
+
+# -------------------------
+# Paths and URLs
+# -------------------------
+def _storage_dir():
+    return current_app.config["COVER_STORAGE_DIR"]
+
+
+def original_path(name):
+    """
+    Path of an original, where `name` is "<sha256>.<ext>" as stored in Book.cover_hash.
+    """
+    return os.path.join(_storage_dir(), "originals", name[:2], name)
+
+
+def thumbnail_path(name, size):
+    digest = name.split(".", 1)[0]
+    return os.path.join(_storage_dir(), "thumbs", digest[:2], digest, f"{size}.webp")
+
+
+def pick_size(requested):
+    """
+    Smallest configured thumbnail width that is at least `requested` (largest as a fallback).
+    """
+    sizes = sorted(current_app.config["COVER_THUMBNAIL_SIZES"])
+    for size in sizes:
+        if requested <= size:
+            return size
+    return sizes[-1]
+
+
+def cover_url(name, size):
+    if has_request_context():
+        return url_for("books.cover_thumbnail", name=name, size=size, _external=True)
+    return f"/books/covers/{name}/{size}.webp"
+
+
+# -------------------------
+# Storing and thumbnailing
+# -------------------------
+def store_original(upload):
+    """
+    Stream an uploaded file into content-addressed storage. Returns the stored name
+    ("<sha256>.<ext>"). Raises ValueError for unsupported or oversized files.
+    """
+    ext = os.path.splitext(upload.filename or "")[1].lower().lstrip(".")
+    if ext not in ALLOWED_EXTENSIONS:
+        raise ValueError(f"cover must be one of: {', '.join(sorted(ALLOWED_EXTENSIONS))}")
+    ext = "jpg" if ext == "jpeg" else ext
+    max_bytes = current_app.config.get("COVER_MAX_BYTES", 5 * 1024 * 1024)
+
+    tmp_dir = os.path.join(_storage_dir(), "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest, size = hashlib.sha256(), 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: upload.stream.read(CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError("cover image is too large")
+                digest.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise ValueError("cover image is empty")
+        if Image is not None:
+            try:
+                with Image.open(tmp_path) as img:
+                    img.verify()
+            except Exception:
+                raise ValueError("cover is not a valid image")
+
+        name = f"{digest.hexdigest()}.{ext}"
+        path = original_path(name)
+        if os.path.exists(path):
+            os.remove(tmp_path)  # same content already stored
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return name
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def generate_thumbnails(name, storage_dir, sizes):
+    """
+    Write a WebP thumbnail per width in `sizes`. Runs on the worker pool, so it only
+    depends on plain paths rather than the app context.
+    """
+    if Image is None:
+        return
+    digest = name.split(".", 1)[0]
+    source = os.path.join(storage_dir, "originals", name[:2], name)
+    target_dir = os.path.join(storage_dir, "thumbs", digest[:2], digest)
+    os.makedirs(target_dir, exist_ok=True)
+    with Image.open(source) as img:
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        for size in sizes:
+            target = os.path.join(target_dir, f"{size}.webp")
+            if os.path.exists(target):
+                continue
+            height = max(1, round(img.height * size / img.width))
+            thumb = img.resize((size, height), Image.LANCZOS) if img.width > size else img
+            fd, tmp_path = tempfile.mkstemp(dir=target_dir, suffix=".webp")
+            os.close(fd)
+            thumb.save(tmp_path, "WEBP", quality=80, method=4)
+            os.replace(tmp_path, target)
+
+
+def schedule_thumbnails(name):
+    executor = current_app.extensions["cover_workers"]
+    future = executor.submit(
+        generate_thumbnails, name, _storage_dir(), tuple(current_app.config["COVER_THUMBNAIL_SIZES"])
+    )
+    logger = current_app.logger
+    future.add_done_callback(
+        lambda f: f.exception() and logger.error("Thumbnail generation failed for %s: %s", name, f.exception())
+    )
+    return future
@@ -0,0 +1,202 @@
+"""
+Server-sent events for request status changes and the admin queue.
+
+Handlers call request_changed() / queue_changed() next to the state change. The events are
+held on the session like activity logs and, once the transaction commits, inserted into the
+events table in one statement on a connection of their own (a rollback drops them). Every
+gunicorn worker streams from that table, so an approval handled by one worker reaches a
+client connected to another: GET /events polls the client's channels ("user:<id>", plus
+"admins" for admins) every EVENTS_POLL_INTERVAL seconds. Streams in the worker that published
+are woken at once instead of waiting for the poll.
+
+Ids are taken from the sequence before commit, so an event can become visible after one with
+a higher id. A stream therefore does not skip past an id as soon as it sent it: it rereads
+everything above the last id inserted more than EVENTS_READ_LAG seconds ago (by then all lower
+ids have committed) and leaves out the events it already sent.
+
+A stream ends after EVENTS_STREAM_SECONDS; the browser's EventSource reconnects by itself and
+sends Last-Event-ID. The new stream goes back to the last settled id at or below it, so an
+event may arrive twice around a reconnect, never not at all. Both event types carry state
+rather than changes, so a repeat is harmless. Events older than EVENTS_RETENTION_HOURS are
+removed by `flask events purge`.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, insert, select, delete, func
+from .extensions import db
+from .models import Event, Counter
+from . import counters
+
+ADMIN_CHANNEL = "admins"
+_PENDING_KEY = "events_pending"
+_QUEUE_KEY = "events_queue_changed"
+
+# Wakes this worker's streams when it has just published
+_published = threading.Condition()
+
+
+def init_app(app):
+    if not event.contains(db.session, "after_commit", _hand_off):
+        event.listen(db.session, "after_commit", _hand_off)
+        event.listen(db.session, "after_rollback", _discard)
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+# -------------------------
+# Publishing
+# -------------------------
+def publish(channel, event_type, data):
+    """
+    Queue an event on `channel`; it is stored after the current transaction commits.
+    """
+    db.session.info.setdefault(_PENDING_KEY, []).append({
+        "channel": channel,
+        "type": event_type,
+        "data": json.dumps(data),
+    })
+
+
+def request_changed(request_id, user_id, status, book_id=None):
+    """
+    Tell the owner of a pending request that its status changed.
+    """
+    publish(user_channel(user_id), "request_status", {"id": request_id, "status": status, "book_id": book_id})
+
+
+def queue_changed():
+    """
+    Tell admins the pending queue changed. One queue_length event is sent per transaction,
+    carrying the counter as committed.
+    """
+    db.session.info[_QUEUE_KEY] = True
+
+
+def _hand_off(session):
+    rows = session.info.pop(_PENDING_KEY, None) or []
+    queue = session.info.pop(_QUEUE_KEY, False)
+    if not rows and not queue:
+        return
+    try:
+        with db.engine.begin() as conn:
+            if queue:
+                pending = conn.execute(select(Counter.value).where(Counter.name == counters.PENDING)).scalar()
+                rows.append({
+                    "channel": ADMIN_CHANNEL,
+                    "type": "queue_length",
+                    "data": json.dumps({"pending": int(pending or 0)}),
+                })
+            # Insert time, which streams compare with EVENTS_READ_LAG
+            now = datetime.utcnow()
+            conn.execute(insert(Event.__table__), [{**row, "created_at": now} for row in rows])
+    except Exception:
+        current_app.logger.exception("Failed to publish %d event(s)", len(rows))
+        return
+    with _published:
+        _published.notify_all()
+
+
+def _discard(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_QUEUE_KEY, None)
+
+
+# -------------------------
+# Streaming
+# -------------------------
+def latest_id():
+    with db.engine.connect() as conn:
+        return conn.execute(select(func.max(Event.id))).scalar() or 0
+
+
+def settled_id(channels, at_most, lag):
+    """
+    The highest id on `channels`, not above `at_most`, inserted more than `lag` seconds ago.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=lag)
+    with db.engine.connect() as conn:
+        return conn.execute(
+            select(func.max(Event.id))
+            .where(Event.channel.in_(channels), Event.id <= at_most, Event.created_at <= cutoff)
+        ).scalar() or 0
+
+
+def read(channels, after, limit=100):
+    """
+    Events on `channels` with an id above `after`, oldest first.
+    """
+    with db.engine.connect() as conn:
+        return conn.execute(
+            select(Event.id, Event.type, Event.data, Event.created_at)
+            .where(Event.channel.in_(channels), Event.id > after)
+            .order_by(Event.id)
+            .limit(limit)
+        ).all()
+
+
+def stream(channels, last_id=None):
+    """
+    Generator of text/event-stream chunks for `channels`, resuming from `last_id`
+    (default: only events published from now on). Holds no connection between polls.
+    """
+    config = current_app.config
+    poll = config.get("EVENTS_POLL_INTERVAL", 1.0)
+    keepalive = config.get("EVENTS_KEEPALIVE_SECONDS", 15)
+    batch = config.get("EVENTS_BATCH_SIZE", 100)
+    lag = config.get("EVENTS_READ_LAG", 5.0)
+    deadline = time.monotonic() + config.get("EVENTS_STREAM_SECONDS", 25)
+
+    # settled: every event up to this id has committed and been sent (or predates the stream);
+    # sent: the ids above it that this stream has sent
+    settled = latest_id() if last_id is None else settled_id(channels, last_id, lag)
+    sent = set()
+    yield f"retry: {int(config.get('EVENTS_RETRY_MS', 1000))}\n\n"
+    last_sent = time.monotonic()
+    while True:
+        cutoff = datetime.utcnow() - timedelta(seconds=lag)
+        after, delivered = settled, False
+        while True:
+            rows = read(channels, after, limit=batch)
+            for row in rows:
+                if row.created_at <= cutoff:
+                    settled = row.id
+                if row.id not in sent:
+                    sent.add(row.id)
+                    delivered = True
+                    yield f"id: {row.id}\nevent: {row.type}\ndata: {row.data}\n\n"
+            if len(rows) < batch:
+                break
+            after = rows[-1].id
+        sent = {event_id for event_id in sent if event_id > settled}
+        now = time.monotonic()
+        if delivered:
+            last_sent = now
+        elif now - last_sent >= keepalive:
+            last_sent = now
+            yield ": keepalive\n\n"
+        if now >= deadline:
+            return
+        with _published:
+            _published.wait(timeout=min(poll, deadline - now))
+
+
+# -------------------------
+# Retention
+# -------------------------
+def purge(hours=None, now=None):
+    """
+    Delete events older than `hours` (default EVENTS_RETENTION_HOURS). Returns the count.
+    """
+    if hours is None:
+        hours = current_app.config.get("EVENTS_RETENTION_HOURS", 24)
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=hours)
+    result = db.session.execute(
+        delete(Event).where(Event.created_at < cutoff).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
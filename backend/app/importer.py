@@ -0,0 +1,292 @@
+"""
+Bulk catalog import from CSV or NDJSON.
+
+Records are streamed from the input, validated one by one and written in batches with a
+single multi-row INSERT ... ON CONFLICT (isbn) DO UPDATE per batch, so re-importing a
+supplier file updates the existing titles instead of duplicating them. On Postgres each
+batch is loaded with COPY into a temporary table first (BULK_IMPORT_USE_COPY).
+
+A row whose ISBN comes again later in the same batch is superseded by the later one and
+counted as such, not as imported. When a batch fails, its rows are written again one at a
+time so the report names the lines that actually fail and why.
+"""
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from flask import current_app
+from .extensions import db
+from .models import Book, gen_id
+from .utils import dialect_name, dialect_insert
+from . import search, counters
+from .catalog import mark_catalog_changed
+
+# Columns written for every imported row, in COPY order
+COLUMNS = (
+    "id", "isbn", "title", "author", "category", "price", "copies_available", "location",
+    "description", "cover", "is_available_for_sale", "is_available_for_lending",
+    "uploaded_by", "created_at",
+)
+# Columns refreshed when the ISBN already exists
+UPDATE_COLUMNS = (
+    "title", "author", "category", "price", "copies_available", "location",
+    "description", "cover", "is_available_for_sale", "is_available_for_lending",
+)
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.superseded = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.seconds = 0.0
+
+    def add_error(self, line, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def finish(self):
+        self.seconds = time.monotonic() - self.started
+        return self
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "superseded": self.superseded,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.seconds else None,
+        }
+
+
+# -------------------------
+# Parsing and validation
+# -------------------------
+def iter_records(stream, fmt):
+    """
+    Yield (line_number, record, error) from a text stream. `record` is None when the
+    line could not be parsed.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "expected a JSON object"
+                continue
+            yield line_number, record, None
+    else:
+        raise ValueError("format must be csv or ndjson")
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def validate_record(record, uploaded_by=None, now=None):
+    """
+    Turn a raw record into a books row, following the rules of POST /books.
+    Raises ValueError with a readable message when the record is invalid.
+    """
+    title, author = record.get("title"), record.get("author")
+    if _blank(title):
+        raise ValueError("title is required")
+    if _blank(author):
+        raise ValueError("author is required")
+
+    location = record.get("location") or "Library"
+    if location not in ("Library", "Store"):
+        raise ValueError("location must be Library or Store")
+
+    price = record.get("price")
+    if _blank(price):
+        price = None
+    else:
+        try:
+            price = round(float(price), 2)
+        except (TypeError, ValueError):
+            raise ValueError("price must be a number")
+        if price < 0:
+            raise ValueError("price must not be negative")
+    if location == "Store" and price is None:
+        raise ValueError("price is required for Store books")
+
+    copies = record.get("copies_available")
+    try:
+        copies = 1 if _blank(copies) else int(copies)
+    except (TypeError, ValueError):
+        raise ValueError("copies_available must be an integer")
+    if copies < 0:
+        raise ValueError("copies_available must not be negative")
+
+    isbn = record.get("isbn")
+    isbn = None if _blank(isbn) else str(isbn).strip().replace("-", "")
+    if isbn and len(isbn) > 20:
+        raise ValueError("isbn is too long")
+
+    return {
+        "id": gen_id(),
+        "isbn": isbn,
+        "title": str(title).strip()[:255],
+        "author": str(author).strip()[:255],
+        "category": None if _blank(record.get("category")) else str(record["category"]).strip()[:100],
+        "price": price if location == "Store" else None,
+        "copies_available": copies,
+        "location": location,
+        "description": record.get("description") or None,
+        "cover": None if _blank(record.get("cover")) else str(record["cover"]).strip()[:255],
+        "is_available_for_sale": location == "Store",
+        "is_available_for_lending": location == "Library",
+        "uploaded_by": uploaded_by,
+        "created_at": now or datetime.utcnow(),
+    }
+
+
+# -------------------------
+# Batched writes
+# -------------------------
+def _upsert_batch(rows):
+    table = Book.__table__
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.isbn],
+        # created_at of the incoming row is the import time, reused as updated_at
+        set_={**{c: stmt.excluded[c] for c in UPDATE_COLUMNS}, "updated_at": stmt.excluded.created_at},
+    )
+    db.session.execute(stmt, rows)
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t")
+        .replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def _copy_batch(rows):
+    """
+    Postgres: COPY the batch into a temp table, then upsert from it in one statement.
+    """
+    columns = ", ".join(COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in UPDATE_COLUMNS)
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[c]) for c in COLUMNS) + "\n")
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS books_import "
+            "(LIKE books INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(f"COPY books_import ({columns}) FROM STDIN", buffer)
+        cursor.execute(
+            f"INSERT INTO books ({columns}) SELECT {columns} FROM books_import "
+            f"ON CONFLICT (isbn) DO UPDATE SET {updates}, updated_at = EXCLUDED.created_at"
+        )
+    finally:
+        cursor.close()
+
+
+def _write_rows(rows):
+    """
+    Upsert `rows` (at most one per ISBN), reindex them and commit.
+    """
+    if dialect_name() == "postgresql" and current_app.config.get("BULK_IMPORT_USE_COPY", True):
+        _copy_batch(rows)
+    else:
+        _upsert_batch(rows)
+    search.reindex_books(
+        book_ids=[r["id"] for r in rows if not r["isbn"]], isbns=[r["isbn"] for r in rows if r["isbn"]]
+    )
+    mark_catalog_changed()
+    db.session.commit()
+
+
+def _describe(error):
+    return f"{error.__class__.__name__}: {getattr(error, 'orig', error)}"[:300]
+
+
+def _write_batch(batch, report):
+    """
+    Write one batch of (line_number, row) pairs and commit it.
+    """
+    # A single INSERT ... ON CONFLICT cannot touch the same ISBN twice: the last row wins
+    by_isbn, lines = {}, []
+    for line_number, row in batch:
+        if row["isbn"]:
+            if row["isbn"] in by_isbn:
+                report.superseded += 1
+            by_isbn[row["isbn"]] = (line_number, row)
+        else:
+            lines.append((line_number, row))
+    lines.extend(by_isbn.values())
+
+    try:
+        _write_rows([row for _, row in lines])
+    except Exception:
+        db.session.rollback()
+    else:
+        report.imported += len(lines)
+        return
+
+    # Find the lines that fail
+    for line_number, row in lines:
+        try:
+            _write_rows([row])
+        except Exception as e:
+            db.session.rollback()
+            report.add_error(line_number, _describe(e))
+        else:
+            report.imported += 1
+
+
+def import_books(stream, fmt, uploaded_by=None, batch_size=None):
+    """
+    Import books from a text stream in CSV or NDJSON format. Returns an ImportReport.
+    """
+    batch_size = batch_size or current_app.config.get("BULK_IMPORT_BATCH_SIZE", 1000)
+    report = ImportReport()
+    batch = []
+    for line_number, record, error in iter_records(stream, fmt):
+        report.rows += 1
+        if error is None:
+            try:
+                batch.append((line_number, validate_record(record, uploaded_by=uploaded_by)))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            report.add_error(line_number, error)
+        if len(batch) >= batch_size:
+            _write_batch(batch, report)
+            batch = []
+    if batch:
+        _write_batch(batch, report)
+    # Upserts do not tell inserts from updates, so recount the catalog once
+    counters.reconcile(names=[counters.BOOKS])
+    return report.finish()
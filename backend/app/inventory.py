@@ -0,0 +1,89 @@
+"""
+Stock reservation.
+
+Copies are taken and given back with a single conditional UPDATE instead of reading
+copies_available in Python and writing the result back. The database applies the change
+atomically; on Postgres a concurrent UPDATE of the same row re-checks the WHERE clause after
+the first commits. So two admins approving the last copy can never both succeed, and no
+increment is lost. The caller learns whether the reservation succeeded from the rowcount.
+Keep the reservation close to the commit: the row stays locked until then.
+
+Stock changes do not bump the shared catalog version (app.catalog): they only set
+books.updated_at on the row they already lock, which catalog ETags and the book cache take
+into account.
+"""
+from datetime import datetime
+from sqlalchemy import update, case
+from .extensions import db
+from .models import Book
+
+
+def _availability(for_lending, for_sale):
+    conditions = []
+    if for_lending:
+        conditions.append(Book.is_available_for_lending.is_(True))
+    if for_sale:
+        conditions.append(Book.is_available_for_sale.is_(True))
+    return conditions
+
+
+def reserve_copies(book_id, count=1, for_lending=False, for_sale=False):
+    """
+    Take `count` copies of a book inside the current transaction. Returns False, changing
+    nothing, when the book does not exist, has fewer copies or is not available for the
+    requested use.
+    """
+    conditions = [Book.id == book_id, Book.copies_available >= count, *_availability(for_lending, for_sale)]
+    result = db.session.execute(
+        update(Book)
+        .where(*conditions)
+        .values(copies_available=Book.copies_available - count, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def reserve_many(needs, for_lending=False, for_sale=False):
+    """
+    Take copies of several books at once; `needs` maps book id -> copies wanted.
+    Books with enough stock are reserved in full, books short of stock get whatever is left.
+    Two statements whatever the number of books: a SELECT ... FOR UPDATE (in id order, so
+    concurrent callers cannot deadlock) reads the stock, then one conditional
+    UPDATE ... RETURNING takes min(stock, wanted) of each. Returns book id -> copies reserved
+    (books with none omitted).
+    """
+    if not needs:
+        return {}
+    rows = (
+        db.session.query(Book.id, Book.copies_available)
+        .filter(Book.id.in_(list(needs)), Book.copies_available > 0, *_availability(for_lending, for_sale))
+        .order_by(Book.id)
+        .with_for_update()
+        .all()
+    )
+    taken = {book_id: min(available, needs[book_id]) for book_id, available in rows}
+    if not taken:
+        return {}
+    amount = case(taken, value=Book.id)
+    result = db.session.execute(
+        update(Book)
+        .where(Book.id.in_(list(taken)), Book.copies_available >= amount)
+        .values(copies_available=Book.copies_available - amount, updated_at=datetime.utcnow())
+        .returning(Book.id)
+        .execution_options(synchronize_session=False)
+    )
+    return {book_id: taken[book_id] for book_id in result.scalars()}
+
+
+def release_copies(book_id, count=1):
+    """
+    Give `count` copies of a book back inside the current transaction. Returns False when
+    the book no longer exists.
+    """
+    result = db.session.execute(
+        update(Book)
+        .where(Book.id == book_id)
+        .values(copies_available=Book.copies_available + count, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
@@ -4,6 +4,7 @@ from flask import current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, decode_token
 from .extensions import db
+from .covers import cover_url, pick_size
 
 def gen_id():
     return str(uuid.uuid4())
@@ -11,6 +12,9 @@ def gen_id():
 # -------------------- USER --------------------
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index("ix_users_created_at", "created_at"),
+    )
     id = db.Column(db.String(50), primary_key=True, default=gen_id)
     username = db.Column(db.String(255), unique=True, nullable=True)
     name = db.Column(db.String(255), nullable=True)
@@ -99,9 +103,22 @@ class User(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
+# Prefix search in the admin user listing (varchar_pattern_ops on Postgres, see migration)
+db.Index("ix_users_email_lower", db.func.lower(User.email))
+db.Index("ix_users_name_lower", db.func.lower(User.name))
+
 # -------------------- BOOK --------------------
 class Book(db.Model):
     __tablename__ = "books"
+    __table_args__ = (
+        # Keyset pagination key for the catalog listing
+        db.Index("ix_books_created_at_id", "created_at", "id"),
+        # Catalog filters and facets
+        db.Index("ix_books_category_price", "category", "price"),
+        db.Index("ix_books_availability", "is_available_for_sale", "is_available_for_lending", "copies_available"),
+        # Latest stock change, part of the catalog ETag (see app.catalog)
+        db.Index("ix_books_updated_at", "updated_at"),
+    )
     id = db.Column(db.String(50), primary_key=True, default=gen_id)
     title = db.Column(db.String(255), nullable=False)
     author = db.Column(db.String(255), nullable=False)
@@ -117,6 +134,8 @@ class Book(db.Model):
     uploaded_by = db.Column(db.String(50), db.ForeignKey("users.id"), nullable=True)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow, nullable=True)
     cover = db.Column(db.String(255)) 
+    # "<sha256>.<ext>" of an uploaded cover in content-addressed storage (see app.covers)
+    cover_hash = db.Column(db.String(80), nullable=True)
 
     # Relationships
     purchase_items = db.relationship("PurchaseCartItem", backref="book", lazy="dynamic")
@@ -134,30 +153,160 @@ class Book(db.Model):
         lazy="dynamic"
     )
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "title": self.title,
-            "author": self.author,
-            "isbn": self.isbn,
-            "category": self.category,
-            "price": float(self.price) if self.price else None,
-            "copies_available": self.copies_available,
-            "location": self.location,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "description": self.description,
-            "is_available_for_sale": self.is_available_for_sale,
-            "is_available_for_lending": self.is_available_for_lending,
-            "uploaded_by": self.uploaded_by,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "cover": self.cover or f"https://via.placeholder.com/150?text={self.title.replace(' ', '+')}"
-        }
+    # Fields exposed by to_dict(), in output order. Clients can ask for a subset with ?fields=
+    SERIALIZED_FIELDS = (
+        "id", "title", "author", "isbn", "category", "price", "copies_available", "location",
+        "created_at", "description", "is_available_for_sale", "is_available_for_lending",
+        "uploaded_by", "updated_at", "cover"
+    )
+
+    @classmethod
+    def parse_fields(cls, raw):
+        """
+        Parse a ?fields=id,title,... value. Returns None when no projection was requested
+        and raises ValueError on unknown field names.
+        """
+        if not raw:
+            return None
+        fields = [f.strip() for f in raw.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in cls.SERIALIZED_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+        return [f for f in cls.SERIALIZED_FIELDS if f in fields] or None
+
+    @classmethod
+    def projection(cls, fields, extra=()):
+        """
+        Columns to SELECT for a projected read of `fields` (plus any `extra` columns,
+        e.g. the pagination key). The cover URL needs the title and cover_hash.
+        """
+        names = list(fields) + [f for f in extra if f not in fields]
+        if "cover" in names:
+            names += [f for f in ("title", "cover_hash") if f not in names]
+        return [getattr(cls, name) for name in names]
+
+    @staticmethod
+    def serialize(row, fields, cover_size=None):
+        """
+        Serialize `fields` of a Book instance or of a projected row. Uploaded covers are
+        returned as the thumbnail URL closest to `cover_size` pixels wide.
+        """
+        data = {}
+        for field in fields:
+            value = getattr(row, field)
+            if field == "price":
+                value = float(value) if value else None
+            elif field in ("created_at", "updated_at"):
+                value = value.isoformat() if value else None
+            elif field == "cover":
+                cover_hash = getattr(row, "cover_hash", None)
+                if cover_hash:
+                    value = cover_url(cover_hash, pick_size(cover_size or 0))
+                else:
+                    value = value or f"https://via.placeholder.com/150?text={row.title.replace(' ', '+')}"
+            data[field] = value
+        return data
+
+    def to_dict(self, cover_size=None):
+        return Book.serialize(self, Book.SERIALIZED_FIELDS, cover_size=cover_size)
+
+
+# -------------------- CATALOG VERSION --------------------
+class CatalogVersion(db.Model):
+    """
+    Single-row write counter for the book catalog, bumped by every handler that changes
+    books. Catalog reads derive their ETag / Last-Modified from it.
+    """
+    __tablename__ = "catalog_version"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    last_modified = db.Column(db.DateTime, nullable=True)
+
+
+# -------------------- COUNTERS --------------------
+class Counter(db.Model):
+    """
+    Maintained dashboard totals, see app.counters.
+    """
+    __tablename__ = "counters"
+    name = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# -------------------- REPORTING ROLLUPS --------------------
+class DailyRollup(db.Model):
+    """
+    Borrowings, orders and revenue per day and category, built by app.rollups.
+    """
+    __tablename__ = "daily_rollups"
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)  # "" for uncategorised books
+    borrowings = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+
+class RollupState(db.Model):
+    """
+    High-water mark of the rollups: source rows before `processed_until` are included.
+    """
+    __tablename__ = "rollup_state"
+    name = db.Column(db.String(50), primary_key=True)
+    processed_until = db.Column(db.DateTime, nullable=True)
+
+
+# -------------------- EVENTS --------------------
+class Event(db.Model):
+    """
+    Notifications streamed to clients by GET /events, see app.events.
+    """
+    __tablename__ = "events"
+    __table_args__ = (
+        # A stream reads its channels past the last id it sent
+        db.Index("ix_events_channel_id", "channel", "id"),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    channel = db.Column(db.String(60), nullable=False)  # "user:<id>" or "admins"
+    type = db.Column(db.String(50), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+# -------------------- OUTBOX --------------------
+class OutboxMessage(db.Model):
+    """
+    Domain event written in the same transaction as the change it records, delivered to
+    handlers by app.outbox.
+    """
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # Due messages in order; delivered ones drop out of the index
+        db.Index(
+            "ix_outbox_undelivered", "available_at", "id",
+            postgresql_where=db.text("dispatched_at IS NULL"),
+            sqlite_where=db.text("dispatched_at IS NULL"),
+        ),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    topic = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # lease / retry time
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    dispatched_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
 
 
 # -------------------- PENDING REQUESTS --------------------
 class PendingRequest(db.Model):
     __tablename__ = "pending_requests"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Admin queue filtered by status in arrival order, and a user's own requests
+        db.Index("ix_pending_requests_status_created_at", "status", "created_at", "id"),
+        db.Index("ix_pending_requests_user_id_status", "user_id", "status"),
+        {"extend_existing": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -192,6 +341,10 @@ class PendingRequest(db.Model):
 # -------------------- ORDERS --------------------
 class PurchaseCart(db.Model):
     __tablename__ = "purchase_carts"
+    __table_args__ = (
+        # A user's cart is their oldest one
+        db.Index("ix_purchase_carts_user_id_created_at", "user_id", "created_at", "id"),
+    )
     id = db.Column(db.String(50), primary_key=True, default=gen_id)
     user_id = db.Column(db.String(50), db.ForeignKey("users.id"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -199,6 +352,10 @@ class PurchaseCart(db.Model):
 
 class PurchaseCartItem(db.Model):
     __tablename__ = "purchase_cart_items"
+    __table_args__ = (
+        # Open items of a cart (cart view and badge count)
+        db.Index("ix_purchase_cart_items_cart_id_checked_out", "cart_id", "checked_out", "book_id"),
+    )
     id = db.Column(db.String(50), primary_key=True, default=gen_id)
     cart_id = db.Column(db.String(50), db.ForeignKey("purchase_carts.id"), nullable=False)
     book_id = db.Column(db.String(50), db.ForeignKey("books.id"), nullable=False)
@@ -222,6 +379,10 @@ class LendingCartItem(db.Model):
 
 class Order(db.Model):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Incremental sales rollups scan by approval time
+        db.Index("ix_orders_approved_at", "approved_at"),
+    )
     id = db.Column(db.String(50), primary_key=True, default=gen_id)
     user_id = db.Column(db.String(50), db.ForeignKey("users.id"), nullable=False)
     cart_id = db.Column(db.String(50), db.ForeignKey("purchase_carts.id"), nullable=True)
@@ -264,6 +425,12 @@ class LendingRequest(db.Model):
 # -------------------- LENDING --------------------
 class Lending(db.Model):
     __tablename__ = "lendings"
+    __table_args__ = (
+        # Grouped borrowed counts per user
+        db.Index("ix_lendings_status_user_id", "status", "user_id"),
+        # Incremental borrowing rollups scan by borrow time
+        db.Index("ix_lendings_borrowed_at", "borrowed_at"),
+    )
     id = db.Column(db.String(50), primary_key=True, default=gen_id)
     user_id = db.Column(db.String(50), db.ForeignKey("users.id"), nullable=False)
     book_id = db.Column(db.String(50), db.ForeignKey("books.id"), nullable=False)
@@ -286,13 +453,54 @@ class Payment(db.Model):
 
 # -------------------- LOGS --------------------
 class ActivityLog(db.Model):
+    # On Postgres the table is partitioned by month with PRIMARY KEY (id, created_at), see app.archive
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Newest-first keyset pages, unfiltered and filtered by action or user
+        db.Index("ix_activity_logs_created_at_id", "created_at", "id"),
+        db.Index("ix_activity_logs_action_created_at", "action", "created_at", "id"),
+        db.Index("ix_activity_logs_user_id_created_at", "user_id", "created_at", "id"),
+        # Per-entity history
+        db.Index("ix_activity_logs_book_id_created_at", "book_id", "created_at", "id"),
+        db.Index("ix_activity_logs_request_id_created_at", "request_id", "created_at", "id"),
+        db.Index("ix_activity_logs_order_id_created_at", "order_id", "created_at", "id"),
+    )
     id = db.Column(db.String(50), primary_key=True, default=gen_id)
     user_id = db.Column(db.String(50), db.ForeignKey("users.id"), nullable=False)
     action = db.Column(db.String(50), nullable=False)
     item = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     description = db.Column(db.Text, nullable=True)
+    # Entities the entry is about; no foreign keys so history outlives deleted rows
+    book_id = db.Column(db.String(50), nullable=True)
+    request_id = db.Column(db.Integer, nullable=True)
+    order_id = db.Column(db.String(50), nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "action": self.action,
+            "item": self.item,
+            "description": self.description,
+            "book_id": self.book_id,
+            "request_id": self.request_id,
+            "order_id": self.order_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class ActivityLogArchive(db.Model):
+    """
+    Archived activity logs, see app.archive: one gzipped NDJSON chunk (newest log first) per
+    row, so a month is written and read back a chunk at a time.
+    """
+    __tablename__ = "activity_log_archives"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    month = db.Column(db.String(7), nullable=False, index=True)  # "YYYY-MM"
+    rows = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 # -------------------- RETURN REQUESTS --------------------
 class ReturnRequest(db.Model):
@@ -0,0 +1,264 @@
+"""
+Transactional outbox for domain events.
+
+A handler that changes state records what happened with emit(topic, **payload), or
+emit_many(topic, payloads) for a batch. The message is an outbox row in the same transaction,
+so it exists if and only if the change committed. The side effects that need not hold up the
+response (activity logs, cart population, the sales counter, notifications) are handlers
+registered with @handler(topic), see app.subscribers.
+
+An OutboxDispatcher thread per worker delivers the messages. It claims up to
+OUTBOX_BATCH_SIZE due messages with one UPDATE ... RETURNING that leases them for
+OUTBOX_LEASE_SECONDS, so two workers do not deliver a message at the same time, and passes
+each topic's payloads to its handlers as one list. The handlers' writes commit together with
+the dispatched_at mark; if another worker marked a message first, the batch is rolled back.
+A failing batch is retried one message at a time, and a failing message is retried with
+exponential backoff up to OUTBOX_MAX_ATTEMPTS times. Delivery is at-least-once, so handlers
+must be idempotent.
+
+Each worker starts its dispatcher with the first request it serves, so messages left by an
+earlier run or a failed delivery go out without waiting for the next emit; CLI commands
+(migrations, cron jobs) do not start one. The dispatcher wakes right after a commit that
+emitted and otherwise polls every OUTBOX_POLL_INTERVAL seconds. With OUTBOX_ASYNC off, messages are delivered synchronously
+after the commit. `flask outbox dispatch` delivers from the command line.
+"""
+import atexit
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, select, insert, update, delete, func
+from .extensions import db
+from .models import OutboxMessage
+
+_EMITTED_KEY = "outbox_emitted"
+_handlers = defaultdict(list)
+
+
+def init_app(app):
+    dispatcher = app.extensions["outbox_dispatcher"] = OutboxDispatcher(app)
+    if app.config.get("OUTBOX_ASYNC", True):
+        app.before_request(dispatcher.start)
+    if not event.contains(db.session, "after_commit", _wake_dispatcher):
+        event.listen(db.session, "after_commit", _wake_dispatcher)
+        event.listen(db.session, "after_rollback", _discard)
+    from . import subscribers  # noqa: F401  registers the handlers
+
+
+# -------------------------
+# Emitting
+# -------------------------
+def handler(topic):
+    """
+    Register a function taking a list of payloads as a handler of `topic`.
+    """
+    def register(fn):
+        _handlers[topic].append(fn)
+        return fn
+    return register
+
+
+def emit(topic, **payload):
+    """
+    Record a domain event in the current transaction.
+    """
+    db.session.add(OutboxMessage(topic=topic, payload=json.dumps(payload, default=str)))
+    db.session.info[_EMITTED_KEY] = True
+
+
+def emit_many(topic, payloads):
+    """
+    Record one domain event per payload in the current transaction, with a single INSERT.
+    """
+    rows = [{"topic": topic, "payload": json.dumps(payload, default=str)} for payload in payloads]
+    if rows:
+        db.session.execute(insert(OutboxMessage), rows)
+        db.session.info[_EMITTED_KEY] = True
+
+
+def _wake_dispatcher(session):
+    if not session.info.pop(_EMITTED_KEY, False):
+        return
+    dispatcher = current_app.extensions["outbox_dispatcher"]
+    if current_app.config.get("OUTBOX_ASYNC", True):
+        dispatcher.notify()
+    else:
+        dispatcher.drain()
+
+
+def _discard(session):
+    session.info.pop(_EMITTED_KEY, None)
+
+
+# -------------------------
+# Delivering
+# -------------------------
+def _claim(limit):
+    """
+    Lease up to `limit` due messages and commit. Returns their rows in id order.
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    due = (
+        select(OutboxMessage.id)
+        .where(
+            OutboxMessage.dispatched_at.is_(None),
+            OutboxMessage.available_at <= now,
+            OutboxMessage.attempts < config.get("OUTBOX_MAX_ATTEMPTS", 10),
+        )
+        .order_by(OutboxMessage.available_at, OutboxMessage.id)
+        .limit(limit)
+    )
+    rows = db.session.execute(
+        update(OutboxMessage)
+        # Re-checked under the row lock, so a message leased meanwhile is skipped
+        .where(OutboxMessage.id.in_(due), OutboxMessage.dispatched_at.is_(None), OutboxMessage.available_at <= now)
+        .values(
+            available_at=now + timedelta(seconds=config.get("OUTBOX_LEASE_SECONDS", 60)),
+            attempts=OutboxMessage.attempts + 1,
+        )
+        .returning(OutboxMessage.id, OutboxMessage.topic, OutboxMessage.payload, OutboxMessage.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return sorted(rows, key=lambda row: row.id)
+
+
+def _deliver(topic, messages):
+    """
+    Run the handlers of `topic` over `messages` and mark them dispatched, in one
+    transaction. Returns False when the batch failed.
+    """
+    ids = [message.id for message in messages]
+    try:
+        payloads = [json.loads(message.payload) for message in messages]
+        for fn in _handlers.get(topic, ()):
+            fn(payloads)
+        result = db.session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids), OutboxMessage.dispatched_at.is_(None))
+            .values(dispatched_at=datetime.utcnow(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(ids):
+            # Another worker delivered some of them after our lease ran out
+            db.session.rollback()
+            return len(ids) == 1
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        if len(messages) == 1:
+            _fail(messages[0], e)
+        return False
+
+
+def _fail(message, error):
+    current_app.logger.error("Outbox message %s (%s) failed: %r", message.id, message.topic, error)
+    retry_in = min(2 ** message.attempts, 3600)
+    db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id == message.id)
+        .values(available_at=datetime.utcnow() + timedelta(seconds=retry_in), last_error=repr(error)[:1000])
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def dispatch(limit=None):
+    """
+    Deliver one batch of due messages. Returns the number of messages claimed.
+    """
+    claimed = _claim(limit or current_app.config.get("OUTBOX_BATCH_SIZE", 100))
+    by_topic = defaultdict(list)
+    for message in claimed:
+        by_topic[message.topic].append(message)
+    for topic, messages in by_topic.items():
+        if not _deliver(topic, messages) and len(messages) > 1:
+            for message in messages:
+                _deliver(topic, [message])
+    return len(claimed)
+
+
+def stuck():
+    """
+    Number of undelivered messages that ran out of attempts.
+    """
+    return db.session.query(func.count(OutboxMessage.id)).filter(
+        OutboxMessage.dispatched_at.is_(None),
+        OutboxMessage.attempts >= current_app.config.get("OUTBOX_MAX_ATTEMPTS", 10),
+    ).scalar()
+
+
+def purge(hours=None, now=None):
+    """
+    Delete messages delivered more than `hours` (default OUTBOX_RETENTION_HOURS) ago.
+    """
+    if hours is None:
+        hours = current_app.config.get("OUTBOX_RETENTION_HOURS", 24)
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=hours)
+    result = db.session.execute(
+        delete(OutboxMessage)
+        .where(OutboxMessage.dispatched_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+class OutboxDispatcher:
+    """
+    Daemon thread delivering outbox messages, woken after commits that emitted.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.poll_interval = app.config.get("OUTBOX_POLL_INTERVAL", 2.0)
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def start(self):
+        # Again in a forked worker, where the parent's thread is gone; cheap once running
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+                self._thread.start()
+
+    def notify(self):
+        self.start()
+        self._wake.set()
+
+    def drain(self):
+        """
+        Deliver every due message from the calling thread. Returns the number claimed.
+        """
+        total = 0
+        with self.app.app_context():
+            while True:
+                claimed = dispatch()
+                if not claimed:
+                    return total
+                total += claimed
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception:
+                self.app.logger.exception("Outbox dispatch failed")
+
+    def close(self):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
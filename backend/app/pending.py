@@ -0,0 +1,274 @@
+"""
+Pending request queue queries and bulk decisions.
+
+The admin queue is listed with one joined query that selects only the columns the page
+shows (request, requester name, book summary), filtered on status/action and optionally
+keyset-paginated over (created_at, id), oldest first, backed by the (status, created_at)
+and (user_id, status) indexes.
+
+bulk_decide() approves or declines many pending requests in one transaction: the requests
+are locked with one SELECT ... FOR UPDATE, borrow copies for all books are reserved with
+inventory.reserve_many() (one locking read, one UPDATE) and the requests that can proceed
+are claimed with a single UPDATE ... RETURNING. A borrow without a copy is never touched, so
+it keeps its place in the (status, created_at, id) order. Approved books reach the purchase carts through the outbox, where add_to_carts()
+creates missing carts and cart items with multi-row INSERTs.
+mark_purchased() likewise checks out all of a user's approved requests in a fixed number of
+statements, whatever the cart size.
+"""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import update, insert, select, tuple_
+from .extensions import db
+from .models import PendingRequest, User, Book, PurchaseCart, PurchaseCartItem, gen_id
+from .utils import keyset_paginate
+from .inventory import reserve_many
+from .outbox import emit_many
+from . import counters, events
+
+
+def _split(value):
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+
+def request_query(args, user_id=None):
+    """
+    Column query over pending requests joined to their user and book. `user_id` limits it
+    to one user's requests; ?status= and ?action= take comma-separated values.
+    """
+    query = (
+        db.session.query(
+            PendingRequest.id,
+            PendingRequest.user_id,
+            User.name.label("user_name"),
+            PendingRequest.book_id,
+            Book.id.label("book_row_id"),
+            Book.title,
+            Book.author,
+            Book.price,
+            Book.cover,
+            PendingRequest.action,
+            PendingRequest.status,
+            PendingRequest.created_at,
+        )
+        .outerjoin(User, User.id == PendingRequest.user_id)
+        .outerjoin(Book, Book.id == PendingRequest.book_id)
+    )
+    if user_id is not None:
+        query = query.filter(PendingRequest.user_id == user_id)
+    statuses, actions = _split(args.get("status")), _split(args.get("action"))
+    if statuses:
+        query = query.filter(PendingRequest.status.in_(statuses))
+    if actions:
+        query = query.filter(PendingRequest.action.in_(actions))
+    return query
+
+
+def serialize(row):
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "user": row.user_name or row.user_id,
+        "book_id": row.book_id,
+        "book": {
+            "id": row.book_row_id,
+            "title": row.title,
+            "author": row.author,
+            "price": row.price,
+            "cover": row.cover,
+        } if row.book_row_id else None,
+        "action": row.action,
+        "status": row.status,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def list_requests(args, user_id=None, limit=None):
+    """
+    Serialized requests matching `args`. Without `limit` every match is returned as a list;
+    with it, returns (page, next_cursor) starting after ?after=. Raises ValueError for a
+    bad cursor.
+    """
+    query = request_query(args, user_id=user_id)
+    if limit is None:
+        rows = query.order_by(PendingRequest.created_at, PendingRequest.id).all()
+        return [serialize(row) for row in rows]
+    rows, next_cursor = keyset_paginate(
+        query, PendingRequest.created_at, PendingRequest.id, limit, after=args.get("after")
+    )
+    return [serialize(row) for row in rows], next_cursor
+
+
+# -------------------------
+# Bulk decisions
+# -------------------------
+BULK_ACTIONS = {"approve": ("approved", "Approved"), "decline": ("declined", "Declined")}
+
+
+def holds_copy(action, status):
+    """
+    Whether a request in `status` holds a copy of its book: a borrow takes one when approved
+    and gives it back when its return is approved.
+    """
+    return (action or "").lower() == "borrow" and status in ("approved", "borrowed", "return_pending")
+
+
+def _lock_pending(ids):
+    """
+    The still-pending requests among `ids`, locked until the transaction ends.
+    """
+    return db.session.execute(
+        select(PendingRequest.id, PendingRequest.user_id, PendingRequest.book_id,
+               PendingRequest.action, PendingRequest.created_at)
+        .where(PendingRequest.id.in_(ids), PendingRequest.status == "pending")
+        .order_by(PendingRequest.id)
+        .with_for_update()
+    ).all()
+
+
+def _claim(ids, status):
+    """
+    Move the still-pending requests among `ids` to `status`; returns their rows.
+    """
+    result = db.session.execute(
+        update(PendingRequest)
+        .where(PendingRequest.id.in_(ids), PendingRequest.status == "pending")
+        .values(status=status, updated_at=datetime.utcnow())
+        .returning(PendingRequest.id, PendingRequest.user_id, PendingRequest.book_id,
+                   PendingRequest.action, PendingRequest.created_at)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
+
+
+def _reserve_borrows(requests):
+    """
+    Reserve one copy per borrow request, oldest requests first.
+    Returns the ids of the borrow requests that got no copy.
+    """
+    borrows = defaultdict(list)
+    for row in sorted(requests, key=lambda r: (r.created_at or datetime.min, r.id)):
+        if (row.action or "").lower() == "borrow":
+            borrows[row.book_id].append(row.id)
+    reserved = reserve_many({book_id: len(ids) for book_id, ids in borrows.items()}, for_lending=True)
+    return [rid for book_id, ids in borrows.items() for rid in ids[reserved.get(book_id, 0):]]
+
+
+def add_to_carts(pairs):
+    """
+    Put each (user_id, book_id) book in its user's purchase cart, creating carts and items
+    that do not exist yet with one INSERT each.
+    """
+    pairs = set(pairs)
+    user_ids = {user_id for user_id, _ in pairs}
+    carts = {}
+    for cart_id, user_id in (
+        db.session.query(PurchaseCart.id, PurchaseCart.user_id)
+        .filter(PurchaseCart.user_id.in_(user_ids))
+        .order_by(PurchaseCart.created_at, PurchaseCart.id)
+    ):
+        carts.setdefault(user_id, cart_id)
+    new_carts = [
+        {"id": gen_id(), "user_id": user_id, "created_at": datetime.utcnow()}
+        for user_id in user_ids if user_id not in carts
+    ]
+    if new_carts:
+        db.session.execute(insert(PurchaseCart), new_carts)
+        carts.update((cart["user_id"], cart["id"]) for cart in new_carts)
+
+    wanted = {(carts[user_id], book_id) for user_id, book_id in pairs}
+    existing = set(
+        db.session.query(PurchaseCartItem.cart_id, PurchaseCartItem.book_id)
+        .filter(
+            tuple_(PurchaseCartItem.cart_id, PurchaseCartItem.book_id).in_(list(wanted)),
+            PurchaseCartItem.checked_out.is_(False),
+        )
+    )
+    new_items = [
+        {"id": gen_id(), "cart_id": cart_id, "book_id": book_id, "quantity": 1,
+         "checked_out": False, "source": "store"}
+        for cart_id, book_id in wanted - existing
+    ]
+    if new_items:
+        db.session.execute(insert(PurchaseCartItem), new_items)
+
+
+def bulk_decide(ids, action, admin_id):
+    """
+    Approve or decline the pending requests `ids` in the current transaction (the caller
+    commits). Returns {id: outcome} with outcome one of "approved", "declined",
+    "not_found", "not_pending" or "out_of_stock".
+    """
+    status, log_action = BULK_ACTIONS[action]
+    requests = _lock_pending(ids)
+    outcomes = {}
+
+    if action == "approve":
+        unreserved = set(_reserve_borrows(requests))
+        outcomes.update((rid, "out_of_stock") for rid in unreserved)
+        requests = [row for row in requests if row.id not in unreserved]
+    claimed = _claim([row.id for row in requests], status) if requests else []
+    outcomes.update((row.id, status) for row in claimed)
+
+    unclaimed = [rid for rid in ids if rid not in outcomes]
+    if unclaimed:
+        found = {rid for (rid,) in db.session.query(PendingRequest.id).filter(PendingRequest.id.in_(unclaimed))}
+        outcomes.update((rid, "not_pending" if rid in found else "not_found") for rid in unclaimed)
+
+    counters.increment(counters.PENDING, -len(claimed))
+    if claimed:
+        events.queue_changed()
+    # Carts, logs and notifications follow from the outbox (app.subscribers)
+    emit_many("request.status_changed", [
+        {
+            "request_id": row.id,
+            "user_id": row.user_id,
+            "book_id": row.book_id,
+            "status": status,
+            "actor_id": admin_id,
+            "log_action": log_action,
+        }
+        for row in claimed
+    ])
+    return outcomes
+
+
+def mark_purchased(user_id):
+    """
+    Move all of a user's approved requests to "purchased" and check their books out of the
+    user's purchase carts, in the current transaction. Returns the number of requests.
+    """
+    purchased = db.session.execute(
+        update(PendingRequest)
+        .where(PendingRequest.user_id == user_id, PendingRequest.status == "approved")
+        .values(status="purchased", updated_at=datetime.utcnow())
+        .returning(PendingRequest.id, PendingRequest.book_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not purchased:
+        return 0
+
+    book_ids = {row.book_id for row in purchased}
+    db.session.execute(
+        update(PurchaseCartItem)
+        .where(
+            PurchaseCartItem.cart_id.in_(select(PurchaseCart.id).where(PurchaseCart.user_id == user_id)),
+            PurchaseCartItem.book_id.in_(book_ids),
+            PurchaseCartItem.checked_out.is_(False),
+        )
+        .values(checked_out=True)
+        .execution_options(synchronize_session=False)
+    )
+
+    # Logs and notifications follow from the outbox (app.subscribers)
+    emit_many("request.status_changed", [
+        {
+            "request_id": row.id,
+            "user_id": user_id,
+            "book_id": row.book_id,
+            "status": "purchased",
+            "actor_id": user_id,
+            "log_action": "Purchased",
+        }
+        for row in purchased
+    ])
+    return len(purchased)
@@ -0,0 +1,215 @@
+"""
+Daily reporting rollups.
+
+daily_rollups holds borrowings, orders and revenue per calendar day (UTC) and book category.
+Revenue comes from each order's own total_amount (split over its items by quantity), never
+from current book prices, and books are outer-joined only for their category, so later price
+edits or deleted books do not change history; rows without a book count as uncategorised.
+build() adds only the source rows that arrived since the last run: lendings by borrowed_at and
+approved orders by approved_at, up to ROLLUP_LAG_SECONDS before now so rows still being
+committed are not skipped. The high-water mark lives in rollup_state and is advanced with a
+conditional UPDATE, so concurrent builds cannot count the same window twice.
+
+build() runs from `flask reports rollup` (hourly cron job in render.yaml). Reports only read:
+they sum the rollup by day range and add the source rows past the high-water mark, aggregated
+on the fly, so they are current without writing anything.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import func, update, delete, select, case, cast, or_, Float, Numeric
+from .extensions import db
+from .models import DailyRollup, RollupState, Lending, Order, OrderItem, Book
+from .utils import day_bucket, as_date, dialect_insert
+
+STATE_NAME = "daily"
+# Order statuses that count as a sale (payment moves Approved orders to completed)
+SALE_STATUSES = ("Approved", "approved", "completed")
+UNCATEGORISED = ""
+
+# Exact on Postgres; on SQLite a Numeric holding whole amounts is an integer, so divide as REAL
+AMOUNT = Numeric(12, 4).with_variant(Float(), "sqlite")
+
+
+def _lending_rows(since, until):
+    day = day_bucket(Lending.borrowed_at)
+    category = func.coalesce(Book.category, UNCATEGORISED)
+    query = (
+        db.session.query(day.label("day"), category.label("category"), func.count(Lending.id))
+        .outerjoin(Book, Book.id == Lending.book_id)
+        .filter(Lending.borrowed_at < until)
+    )
+    if since is not None:
+        query = query.filter(Lending.borrowed_at >= since)
+    return query.group_by(day, category).all()
+
+
+def _order_rows(since, until):
+    day = day_bucket(Order.approved_at)
+    category = func.coalesce(Book.category, UNCATEGORISED)
+    # Each item's share of the order total, by quantity; an order without items is one share.
+    # The order itself is counted once, in the category of its first item.
+    order_quantity = (
+        select(
+            OrderItem.order_id,
+            func.sum(OrderItem.quantity).label("quantity"),
+            func.min(OrderItem.id).label("first_item"),
+        )
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+    share = (
+        cast(func.coalesce(Order.total_amount, 0), AMOUNT) * func.coalesce(OrderItem.quantity, 1)
+        / func.coalesce(func.nullif(order_quantity.c.quantity, 0), 1)
+    )
+    query = (
+        db.session.query(
+            day.label("day"),
+            category.label("category"),
+            func.sum(case((or_(OrderItem.id.is_(None), OrderItem.id == order_quantity.c.first_item), 1), else_=0)),
+            func.sum(share),
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(order_quantity, order_quantity.c.order_id == Order.id)
+        .outerjoin(Book, Book.id == OrderItem.book_id)
+        .filter(Order.status.in_(SALE_STATUSES), Order.approved_at < until)
+    )
+    if since is not None:
+        query = query.filter(Order.approved_at >= since)
+    return query.group_by(day, category).all()
+
+
+def _advance(since, until):
+    """
+    Move the high-water mark from `since` to `until`. False when another build got there first.
+    """
+    state = db.session.get(RollupState, STATE_NAME)
+    if state is None:
+        db.session.add(RollupState(name=STATE_NAME, processed_until=until))
+        db.session.flush()
+        return since is None
+    condition = RollupState.processed_until.is_(None) if since is None else RollupState.processed_until == since
+    result = db.session.execute(
+        update(RollupState)
+        .where(RollupState.name == STATE_NAME, condition)
+        .values(processed_until=until)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _collect(since, until):
+    """
+    Source rows in [since, until) per (day, category): {"borrowings", "orders", "revenue"}.
+    """
+    buckets = defaultdict(lambda: {"borrowings": 0, "orders": 0, "revenue": Decimal("0")})
+    for day, category, count in _lending_rows(since, until):
+        buckets[(as_date(day), category)]["borrowings"] += count
+    for day, category, count, revenue in _order_rows(since, until):
+        bucket = buckets[(as_date(day), category)]
+        bucket["orders"] += count
+        bucket["revenue"] += Decimal(str(revenue or 0)).quantize(Decimal("0.01"))
+    return buckets
+
+
+def processed_until():
+    return db.session.query(RollupState.processed_until).filter(RollupState.name == STATE_NAME).scalar()
+
+
+def build(now=None):
+    """
+    Fold source rows since the high-water mark into daily_rollups and commit.
+    Returns the number of (day, category) buckets touched.
+    """
+    lag = current_app.config.get("ROLLUP_LAG_SECONDS", 300)
+    until = (now or datetime.utcnow()) - timedelta(seconds=lag)
+    since = processed_until()
+    if since is not None and since >= until:
+        return 0
+
+    if not _advance(since, until):
+        db.session.rollback()
+        return 0
+
+    buckets = _collect(since, until)
+    if buckets:
+        table = DailyRollup.__table__
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.category],
+            set_={c: table.c[c] + stmt.excluded[c] for c in ("borrowings", "orders", "revenue")},
+        )
+        db.session.execute(stmt, [
+            {"day": day, "category": category, **values} for (day, category), values in buckets.items()
+        ])
+    db.session.commit()
+    return len(buckets)
+
+
+def rebuild():
+    """
+    Drop all rollups and rebuild them from scratch.
+    """
+    db.session.execute(delete(DailyRollup))
+    db.session.execute(
+        update(RollupState).where(RollupState.name == STATE_NAME).values(processed_until=None)
+    )
+    db.session.commit()
+    return build()
+
+
+# -------------------------
+# Reporting
+# -------------------------
+PERIOD_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+
+
+MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def report(columns, start=None, end=None, period="month", category=None, month=None):
+    """
+    Sum `columns` of daily_rollups per period over the inclusive day range [start, end],
+    optionally only days of the calendar month named `month` ("Jan".."Dec", any year).
+    Returns a list of dicts ordered by period; day and month periods also carry the
+    abbreviated month name under "month", as the reports did before the rollups.
+    Read-only: rows not yet rolled up are aggregated from the source tables.
+    """
+    query = db.session.query(
+        DailyRollup.day, *(func.sum(getattr(DailyRollup, c)) for c in columns)
+    )
+    if start:
+        query = query.filter(DailyRollup.day >= start)
+    if end:
+        query = query.filter(DailyRollup.day <= end)
+    if category is not None:
+        query = query.filter(DailyRollup.category == category)
+    days = defaultdict(lambda: [0] * len(columns))
+    for row in query.group_by(DailyRollup.day):
+        days[as_date(row[0])] = list(row[1:])
+    for (day, bucket_category), values in _collect(processed_until(), datetime.utcnow()).items():
+        if (start and day < start) or (end and day > end):
+            continue
+        if category is not None and bucket_category != category:
+            continue
+        sums = days[day]
+        for i, c in enumerate(columns):
+            sums[i] = (sums[i] or 0) + values[c]
+
+    fmt = PERIOD_FORMATS[period]
+    totals = {}
+    for day in sorted(days):
+        row = (day, *days[day])
+        if month and MONTH_NAMES[day.month - 1] != month:
+            continue
+        key = day.strftime(fmt)
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = {"period": key, **{c: 0 for c in columns}}
+            if period != "year":
+                entry["month"] = MONTH_NAMES[day.month - 1]
+        for c, value in zip(columns, row[1:]):
+            entry[c] += value or 0
+    # Days with activity of another kind only (e.g. orders in a borrowing report) are dropped
+    return [entry for entry in totals.values() if any(entry[c] for c in columns)]
@@ -1,23 +1,57 @@
-from flask import Blueprint, jsonify
-from app.models import ActivityLog
-from app.extensions import db
+from flask import Blueprint, jsonify, request
+from app.activity import list_logs
+from app.authz import admin_required
 
 activity_logs_bp = Blueprint("activity_logs", __name__)
 
-# GET all logs
+# GET logs, newest first, one page per call (?limit=, ?after=<next_cursor>)
 @activity_logs_bp.route("/logs", methods=["GET"])
 def get_logs():
-    logs = ActivityLog.query.all()
-    return jsonify([
-        {
-            "id": log.id,
-            "action": log.action,
-            "description": log.item,
-            "date": log.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "user_id": log.user_id 
-        }
-        for log in logs
-    ]), 200
+    try:
+        logs, next_cursor = list_logs(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return jsonify({
+        "items": [
+            {
+                "id": log.id,
+                "action": log.action,
+                "description": log.item,
+                "date": log.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "user_id": log.user_id
+            }
+            for log in logs
+        ],
+        "next_cursor": next_cursor
+    }), 200
+
+# GET the history of one book, pending request or order, newest first
+def _entity_logs(column, value):
+    args = request.args.to_dict()
+    args[column] = value
+    try:
+        logs, next_cursor = list_logs(args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return jsonify({"items": [log.to_dict() for log in logs], "next_cursor": next_cursor}), 200
+
+
+@activity_logs_bp.route("/logs/books/<book_id>", methods=["GET"])
+@admin_required
+def get_book_logs(book_id):
+    return _entity_logs("book_id", book_id)
+
+
+@activity_logs_bp.route("/logs/requests/<int:request_id>", methods=["GET"])
+@admin_required
+def get_request_logs(request_id):
+    return _entity_logs("request_id", str(request_id))
+
+
+@activity_logs_bp.route("/logs/orders/<order_id>", methods=["GET"])
+@admin_required
+def get_order_logs(order_id):
+    return _entity_logs("order_id", order_id)
 
 # GET all possible log actions
 @activity_logs_bp.route("/logActions", methods=["GET"])
@@ -1,56 +1,71 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, jsonify, request, current_app
+from flask_jwt_extended import get_jwt_identity
 from ..extensions import db
-from ..models import User, Book, ActivityLog, PendingRequest, LendingRequest, Lending, Order, OrderItem, Payment
+from ..models import User, Book, PendingRequest, LendingRequest, Lending, Order, OrderItem
 from sqlalchemy import func
-from datetime import datetime, timedelta
-from functools import wraps
+from datetime import date, datetime, timedelta
+from .. import search, counters, rollups, archive, events
+from ..authz import admin_required
+from ..catalog import mark_catalog_changed, delete_books
+from ..activity import list_logs
+from ..outbox import emit
+from ..utils import get_limit
+from ..pending import list_requests as list_pending, holds_copy
+from ..inventory import reserve_copies, release_copies
 
 bp = Blueprint("admin", __name__, url_prefix="/admin")
 
 
-# ✅ Admin-only decorator
-def admin_required(f):
-    @wraps(f)
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user or user.role != "admin":
-            return jsonify({"msg": "Admin access required"}), 403
-        return f(*args, **kwargs)
-    return wrapper
-
-
 @bp.route("/dashboard", methods=["GET"])
 @admin_required
 def dashboard():
-    total_books = Book.query.count()
-    total_users = User.query.count()
-    borrowed_books = Lending.query.filter_by(status="borrowed").count()
-    total_sales = db.session.query(func.sum(Payment.amount)).filter(
-        Payment.status == "completed",
-        Payment.created_at >= datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    ).scalar() or 0
+    stats = counters.snapshot()
 
     return jsonify({
-        "total_books": total_books,
-        "total_users": total_users,
-        "borrowed_books": borrowed_books,
-        "sales": f"${total_sales:.2f}"
+        "total_books": stats[counters.BOOKS],
+        "total_users": stats[counters.USERS],
+        "borrowed_books": stats[counters.BORROWED],
+        "sales": f"${stats['sales']:.2f}"
     }), 200
 
 
+USER_SORTS = ("borrowed_count", "role", "created_at", "name", "email")
+
+
+def _escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 @bp.route("/users", methods=["GET"])
 @admin_required
 def get_users():
-    search_term = request.args.get("search", "")
+    search_term = request.args.get("search", "").strip().lower()
     page = int(request.args.get("page", 1))
-    per_page = int(request.args.get("per_page", 10))
+    per_page = min(int(request.args.get("per_page", 10)), current_app.config["MAX_PAGE_SIZE"])
+    sort = request.args.get("sort", "created_at")
+    if sort.lstrip("-") not in USER_SORTS:
+        return jsonify({"msg": f"sort must be one of: {', '.join(USER_SORTS)}"}), 400
 
-    query = User.query.filter(
-        (User.name.ilike(f"%{search_term}%")) | (User.email.ilike(f"%{search_term}%"))
-    )
+    # One grouped count of borrowed lendings, left-joined instead of two COUNTs per user
+    borrowed = db.session.query(
+        Lending.user_id, func.count().label("borrowed_count")
+    ).filter(Lending.status == "borrowed").group_by(Lending.user_id).subquery()
+    borrowed_count = func.coalesce(borrowed.c.borrowed_count, 0).label("borrowed_count")
+
+    query = db.session.query(
+        User.id, User.name, User.email, User.role, User.created_at, borrowed_count
+    ).outerjoin(borrowed, borrowed.c.user_id == User.id)
+
+    if search_term:
+        # Prefix match on lower(email) / lower(name), backed by the ix_users_*_lower indexes
+        prefix = _escape_like(search_term) + "%"
+        query = query.filter(
+            (func.lower(User.email).like(prefix, escape="\\")) |
+            (func.lower(User.name).like(prefix, escape="\\"))
+        )
+
+    column = borrowed_count if sort.lstrip("-") == "borrowed_count" else getattr(User, sort.lstrip("-"))
+    query = query.order_by(column.desc() if sort.startswith("-") else column.asc(), User.id)
     paginated_users = query.paginate(page=page, per_page=per_page, error_out=False)
 
     return jsonify({
@@ -59,8 +74,9 @@ def get_users():
             "name": user.name or user.email,
             "email": user.email,
             "role": user.role,  # ✅ added role
-            "borrowed_count": user.lendings.filter_by(status="borrowed").count(),
-            "status": "Active" if user.lendings.filter_by(status="borrowed").count() > 0 else "Inactive"
+            "created_at": user.created_at.isoformat() if user.created_at else None,
+            "borrowed_count": user.borrowed_count,
+            "status": "Active" if user.borrowed_count > 0 else "Inactive"
         } for user in paginated_users.items],
         "total": paginated_users.total,
         "pages": paginated_users.pages,
@@ -75,6 +91,7 @@ def delete_user(user_id):
     if not user:
         return jsonify({"msg": "User not found"}), 404
     db.session.delete(user)
+    counters.increment(counters.USERS, -1)
     db.session.commit()
     return jsonify({"msg": "User deleted"}), 200
 
@@ -104,6 +121,7 @@ def create_user():
     new_user.set_password(password)  # assuming you have set_password for hashing
 
     db.session.add(new_user)
+    counters.increment(counters.USERS)
     db.session.commit()
 
     return jsonify({
@@ -121,10 +139,12 @@ def create_user():
 @bp.route("/books", methods=["GET"])
 @admin_required
 def get_books():
-    search_term = request.args.get("search", "")
-    books = Book.query.filter(
-        (Book.title.ilike(f"%{search_term}%")) | (Book.author.ilike(f"%{search_term}%"))
-    ).all()
+    search_term = request.args.get("search", "").strip()
+    if search_term:
+        book_ids, _ = search.search_books(search_term)
+        books = search.fetch_books(book_ids)
+    else:
+        books = Book.query.all()
     return jsonify([{
         "id": book.id,
         "title": book.title,
@@ -162,6 +182,9 @@ def add_book():
         uploaded_by=get_jwt_identity()
     )
     db.session.add(book)
+    search.index_book(book)
+    mark_catalog_changed()
+    counters.increment(counters.BOOKS)
     db.session.commit()
     return jsonify({"msg": "Book added", "book": {
         "id": book.id,
@@ -180,10 +203,9 @@ def add_book():
 @bp.route("/books/<book_id>", methods=["DELETE"])
 @admin_required
 def delete_book(book_id):
-    book = Book.query.get(book_id)
-    if not book:
+    if delete_books([book_id]) == 0:
+        db.session.rollback()
         return jsonify({"msg": "Book not found"}), 404
-    db.session.delete(book)
     db.session.commit()
     return jsonify({"msg": "Book deleted"}), 200
 
@@ -191,26 +213,62 @@ def delete_book(book_id):
 @bp.route("/activity-logs", methods=["GET"])
 @admin_required
 def get_activity_logs():
-    action_filter = request.args.get("action", "All")
-    date_filter = request.args.get("date", "")
-    query = ActivityLog.query
-    if action_filter != "All":
-        query = query.filter_by(action=action_filter)
-    if date_filter:
-        try:
-            date = datetime.strptime(date_filter, "%Y-%m-%d")
-            query = query.filter(db.func.date(ActivityLog.created_at) == date)
-        except ValueError:
-            return jsonify({"msg": "Invalid date format"}), 400
-    logs = query.all()
-    return jsonify([log.to_dict() for log in logs]), 200
+    try:
+        logs, next_cursor = list_logs(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return jsonify({"items": [log.to_dict() for log in logs], "next_cursor": next_cursor}), 200
+
+
+@bp.route("/activity-logs/archive", methods=["GET"])
+@admin_required
+def get_archived_months():
+    return jsonify(archive.archived_months()), 200
+
+
+@bp.route("/activity-logs/archive/<month>", methods=["GET"])
+@admin_required
+def get_archived_logs(month):
+    try:
+        month_start = archive.parse_month(month)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    try:
+        limit = get_limit(default=current_app.config["PAGE_SIZE"])
+        offset = int(request.args.get("offset", 0))
+        if offset < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({"msg": "limit and offset must be non-negative integers"}), 400
+    result = archive.read_archive(
+        month_start,
+        action=request.args.get("action"),
+        user_id=request.args.get("user_id"),
+        offset=offset,
+        limit=limit,
+    )
+    if result is None:
+        return jsonify({"msg": "Month not archived"}), 404
+    logs, has_more = result
+    return jsonify({"items": logs, "next_offset": offset + len(logs) if has_more else None}), 200
 
 
 @bp.route("/pending-requests", methods=["GET"])
 @admin_required
 def get_pending_requests():
-    requests = PendingRequest.query.all()
-    return jsonify([req.to_dict() for req in requests]), 200
+    after = request.args.get("after")
+    try:
+        limit = get_limit(default=current_app.config["PAGE_SIZE"] if after else None)
+    except ValueError:
+        return jsonify({"msg": "limit must be a positive integer"}), 400
+    try:
+        result = list_pending(request.args, user_id=request.args.get("user_id"), limit=limit)
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
+    if limit is None:
+        return jsonify(result), 200
+    items, next_cursor = result
+    return jsonify({"items": items, "next_cursor": next_cursor}), 200
 
 
 @bp.route("/pending-requests/<request_id>", methods=["POST"])
@@ -225,8 +283,16 @@ def handle_pending_request(request_id):
     if not req:
         return jsonify({"msg": "Request not found"}), 404
 
+    order = None
+    request_type = (req.action or "").lower()
+    # A borrow approved through PATCH /pendingRequests/<id> already holds its copy
+    held = holds_copy(req.action, req.status)
+    if action == "decline" and held:
+        release_copies(req.book_id)
     if action == "approve":
-        if req.request_type == "Borrow":
+        if request_type == "borrow":
+            if not held and not reserve_copies(req.book_id, for_lending=True):
+                return jsonify({"msg": "Book not available for lending"}), 400
             lending_request = LendingRequest(
                 user_id=req.user_id,
                 book_id=req.book_id,
@@ -243,20 +309,18 @@ def handle_pending_request(request_id):
                 borrowed_at=datetime.utcnow(),
                 due_date=datetime.utcnow() + timedelta(days=14)
             )
-            book = Book.query.get(req.book_id)
-            if book and book.copies_available > 0 and book.is_available_for_lending:
-                book.copies_available -= 1
-            else:
-                return jsonify({"msg": "Book not available for lending"}), 400
             db.session.add(lending_request)
             db.session.add(lending)
-        elif req.request_type == "Purchase":
+            counters.increment(counters.BORROWED)
+        elif request_type == "purchase":
+            if not reserve_copies(req.book_id, for_sale=True):
+                return jsonify({"msg": "Book not available for purchase"}), 400
             order = Order(
                 user_id=req.user_id,
                 cart_id=req.id,  # Placeholder
                 status="Approved",
                 approved_by=get_jwt_identity(),
-                total_amount=Book.query.get(req.book_id).price,
+                total_amount=req.book.price,
                 approved_at=datetime.utcnow(),
                 paid_at=datetime.utcnow()
             )
@@ -265,46 +329,76 @@ def handle_pending_request(request_id):
                 book_id=req.book_id,
                 quantity=1
             )
-            book = Book.query.get(req.book_id)
-            if book and book.copies_available > 0 and book.is_available_for_sale:
-                book.copies_available -= 1
-            else:
-                return jsonify({"msg": "Book not available for purchase"}), 400
             db.session.add(order)
             db.session.add(order_item)
-        db.session.add(ActivityLog(
-            user_id=req.user_id,
-            action=req.request_type,
-            item=req.book.title
-        ))
+            db.session.flush()  # assigns order.id for the log entry
+    if req.status == "pending":
+        counters.increment(counters.PENDING, -1)
+        events.queue_changed()
+    # Log and notification follow from the outbox (app.subscribers)
+    emit(
+        "request.handled",
+        request_id=req.id,
+        user_id=req.user_id,
+        book_id=req.book_id,
+        action=req.action,
+        status=f"{action}d",
+        order_id=order.id if order else None
+    )
     db.session.delete(req)
     db.session.commit()
     return jsonify({"msg": f"Request {action}d"}), 200
 
 
+def _report_args():
+    """
+    Parse ?start=&end= (YYYY-MM-DD, inclusive), ?period=day|month|year, ?category= and the
+    older ?month=Jan..Dec|All. Raises ValueError with a readable message.
+    """
+    try:
+        start = date.fromisoformat(request.args["start"]) if request.args.get("start") else None
+        end = date.fromisoformat(request.args["end"]) if request.args.get("end") else None
+    except ValueError:
+        raise ValueError("start and end must be dates (YYYY-MM-DD)")
+    if start and end and start > end:
+        raise ValueError("start must not be after end")
+    period = request.args.get("period", "month")
+    if period not in rollups.PERIOD_FORMATS:
+        raise ValueError("period must be day, month or year")
+    month = request.args.get("month", "All")
+    if month != "All" and month not in rollups.MONTH_NAMES:
+        raise ValueError("month must be Jan..Dec or All")
+    return {
+        "start": start,
+        "end": end,
+        "period": period,
+        "category": request.args.get("category"),
+        "month": None if month == "All" else month,
+    }
+
+
 @bp.route("/borrowing-report", methods=["GET"])
 @admin_required
 def borrowing_report():
-    month_filter = request.args.get("month", "All")
-    query = db.session.query(
-        db.func.strftime("%b", Lending.borrowed_at).label("month"),
-        db.func.count().label("borrowings")
-    ).filter(Lending.status == "borrowed").group_by(db.func.strftime("%b", Lending.borrowed_at))
-    if month_filter != "All":
-        query = query.filter(db.func.strftime("%b", Lending.borrowed_at) == month_filter)
-    data = [{"month": row.month, "borrowings": row.borrowings} for row in query.all()]
+    try:
+        args = _report_args()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    data = rollups.report(("borrowings",), **args)
     return jsonify(data), 200
 
 
 @bp.route("/sales-report", methods=["GET"])
 @admin_required
 def sales_report():
-    month_filter = request.args.get("month", "All")
-    query = db.session.query(
-        db.func.strftime("%b", Order.created_at).label("month"),
-        db.func.count().label("sales")
-    ).filter(Order.status == "Approved").group_by(db.func.strftime("%b", Order.created_at))
-    if month_filter != "All":
-        query = query.filter(db.func.strftime("%b", Order.created_at) == month_filter)
-    data = [{"month": row.month, "sales": row.sales} for row in query.all()]
+    try:
+        args = _report_args()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    data = []
+    for row in rollups.report(("orders", "revenue"), **args):
+        entry = {"period": row["period"], "sales": row["orders"], "revenue": float(row["revenue"])}
+        if "month" in row:
+            entry["month"] = row["month"]
+        data.append(entry)
     return jsonify(data), 200
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, decode_token
 from ..extensions import db
 from ..models import User
+from .. import counters
 
 bp = Blueprint("auth", __name__)
 
@@ -22,6 +23,7 @@ def register():
     user = User(username=name, name=name, email=email)
     user.set_password(password)
     db.session.add(user)
+    counters.increment(counters.USERS)
     db.session.commit()
 
     return jsonify({"msg": "user created", "user": user.to_dict()}), 201
@@ -1,46 +1,382 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+import csv
+import io
+import os
+import re
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app, g, Response, stream_with_context, send_file
+from flask_jwt_extended import get_jwt_identity
 from ..extensions import db
 from ..models import Book
-from functools import wraps
+from ..utils import get_limit, keyset_paginate
+from .. import search, importer, covers, counters
+from ..catalog import conditional_catalog, mark_catalog_changed, delete_books
+from ..cache import get_book_cache
+from ..authz import admin_required
 
 bp = Blueprint("books", __name__)
 
 # -------------------------
-# Admin-only decorator
+# Catalog filters and sorting
 # -------------------------
-def admin_required(fn):
-    @wraps(fn)
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        claims = get_jwt()
-        if claims.get("role") != "admin":
-            return jsonify({"msg": "Admin privileges required!"}), 403
-        return fn(*args, **kwargs)
-    return wrapper
+SORT_COLUMNS = {
+    "title": Book.title,
+    "author": Book.author,
+    "price": Book.price,
+    "created_at": Book.created_at,
+}
+TRUE_VALUES = ("1", "true", "yes")
+
+
+def _parse_bool(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return value.lower() in TRUE_VALUES
+
+
+def _parse_price(name):
+    value = request.args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def _apply_filters(query, skip=()):
+    """
+    Apply the catalog filters from the query string:
+    ?location=, ?category=a,b, ?min_price=, ?max_price=, ?for_sale=, ?for_lending=, ?in_stock=
+    Raises ValueError on malformed values.
+    """
+    location = request.args.get("location")  # ?location=Store or Library
+    if location:
+        query = query.filter(Book.location == location)
+
+    categories = [c for c in request.args.get("category", "").split(",") if c]
+    if categories and "category" not in skip:
+        query = query.filter(Book.category.in_(categories))
+
+    min_price, max_price = _parse_price("min_price"), _parse_price("max_price")
+    if min_price is not None:
+        query = query.filter(Book.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Book.price <= max_price)
+
+    for_sale, for_lending = _parse_bool("for_sale"), _parse_bool("for_lending")
+    if for_sale is not None:
+        query = query.filter(Book.is_available_for_sale == for_sale)
+    if for_lending is not None:
+        query = query.filter(Book.is_available_for_lending == for_lending)
+
+    in_stock = _parse_bool("in_stock")
+    if in_stock:
+        query = query.filter(Book.copies_available > 0)
+    elif in_stock is False:
+        query = query.filter(db.or_(Book.copies_available <= 0, Book.copies_available.is_(None)))
+    return query
+
+
+def _cover_size(default=None):
+    """
+    ?cover_size=<px>: width of the cover thumbnail the view will display.
+    """
+    try:
+        return int(request.args.get("cover_size", default or 0)) or None
+    except ValueError:
+        return default
+
+
+def _parse_sort():
+    """
+    Parse ?sort=field or ?sort=-field (descending). Returns (column, descending) or None.
+    """
+    raw = request.args.get("sort")
+    if not raw:
+        return None
+    descending = raw.startswith("-")
+    column = SORT_COLUMNS.get(raw.lstrip("-"))
+    if column is None:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    return column, descending
+
 
 # -------------------------
-# List books (optional filter by location)
+# List books (filters: see _apply_filters, ?sort=)
+# Cursor mode: ?limit=&after= returns {"items": [...], "next_cursor": ...}
+# Projection: ?fields=id,title,... selects only those columns
 # -------------------------
 @bp.route("/", methods=["GET"])
+@conditional_catalog
 def list_books():
-    location = request.args.get("location")  # ?location=Store or Library
-    query = Book.query
-    if location:
-        query = query.filter_by(location=location)
-    books = query.all()
-    return jsonify([book.to_dict() for book in books]), 200
+    try:
+        fields = Book.parse_fields(request.args.get("fields"))
+        sort = _parse_sort()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    after = request.args.get("after")
+    try:
+        limit = get_limit(default=current_app.config["PAGE_SIZE"] if after else None)
+    except ValueError:
+        return jsonify({"msg": "limit must be a positive integer"}), 400
+    if limit is not None and sort and sort[0] is not Book.created_at:
+        return jsonify({"msg": "Cursor pagination only supports sort=created_at or sort=-created_at"}), 400
+
+    if fields:
+        extra = ("created_at", "id") if limit is not None else ()
+        query = db.session.query(*Book.projection(fields, extra=extra))
+    else:
+        fields = Book.SERIALIZED_FIELDS
+        query = Book.query
+    try:
+        query = _apply_filters(query)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    if limit is None:
+        if sort:
+            column, descending = sort
+            query = query.order_by(column.desc() if descending else column.asc(), Book.id)
+        books = query.all()
+        return jsonify([Book.serialize(book, fields, _cover_size()) for book in books]), 200
+
+    descending = bool(sort and sort[1])
+    try:
+        books, next_cursor = keyset_paginate(
+            query, Book.created_at, Book.id, limit, after=after, descending=descending
+        )
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
+    return jsonify({
+        "items": [Book.serialize(book, fields, _cover_size()) for book in books],
+        "next_cursor": next_cursor
+    }), 200
+
+# -------------------------
+# Facet counts per category and price bucket
+# Honors the same filters as the listing; the category facet ignores ?category=
+# -------------------------
+@bp.route("/facets", methods=["GET"])
+@conditional_catalog
+def book_facets():
+    edges = current_app.config["PRICE_BUCKETS"]
+    labels = [f"{lo:g}-{hi:g}" for lo, hi in zip(edges, edges[1:])] + [f"{edges[-1]:g}+"]
+
+    # CASE price WHEN < edge ... mapping every row to a bucket label, NULL price -> "none"
+    bucket = db.case(
+        (Book.price.is_(None), "none"),
+        *[(Book.price < hi, label) for hi, label in zip(edges[1:], labels)],
+        else_=labels[-1]
+    ).label("bucket")
+
+    query = db.session.query(Book.category, bucket, db.func.count().label("count"))
+    try:
+        query = _apply_filters(query, skip=("category",))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    rows = query.group_by(Book.category, bucket).all()
+
+    selected = {c for c in request.args.get("category", "").split(",") if c}
+    categories, buckets = {}, dict.fromkeys(labels + ["none"], 0)
+    for row in rows:
+        categories[row.category] = categories.get(row.category, 0) + row.count
+        if not selected or row.category in selected:
+            buckets[row.bucket] += row.count
+
+    return jsonify({
+        "categories": [
+            {"category": name, "count": count}
+            for name, count in sorted(categories.items(), key=lambda kv: (-kv[1], kv[0] or ""))
+        ],
+        "price_buckets": [{"bucket": label, "count": count} for label, count in buckets.items()],
+        "total": sum(buckets.values()),
+    }), 200
+
+# -------------------------
+# Streaming catalog export
+# ?format=ndjson|csv, ?since=<ISO timestamp> for rows created/updated since then,
+# ?fields= and the listing filters. Deleted books are not reported.
+# -------------------------
+EXPORT_BATCH_SIZE = 500
+
+
+@bp.route("/export", methods=["GET"])
+def export_books():
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({"msg": "format must be ndjson or csv"}), 400
+    try:
+        fields = Book.parse_fields(request.args.get("fields")) or list(Book.SERIALIZED_FIELDS)
+        query = _apply_filters(db.session.query(*Book.projection(fields)))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    since = request.args.get("since")
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({"msg": "since must be an ISO 8601 timestamp"}), 400
+        query = query.filter(db.or_(
+            Book.updated_at >= since,
+            db.and_(Book.updated_at.is_(None), Book.created_at >= since)
+        ))
+
+    # yield_per streams rows from a server-side cursor instead of loading them all
+    statement = query.order_by(Book.created_at, Book.id).statement.execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+
+    cover_size = _cover_size()
+
+    def generate_ndjson():
+        dumps = current_app.json.dumps
+        for batch in db.session.execute(statement).partitions():
+            yield "".join(dumps(Book.serialize(row, fields, cover_size)) + "\n" for row in batch)
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        for batch in db.session.execute(statement).partitions():
+            writer.writerows(Book.serialize(row, fields, cover_size) for row in batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if export_format == "csv":
+        body, mimetype = generate_csv(), "text/csv"
+    else:
+        body, mimetype = generate_ndjson(), "application/x-ndjson"
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=books.{export_format}"
+    return response
 
 # -------------------------
-# Get a single book
+# Full-text search (ranked, paginated)
+# ?q=&page=&per_page=
 # -------------------------
+@bp.route("/search", methods=["GET"])
+@conditional_catalog
+def search_books():
+    term = request.args.get("q", "").strip()
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = int(request.args.get("per_page", current_app.config["PAGE_SIZE"]))
+    except ValueError:
+        return jsonify({"msg": "page and per_page must be integers"}), 400
+    per_page = max(1, min(per_page, current_app.config["MAX_PAGE_SIZE"]))
+
+    book_ids, total = search.search_books(term, limit=per_page, offset=(page - 1) * per_page)
+    return jsonify({
+        "items": [book.to_dict(_cover_size()) for book in search.fetch_books(book_ids)],
+        "total": total,
+        "page": page,
+        "pages": (total + per_page - 1) // per_page,
+        "per_page": per_page,
+    }), 200
+
+# -------------------------
+# Get a single book (detail view: large cover by default)
+# -------------------------
+DETAIL_COVER_SIZE = 300
+
+
 @bp.route("/<string:book_id>", methods=["GET"])
+@conditional_catalog
 def get_book(book_id):
-    # Use filter_by for string/UUID primary key
+    try:
+        fields = Book.parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    if fields:
+        book = db.session.query(*Book.projection(fields)).filter(Book.id == book_id).first()
+        if not book:
+            return jsonify({"msg": "Book not found"}), 404
+        return jsonify(Book.serialize(book, fields, _cover_size(DETAIL_COVER_SIZE))), 200
+
+    cover_size = covers.pick_size(_cover_size(DETAIL_COVER_SIZE))
+    cache = get_book_cache()
+    payload = cache.get(book_id, g.catalog_version, variant=cover_size)
+    if payload is None:
+        # Use filter_by for string/UUID primary key
+        book = Book.query.filter_by(id=book_id).first()
+        if not book:
+            return jsonify({"msg": "Book not found"}), 404
+        payload = current_app.json.dumps(book.to_dict(cover_size))
+        cache.set(book_id, g.catalog_version, payload, variant=cover_size)
+    return current_app.response_class(payload, status=200, mimetype="application/json")
+
+
+# -------------------------
+# Book cache statistics (admin only)
+# -------------------------
+@bp.route("/cache/stats", methods=["GET"])
+@admin_required
+def book_cache_stats():
+    return jsonify(get_book_cache().stats()), 200
+
+# -------------------------
+# Cover upload (admin only), multipart "file" field
+# -------------------------
+@bp.route("/<string:book_id>/cover", methods=["POST"])
+@admin_required
+def upload_cover(book_id):
     book = Book.query.filter_by(id=book_id).first()
     if not book:
         return jsonify({"msg": "Book not found"}), 404
-    return jsonify(book.to_dict()), 200
+    upload = request.files.get("file")
+    if not upload:
+        return jsonify({"msg": "file is required"}), 400
+    try:
+        name = covers.store_original(upload)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    book.cover_hash = name
+    mark_catalog_changed(book.id)
+    db.session.commit()
+    covers.schedule_thumbnails(name)
+    return jsonify(book.to_dict(_cover_size(DETAIL_COVER_SIZE))), 200
+
+# -------------------------
+# Serve covers. URLs are content-addressed, so responses are immutable.
+# -------------------------
+COVER_NAME_RE = re.compile(r"^[0-9a-f]{64}\.(jpg|png|webp|gif)$")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def _send_cover(path, immutable, **kwargs):
+    response = send_file(path, max_age=IMMUTABLE_MAX_AGE if immutable else 60, conditional=True, **kwargs)
+    response.cache_control.public = True
+    response.cache_control.immutable = immutable
+    return response
+
+
+@bp.route("/covers/<string:name>", methods=["GET"])
+def cover_original(name):
+    path = covers.original_path(name) if COVER_NAME_RE.match(name) else None
+    if not path or not os.path.exists(path):
+        return jsonify({"msg": "Cover not found"}), 404
+    return _send_cover(path, immutable=True)
+
+
+@bp.route("/covers/<string:name>/<int:size>.webp", methods=["GET"])
+def cover_thumbnail(name, size):
+    if not COVER_NAME_RE.match(name) or size not in current_app.config["COVER_THUMBNAIL_SIZES"]:
+        return jsonify({"msg": "Cover not found"}), 404
+    path = covers.thumbnail_path(name, size)
+    if os.path.exists(path):
+        return _send_cover(path, immutable=True, mimetype="image/webp")
+    # Thumbnail not generated yet: serve the original briefly
+    original = covers.original_path(name)
+    if not os.path.exists(original):
+        return jsonify({"msg": "Cover not found"}), 404
+    return _send_cover(original, immutable=False)
 
 # -------------------------
 # Create book (admin only)
@@ -74,9 +410,34 @@ def create_book():
         cover=cover
     )
     db.session.add(book)
+    search.index_book(book)
+    mark_catalog_changed()
+    counters.increment(counters.BOOKS)
     db.session.commit()
     return jsonify(book.to_dict()), 201
 
+# -------------------------
+# Bulk import (admin only)
+# Multipart "file" field or raw request body, CSV or NDJSON; upserts on ISBN
+# -------------------------
+@bp.route("/import", methods=["POST"])
+@admin_required
+def import_books():
+    upload = request.files.get("file")
+    name = upload.filename if upload else ""
+    fmt = request.args.get("format")
+    if not fmt:
+        if name.endswith(".csv") or request.mimetype == "text/csv":
+            fmt = "csv"
+        elif name.endswith((".ndjson", ".jsonl")) or request.mimetype == "application/x-ndjson":
+            fmt = "ndjson"
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"msg": "format must be csv or ndjson"}), 400
+
+    stream = io.TextIOWrapper(upload.stream if upload else request.stream, encoding="utf-8-sig", newline="")
+    report = importer.import_books(stream, fmt, uploaded_by=get_jwt_identity())
+    return jsonify(report.to_dict()), 200
+
 # -------------------------
 # Update book (admin only)
 # -------------------------
@@ -94,6 +455,8 @@ def update_book(book_id):
     ]:
         if field in data:
             setattr(book, field, data[field])
+    search.index_book(book)
+    mark_catalog_changed(book.id)
     db.session.commit()
     return jsonify(book.to_dict()), 200
 
@@ -103,38 +466,28 @@ def update_book(book_id):
 @bp.route("/<string:book_id>", methods=["DELETE"])
 @admin_required
 def delete_book(book_id):
-    book = Book.query.filter_by(id=book_id).first()
-    if not book:
+    if delete_books([book_id]) == 0:
+        db.session.rollback()
         return jsonify({"msg": "Book not found"}), 404
-
-    from ..models import PurchaseCartItem, PurchaseCart, PendingRequest
-
-    # Delete related cart items first
-    cart_items = PurchaseCartItem.query.filter_by(book_id=book.id).all()
-    if cart_items:
-        print(f"DEBUG: Deleting cart items for book {book.id}: {[item.id for item in cart_items]}")
-    for item in cart_items:
-        db.session.delete(item)
-
-    # Delete related pending requests
-    pending_requests = PendingRequest.query.filter_by(book_id=book.id).all()
-    if pending_requests:
-        print(f"DEBUG: Deleting pending requests for book {book.id}: {[req.id for req in pending_requests]}")
-    for req in pending_requests:
-        db.session.delete(req)
-
-    # Remove empty carts
-    carts = PurchaseCart.query.all()
-    for cart in carts:
-        remaining_items = PurchaseCartItem.query.filter_by(cart_id=cart.id).count()
-        if remaining_items == 0:
-            print(f"DEBUG: Deleting empty cart {cart.id}")
-            db.session.delete(cart)
-
-    # Now delete the book
-    print(f"DEBUG: Deleting book {book.id} - {book.title}")
-    db.session.delete(book)
     db.session.commit()
-
-    print(f"DEBUG: Deletion complete for book {book.id}")
     return jsonify({"msg": "Book, related cart items, pending requests, and empty carts deleted"}), 200
+
+# -------------------------
+# Bulk delete books (admin only), one transaction
+# -------------------------
+@bp.route("/bulk-delete", methods=["POST"])
+@admin_required
+def bulk_delete_books():
+    data = request.get_json() or {}
+    book_ids = data.get("ids")
+    if not isinstance(book_ids, list) or not book_ids:
+        return jsonify({"msg": "ids must be a non-empty list"}), 400
+    book_ids = list(dict.fromkeys(str(i) for i in book_ids))
+
+    existing = set(db.session.scalars(db.select(Book.id).where(Book.id.in_(book_ids))).all())
+    deleted = delete_books(existing)
+    db.session.commit()
+    return jsonify({
+        "deleted": deleted,
+        "not_found": [i for i in book_ids if i not in existing]
+    }), 200
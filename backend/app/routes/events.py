@@ -0,0 +1,33 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..authz import current_role, revoked
+from .. import events
+
+bp = Blueprint("events", __name__)
+
+# ---------------------------
+# Stream of the user's request status changes (and queue length for admins)
+# ---------------------------
+# EventSource cannot set headers, so the token may also come as ?jwt=<token>
+@bp.route("", methods=["GET"])
+@jwt_required(locations=["headers", "query_string"])
+def stream_events():
+    role = current_role()
+    if role is None:
+        return revoked()
+
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    if last_id is not None:
+        try:
+            last_id = int(last_id)
+        except ValueError:
+            return jsonify({"error": "Last-Event-ID must be an integer"}), 400
+
+    channels = [events.user_channel(get_jwt_identity())]
+    if role == "admin":
+        channels.append(events.ADMIN_CHANNEL)
+    return Response(
+        stream_with_context(events.stream(channels, last_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,18 +2,11 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from ..extensions import db
-from ..models import LendingRequest, LendingCart, LendingCartItem, Book, User
+from ..authz import is_admin
+from ..models import LendingRequest, LendingCart
 
 bp = Blueprint("lending", __name__)
 
-# ---------------------------
-# Helpers
-# ---------------------------
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    return user and user.role == "admin"
-
-
 # ---------------------------
 # Checkout lending cart -> request
 # ---------------------------
@@ -65,7 +58,7 @@ def my_lendings():
 @jwt_required()
 def update_lending_status(lending_id):
     user_id = get_jwt_identity()
-    if not is_admin(user_id):
+    if not is_admin():
         return jsonify({"error": "Admins only"}), 403
 
     data = request.get_json()
@@ -92,8 +85,7 @@ def update_lending_status(lending_id):
 @bp.route("/all", methods=["GET"])
 @jwt_required()
 def all_lendings():
-    user_id = get_jwt_identity()
-    if not is_admin(user_id):
+    if not is_admin():
         return jsonify({"error": "Admins only"}), 403
 
     lendings = LendingRequest.query.all()
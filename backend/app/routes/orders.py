@@ -2,18 +2,12 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from ..extensions import db
-from ..models import Order, OrderItem, PurchaseCart, PurchaseCartItem, User, PendingRequest
+from ..authz import is_admin
+from ..outbox import emit
+from ..models import Order, OrderItem, PurchaseCart, PendingRequest
 
 bp = Blueprint("orders", __name__)
 
-# ---------------------------
-# Helpers
-# ---------------------------
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    return user and user.role == "admin"
-
-
 # ---------------------------
 # Checkout purchase cart -> order
 # ---------------------------
@@ -109,7 +103,7 @@ def view_orders():
 @jwt_required()
 def update_order_status(order_id):
     user_id = get_jwt_identity()
-    if not is_admin(user_id):
+    if not is_admin():
         return jsonify({"error": "Admins only"}), 403
 
     data = request.get_json()
@@ -122,6 +116,7 @@ def update_order_status(order_id):
     order.status = decision
     order.approved_by = user_id
     order.approved_at = datetime.utcnow()
+    emit("order.status_changed", order_id=order.id, user_id=order.user_id, status=decision, actor_id=user_id)
     db.session.commit()
 
     return jsonify({"message": f"Order {decision}"}), 200
@@ -133,8 +128,7 @@ def update_order_status(order_id):
 @bp.route("/all", methods=["GET"])
 @jwt_required()
 def all_orders():
-    user_id = get_jwt_identity()
-    if not is_admin(user_id):
+    if not is_admin():
         return jsonify({"error": "Admins only"}), 403
 
     orders = Order.query.all()
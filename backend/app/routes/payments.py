@@ -2,18 +2,12 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from ..extensions import db
-from ..models import Order, Payment, User
+from ..authz import is_admin
+from ..outbox import emit
+from ..models import Order, Payment
 
 bp = Blueprint("payments", __name__)
 
-# ---------------------------
-# Helpers
-# ---------------------------
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    return user and user.role == "admin"
-
-
 # ---------------------------
 # Make a payment (user)
 # ---------------------------
@@ -31,21 +25,28 @@ def make_payment(order_id):
         return jsonify({"error": "Order not payable"}), 400
 
     amount = data.get("amount")
-    method = data.get("payment_method", "manual")
 
     if not amount or float(amount) <= 0:
         return jsonify({"error": "Invalid amount"}), 400
 
     payment = Payment(
-        order_id=order.id,
         user_id=user_id,
         amount=amount,
-        payment_method=method,
-        paid_at=datetime.utcnow()
+        status="completed"
     )
     db.session.add(payment)
     order.paid_at = datetime.utcnow()
     order.status = "completed"
+    db.session.flush()
+    emit(
+        "payment.made",
+        payment_id=payment.id,
+        order_id=order.id,
+        user_id=user_id,
+        amount=str(payment.amount),
+        status=payment.status,
+        paid_at=order.paid_at.isoformat()
+    )
     db.session.commit()
 
     return jsonify({
@@ -79,8 +80,7 @@ def my_payments():
 @bp.route("/all", methods=["GET"])
 @jwt_required()
 def all_payments():
-    user_id = get_jwt_identity()
-    if not is_admin(user_id):
+    if not is_admin():
         return jsonify({"error": "Admins only"}), 403
 
     payments = Payment.query.all()
@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..extensions import db
-from ..models import PendingRequest, User, ActivityLog, PurchaseCart, PurchaseCartItem
+from ..models import PendingRequest
+from ..inventory import reserve_copies, release_copies
+from .. import counters, events
+from ..pending import list_requests as list_pending, bulk_decide, mark_purchased, holds_copy, BULK_ACTIONS
+from ..authz import current_role, admin_required, revoked
+from ..utils import get_limit
+from ..outbox import emit
 
 bp = Blueprint("pendingRequests", __name__)
 
@@ -26,12 +32,40 @@ def create_request():
         status="pending"
     )
     db.session.add(pending)
+    counters.increment(counters.PENDING)
+    events.queue_changed()
     db.session.commit()
-
-    print(f"Pending request created: {pending.id} for user {user_id}")
     return jsonify({"message": "Request submitted", "id": pending.id}), 201
 
 
+# ---------------------------
+# Admin approves/declines many requests in one transaction
+# ---------------------------
+@bp.route("/bulk", methods=["POST"])
+@admin_required
+def bulk_update_requests():
+    data = request.get_json() or {}
+    action = data.get("action")
+    ids = data.get("ids")
+    if action not in BULK_ACTIONS:
+        return jsonify({"error": "action must be approve or decline"}), 400
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "ids must be a non-empty list"}), 400
+    try:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids must be integers"}), 400
+    if len(ids) > current_app.config.get("BULK_REQUEST_LIMIT", 1000):
+        return jsonify({"error": "Too many ids"}), 400
+
+    outcomes = bulk_decide(ids, action, get_jwt_identity())
+    db.session.commit()
+    return jsonify({
+        "results": [{"id": rid, "outcome": outcomes[rid]} for rid in ids],
+        "processed": sum(1 for outcome in outcomes.values() if outcome == BULK_ACTIONS[action][0]),
+    }), 200
+
+
 # ---------------------------
 # List pending requests
 # ---------------------------
@@ -39,97 +73,95 @@ def create_request():
 @jwt_required()
 def list_requests():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    requests = PendingRequest.query.all() if user.role == "admin" else PendingRequest.query.filter_by(user_id=user_id).all()
-
-    results = []
-    for r in requests:
-        results.append({
-            "id": r.id,
-            "user_id": r.user_id,
-            "user": r.user.name if r.user else r.user_id,
-            "book_id": r.book_id,
-            "book": {
-                "id": r.book.id,
-                "title": r.book.title,
-                "author": r.book.author,
-                "price": getattr(r.book, "price", None),
-                "cover": getattr(r.book, "cover", None),
-            } if r.book else None,
-            "action": getattr(r, "action", None),
-            "status": r.status,
-            "created_at": r.created_at.isoformat() if r.created_at else None,
-        })
-
-    return jsonify(results), 200
+    role = current_role()
+
+    if role is None:
+        return revoked()
+
+    # Plain list by default; ?limit= or ?after= switches to cursor pages
+    after = request.args.get("after")
+    try:
+        limit = get_limit(default=current_app.config["PAGE_SIZE"] if after else None)
+    except ValueError:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    scope = None if role == "admin" else user_id
+    try:
+        result = list_pending(request.args, user_id=scope, limit=limit)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    if limit is None:
+        return jsonify(result), 200
+    items, next_cursor = result
+    return jsonify({"items": items, "next_cursor": next_cursor}), 200
 
 
 # ---------------------------
 # Update single request status (Admin or User actions)
 # ---------------------------
+# Admin transitions: current status -> {requested status: (new status, log action)}
+ADMIN_TRANSITIONS = {
+    "pending": {
+        "approve": ("approved", "Approved"),
+        "approved": ("approved", "Approved"),
+        "decline": ("declined", "Declined"),
+        "declined": ("declined", "Declined"),
+    },
+    "return_pending": {"return_approved": ("returned", "Return Approved")},
+}
+ADMIN_STATUSES = {status for moves in ADMIN_TRANSITIONS.values() for status in moves}
+
+
 @bp.route("/<request_id>", methods=["PATCH"])
 @jwt_required()
 def update_request(request_id):
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    role = current_role()
+    if role is None:
+        return revoked()
 
     data = request.get_json()
     new_status = data.get("status")
     pending = PendingRequest.query.get_or_404(request_id)
 
     # ---------- ADMIN ACTIONS ----------
-    if user.role == "admin":
-        if new_status.lower() in ["approve", "approved"]:
-            pending.status = "approved"
-            log_action = "Approved"
-
-            # --- Automatically add to user's cart ---
-            cart = PurchaseCart.query.filter_by(user_id=pending.user_id).first()
-            if not cart:
-                cart = PurchaseCart(user_id=pending.user_id)
-                db.session.add(cart)
-                db.session.commit()
-
-            existing_item = PurchaseCartItem.query.filter_by(
-                cart_id=cart.id,
-                book_id=pending.book_id,
-                checked_out=False
-            ).first()
-
-            if not existing_item:
-                item = PurchaseCartItem(cart_id=cart.id, book_id=pending.book_id, quantity=1, checked_out=False)
-                db.session.add(item)
-
-        elif new_status.lower() in ["decline", "declined"]:
-            pending.status = "declined"
-            log_action = "Declined"
-
-        elif new_status.lower() == "return_approved" and pending.status == "return_pending":
-            pending.status = "returned"
-            log_action = "Return Approved"
-            if pending.book:
-                pending.book.copies_available += 1
-        else:
+    if role == "admin":
+        requested = (new_status or "").lower()
+        if requested not in ADMIN_STATUSES:
             return jsonify({"error": "Invalid status"}), 400
-
-        log = ActivityLog(
-            user_id=user.id,
-            action=log_action,
-            item=f"Request {pending.id} for book '{pending.book.title if pending.book else pending.book_id}'"
+        move = ADMIN_TRANSITIONS.get(pending.status, {}).get(requested)
+        if move is None:
+            return jsonify({"error": f"Cannot {requested} a request that is {pending.status}"}), 409
+        status, log_action = move
+
+        was_pending = pending.status == "pending"
+        held, holds = holds_copy(pending.action, pending.status), holds_copy(pending.action, status)
+        if holds and not held:
+            if not reserve_copies(pending.book_id, for_lending=True):
+                return jsonify({"error": "No copies available"}), 409
+        elif held and not holds:
+            release_copies(pending.book_id)
+        pending.status = status
+
+        if was_pending:
+            counters.increment(counters.PENDING, -1)
+            events.queue_changed()
+        # Cart, log and notification follow from the outbox (app.subscribers)
+        emit(
+            "request.status_changed",
+            request_id=pending.id,
+            user_id=pending.user_id,
+            book_id=pending.book_id,
+            status=pending.status,
+            actor_id=user_id,
+            log_action=log_action
         )
-        db.session.add(log)
         db.session.commit()
         return jsonify({"message": f"Request {pending.status} processed and logged", "status": pending.status}), 200
 
     # ---------- USER ACTIONS ----------
     else:
-        if pending.user_id != user.id:
+        if pending.user_id != user_id:
             return jsonify({"error": "Action not allowed: You do not own this request"}), 403
 
         # Confirm borrow
@@ -144,48 +176,26 @@ def update_request(request_id):
 
         # Mark as purchased - update all approved requests for this user
         elif new_status.lower() == "purchased":
-            approved_requests = PendingRequest.query.filter_by(user_id=user.id, status="approved").all()
-            if not approved_requests:
+            count = mark_purchased(user_id)
+            if not count:
                 return jsonify({"error": "No approved requests to purchase"}), 400
-
-            for p in approved_requests:
-                p.status = "purchased"
-
-                # mark all cart items for this book as checked out
-                cart = PurchaseCart.query.filter_by(user_id=user.id).first()
-                if cart:
-                    cart_items = PurchaseCartItem.query.filter_by(
-                        cart_id=cart.id,
-                        book_id=p.book_id,
-                        checked_out=False
-                    ).all()
-                    for item in cart_items:
-                        item.checked_out = True
-
-                # log each purchased request
-                log = ActivityLog(
-                    user_id=user.id,
-                    action="Purchased",
-                    item=f"Purchased request {p.id} for book '{p.book.title if p.book else p.book_id}'"
-                )
-                db.session.add(log)
-
             db.session.commit()
-            print(f"DEBUG: User {user.id} purchased {len(approved_requests)} request(s)")
-            return jsonify({"message": f"{len(approved_requests)} request(s) marked as purchased"}), 200
+            return jsonify({"message": f"{count} request(s) marked as purchased"}), 200
 
         else:
             return jsonify({"error": "Action not allowed"}), 403
 
         # Commit for non-purchase actions
-        log = ActivityLog(
-            user_id=user.id,
-            action=log_action,
-            item=f"Request {pending.id} for book '{pending.book.title if pending.book else pending.book_id}'"
+        emit(
+            "request.status_changed",
+            request_id=pending.id,
+            user_id=pending.user_id,
+            book_id=pending.book_id,
+            status=pending.status,
+            actor_id=user_id,
+            log_action=log_action
         )
-        db.session.add(log)
         db.session.commit()
-        print(f"DEBUG: Commit done for pending_request {pending.id}, status {pending.status}")
         return jsonify({"message": f"Request updated to {pending.status}", "status": pending.status}), 200
 
 
@@ -196,26 +206,27 @@ def update_request(request_id):
 @jwt_required()
 def confirm_borrow(request_id):
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    if current_role() is None:
+        return revoked()
 
     pending = PendingRequest.query.get_or_404(request_id)
 
-    if pending.user_id != user.id:
+    if pending.user_id != user_id:
         return jsonify({"error": "Not allowed"}), 403
 
     if pending.status != "approved" or pending.action.lower() != "borrow":
         return jsonify({"error": "Cannot confirm borrow"}), 400
 
     pending.status = "borrowed"
-
-    log = ActivityLog(
-        user_id=user.id,
-        action="Borrowed",
-        item=f"Borrow confirmed for book '{pending.book.title if pending.book else pending.book_id}'"
+    emit(
+        "request.status_changed",
+        request_id=pending.id,
+        user_id=pending.user_id,
+        book_id=pending.book_id,
+        status=pending.status,
+        actor_id=user_id,
+        log_action="Borrowed"
     )
-    db.session.add(log)
     db.session.commit()
 
     return jsonify({"message": "Borrow confirmed", "status": "borrowed"}), 200
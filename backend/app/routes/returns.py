@@ -2,18 +2,11 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from ..extensions import db
-from ..models import ReturnRequest, LendingRequest, User
+from ..authz import is_admin
+from ..models import ReturnRequest, LendingRequest
 
 bp = Blueprint("returns", __name__)
 
-# ---------------------------
-# Helpers
-# ---------------------------
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    return user and user.role == "admin"
-
-
 # ---------------------------
 # User requests return
 # ---------------------------
@@ -51,8 +44,7 @@ def request_return(lending_id):
 @bp.route("/<int:return_id>/process", methods=["PUT"])
 @jwt_required()
 def process_return(return_id):
-    user_id = get_jwt_identity()
-    if not is_admin(user_id):
+    if not is_admin():
         return jsonify({"error": "Admins only"}), 403
 
     data = request.get_json()
@@ -103,8 +95,7 @@ def my_returns():
 @bp.route("/pending", methods=["GET"])
 @jwt_required()
 def pending_returns():
-    user_id = get_jwt_identity()
-    if not is_admin(user_id):
+    if not is_admin():
         return jsonify({"error": "Admins only"}), 403
 
     returns = ReturnRequest.query.filter_by(status="pending").all()
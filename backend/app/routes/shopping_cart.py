@@ -1,10 +1,32 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..extensions import db
+from sqlalchemy import select, func
 from ..models import PurchaseCart, PurchaseCartItem, Book, PendingRequest, User
+from ..authz import current_role, revoked
 
 bp = Blueprint("shopping_cart", __name__)
 
+def _user_cart(user_id):
+    """
+    Id of the user's cart (their oldest one) as a scalar subquery.
+    """
+    return (
+        select(PurchaseCart.id)
+        .where(PurchaseCart.user_id == user_id)
+        .order_by(PurchaseCart.created_at, PurchaseCart.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _open_items(user_id):
+    """
+    Filters for the not checked out items of the user's cart.
+    """
+    return (PurchaseCartItem.cart_id == _user_cart(user_id), PurchaseCartItem.checked_out.is_(False))
+
+
 # ---------------------------
 # Get shopping cart (approved purchase items only)
 # ---------------------------
@@ -12,44 +34,72 @@ bp = Blueprint("shopping_cart", __name__)
 @jwt_required()
 def get_cart():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    cart = PurchaseCart.query.filter_by(user_id=user_id).first()
-    if not cart:
-        return jsonify({"cart": [], "count": 0}), 200
+    if current_role() is None:
+        return revoked()
+
+    # One query: open cart items with an approved request for their book, most recent first
+    approved = (
+        db.session.query(PendingRequest.book_id, func.min(PendingRequest.id).label("request_id"))
+        .filter(PendingRequest.user_id == user_id, PendingRequest.status == "approved")
+        .group_by(PendingRequest.book_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(
+            PurchaseCartItem.id,
+            PurchaseCartItem.quantity,
+            Book.id.label("book_id"),
+            Book.title,
+            Book.author,
+            Book.price,
+            Book.cover,
+            PendingRequest.id.label("request_id"),
+            PendingRequest.created_at,
+        )
+        .join(approved, approved.c.book_id == PurchaseCartItem.book_id)
+        .join(PendingRequest, PendingRequest.id == approved.c.request_id)
+        .join(Book, Book.id == PurchaseCartItem.book_id)
+        .filter(*_open_items(user_id))
+        .order_by(PendingRequest.created_at.desc().nulls_last(), PurchaseCartItem.id)
+        .all()
+    )
+
+    items = [
+        {
+            "cart_item_id": row.id,
+            "book_id": row.book_id,
+            "title": row.title,
+            "author": row.author,
+            "price": row.price,
+            "cover": row.cover,
+            "quantity": row.quantity,
+            "status": "approved",
+            "pending_request_id": row.request_id,  # added for frontend PATCH
+            "approved_at": row.created_at.isoformat() if row.created_at else None
+        }
+        for row in rows
+    ]
+    return jsonify({"cart": items, "count": len(items)}), 200
 
-    items = []
-    for item in cart.items:
-        # Only include approved books that are not checked out yet
-        pending_request = PendingRequest.query.filter_by(
-            user_id=user_id,
-            book_id=item.book_id,
-            status="approved"
-        ).first()
-
-        if pending_request and not getattr(item, "checked_out", False):
-            book = Book.query.get(item.book_id)
-            if book:
-                items.append({
-                    "cart_item_id": item.id,
-                    "book_id": book.id,
-                    "title": book.title,
-                    "author": book.author,
-                    "price": getattr(book, "price", 0),
-                    "cover": getattr(book, "cover", None),
-                    "quantity": item.quantity,
-                    "status": "approved",
-                    "pending_request_id": pending_request.id,  # added for frontend PATCH
-                    "approved_at": pending_request.created_at.isoformat() if pending_request.created_at else None
-                })
-
-    # Sort items by most recent approved first
-    items.sort(key=lambda x: x["approved_at"] or "", reverse=True)
 
-    return jsonify({"cart": items, "count": len(items)}), 200
+# ---------------------------
+# Cart badge: number of items GET /shoppingCart would list
+# ---------------------------
+@bp.route("/count", methods=["GET"])
+@jwt_required()
+def get_cart_count():
+    user_id = get_jwt_identity()
+    if current_role() is None:
+        return revoked()
+    approved_books = select(PendingRequest.book_id).where(
+        PendingRequest.user_id == user_id, PendingRequest.status == "approved"
+    )
+    count = (
+        db.session.query(func.count(PurchaseCartItem.id))
+        .filter(*_open_items(user_id), PurchaseCartItem.book_id.in_(approved_books))
+        .scalar()
+    )
+    return jsonify({"count": count}), 200
 
 
 # ---------------------------
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models import User
+from app import counters
 from werkzeug.security import generate_password_hash
 
 users_bp = Blueprint("users", __name__)
@@ -25,6 +26,7 @@ def create_user():
     )
 
     db.session.add(new_user)
+    counters.increment(counters.USERS)
     db.session.commit()
 
     return jsonify({
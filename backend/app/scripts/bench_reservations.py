@@ -0,0 +1,127 @@
+"""
+Concurrency benchmark for stock reservations.
+
+Several worker processes approve requests for the same book at once, each in its own
+transaction, until the stock runs out. The atomic mode uses inventory.reserve_copies; the
+naive mode reads copies_available, checks it and writes it back, as the approval handlers
+used to. The run reports throughput per worker count and whether more copies were handed
+out than existed.
+
+    python -m app.scripts.bench_reservations --copies 500 --workers 1,2,4,8
+    BENCH_DATABASE_URL=postgresql://... python -m app.scripts.bench_reservations
+
+Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set; missing tables are created
+there and one benchmark book is inserted (and removed) per run.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from sqlalchemy.exc import OperationalError
+
+
+def _make_app(url):
+    from app import create_app
+    from app.config import Config
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = url
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}} if url.startswith("sqlite") else {}
+        ACTIVITY_LOG_ASYNC = False
+
+    return create_app(BenchConfig)
+
+
+def _worker(url, book_id, mode, start, results):
+    from app.extensions import db
+    from app.models import Book
+    from app.inventory import reserve_copies
+
+    app = _make_app(url)
+    granted = 0
+    with app.app_context():
+        start.wait()
+        while True:
+            try:
+                if mode == "atomic":
+                    ok = reserve_copies(book_id, for_lending=True)
+                else:
+                    book = db.session.get(Book, book_id)
+                    ok = book.copies_available > 0
+                    if ok:
+                        book.copies_available -= 1
+                db.session.commit()
+            except OperationalError as e:
+                db.session.rollback()
+                if "database is locked" in str(e):  # SQLite: another writer held the lock too long
+                    continue
+                raise
+            if not ok:
+                break
+            granted += 1
+        db.session.remove()
+    results.put(granted)
+
+
+def run(url, copies, workers, mode):
+    from app.extensions import db
+    from app.models import Book
+
+    app = _make_app(url)
+    with app.app_context():
+        db.create_all()
+        book = Book(title="Benchmark", author="bench", location="Library", copies_available=copies)
+        db.session.add(book)
+        db.session.commit()
+        book_id = book.id
+
+    # spawn, not fork: every worker gets a fresh interpreter, engine and connection pool
+    ctx = multiprocessing.get_context("spawn")
+    start, results = ctx.Event(), ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(url, book_id, mode, start, results))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    time.sleep(3.0)  # let every worker build its app
+    began = time.perf_counter()
+    start.set()
+    granted = sum(results.get() for _ in procs)
+    elapsed = time.perf_counter() - began
+    for proc in procs:
+        proc.join()
+
+    with app.app_context():
+        remaining = db.session.get(Book, book_id).copies_available
+        db.session.delete(db.session.get(Book, book_id))
+        db.session.commit()
+    return granted, remaining, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts.")
+    parser.add_argument("--mode", choices=["atomic", "naive", "both"], default="both")
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    modes = ["atomic", "naive"] if args.mode == "both" else [args.mode]
+
+    print(f"{'mode':<8}{'workers':>8}{'granted':>9}{'left':>6}{'oversold':>10}{'approvals/s':>13}")
+    for mode in modes:
+        for workers in (int(w) for w in args.workers.split(",")):
+            granted, remaining, elapsed = run(url, args.copies, workers, mode)
+            oversold = granted - args.copies
+            print(
+                f"{mode:<8}{workers:>8}{granted:>9}{remaining:>6}{max(oversold, 0):>10}"
+                f"{granted / elapsed:>13.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
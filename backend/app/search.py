@@ -0,0 +1,172 @@
+"""
+Full-text search over the book catalog (title, author, category, description).
+
+SQLite keeps an FTS5 virtual table, books_fts, that the book write paths refresh through
+index_book / remove_books inside the same transaction. Postgres uses an expression GIN index
+over a weighted tsvector, which the database maintains on its own, so the write hooks are
+no-ops there. Any other backend falls back to ILIKE matching.
+"""
+import re
+from sqlalchemy import text, or_, bindparam
+from .extensions import db
+from .models import Book
+from .utils import dialect_name
+
+FTS_TABLE = "books_fts"
+
+# Must stay identical to the expression of ix_books_search in the migrations,
+# otherwise Postgres will not use the index.
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+# bm25 column weights for books_fts: book_id, title, author, category, description
+FTS_WEIGHTS = "0.0, 10.0, 5.0, 2.0, 1.0"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(term):
+    return _TOKEN_RE.findall(term or "")
+
+
+# -------------------------
+# Index maintenance
+# -------------------------
+def index_book(book):
+    """
+    (Re)index a single book. Call before commit so the index changes with the row.
+    """
+    if dialect_name() != "sqlite":
+        return
+    if book.id is None:
+        db.session.flush()
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE book_id = :id"), {"id": book.id})
+    db.session.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (book_id, title, author, category, description) "
+            "VALUES (:id, :title, :author, :category, :description)"
+        ),
+        {
+            "id": book.id,
+            "title": book.title,
+            "author": book.author,
+            "category": book.category,
+            "description": book.description,
+        },
+    )
+
+
+def remove_books(book_ids):
+    if dialect_name() != "sqlite" or not book_ids:
+        return
+    stmt = text(f"DELETE FROM {FTS_TABLE} WHERE book_id IN :ids").bindparams(bindparam("ids", expanding=True))
+    db.session.execute(stmt, {"ids": list(book_ids)})
+
+
+def reindex_books(book_ids=(), isbns=()):
+    """
+    Set-based reindex of the books matching `book_ids` or `isbns` (used by bulk writers).
+    """
+    if dialect_name() != "sqlite" or not (book_ids or isbns):
+        return
+    params = {"ids": list(book_ids), "isbns": list(isbns)}
+    match = "id IN :ids OR isbn IN :isbns"
+    stmt = text(
+        f"DELETE FROM {FTS_TABLE} WHERE book_id IN (SELECT id FROM books WHERE {match})"
+    ).bindparams(bindparam("ids", expanding=True), bindparam("isbns", expanding=True))
+    db.session.execute(stmt, params)
+    stmt = text(
+        f"INSERT INTO {FTS_TABLE} (book_id, title, author, category, description) "
+        f"SELECT id, title, author, category, description FROM books WHERE {match}"
+    ).bindparams(bindparam("ids", expanding=True), bindparam("isbns", expanding=True))
+    db.session.execute(stmt, params)
+
+
+def rebuild_index():
+    """
+    Repopulate the search index from the books table. Returns the number of indexed books.
+    """
+    if dialect_name() == "sqlite":
+        db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        db.session.execute(text(
+            f"INSERT INTO {FTS_TABLE} (book_id, title, author, category, description) "
+            "SELECT id, title, author, category, description FROM books"
+        ))
+    elif dialect_name() == "postgresql":
+        db.session.execute(text("REINDEX INDEX ix_books_search"))
+    db.session.commit()
+    return Book.query.count()
+
+
+# -------------------------
+# Queries
+# -------------------------
+def search_books(term, limit=None, offset=0):
+    """
+    Return (book_ids, total) for `term`, best match first.
+    Every word is matched as a prefix and all words must match.
+    """
+    tokens = _tokens(term)
+    if not tokens:
+        return [], 0
+
+    dialect = dialect_name()
+    params = {"limit": limit, "offset": offset}
+
+    if dialect == "sqlite":
+        if limit is None:
+            params["limit"] = -1  # SQLite spelling of "no limit"
+        params["q"] = " ".join(f'"{t}"*' for t in tokens)
+        total = db.session.execute(
+            text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q"), params
+        ).scalar()
+        rows = db.session.execute(
+            text(
+                f"SELECT book_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q "
+                f"ORDER BY bm25({FTS_TABLE}, {FTS_WEIGHTS}), book_id LIMIT :limit OFFSET :offset"
+            ),
+            params,
+        )
+        return [r.book_id for r in rows], total
+
+    if dialect == "postgresql":
+        params["q"] = " & ".join(f"{t}:*" for t in tokens)
+        match = f"({PG_DOCUMENT}) @@ to_tsquery('simple', :q)"
+        total = db.session.execute(text(f"SELECT count(*) FROM books WHERE {match}"), params).scalar()
+        rows = db.session.execute(
+            text(
+                f"SELECT id FROM books WHERE {match} "
+                f"ORDER BY ts_rank({PG_DOCUMENT}, to_tsquery('simple', :q)) DESC, id "
+                "LIMIT :limit OFFSET :offset"  # LIMIT NULL means no limit on Postgres
+            ),
+            params,
+        )
+        return [r.id for r in rows], total
+
+    # Fallback for other databases: unranked substring match
+    query = Book.query.with_entities(Book.id)
+    for t in tokens:
+        like = f"%{t}%"
+        query = query.filter(or_(
+            Book.title.ilike(like), Book.author.ilike(like),
+            Book.category.ilike(like), Book.description.ilike(like)
+        ))
+    total = query.count()
+    query = query.order_by(Book.title, Book.id).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return [r.id for r in query.all()], total
+
+
+def fetch_books(book_ids):
+    """
+    Load books for `book_ids`, preserving the ranking order.
+    """
+    if not book_ids:
+        return []
+    books = {b.id: b for b in Book.query.filter(Book.id.in_(book_ids)).all()}
+    return [books[i] for i in book_ids if i in books]
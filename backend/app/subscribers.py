@@ -0,0 +1,76 @@
+"""
+Outbox handlers: the side effects of pending request, order and payment changes.
+
+Each handler gets the payloads of a batch of messages of its topic and runs in the
+dispatcher's transaction, so its writes commit together with the delivery mark. Activity logs
+and events it records go out after that commit.
+
+The pending and borrowed counters are not updated here but in the transaction of the change
+itself, so they never disagree with the rows (see app.counters). The monthly sales counter
+follows payments through the outbox and may lag by a dispatch.
+"""
+from decimal import Decimal
+from datetime import datetime
+from .extensions import db
+from .models import Book
+from .outbox import handler
+from .activity import log_activity
+from .pending import add_to_carts
+from . import counters, events
+
+
+def _titles(payloads):
+    book_ids = {p["book_id"] for p in payloads if p.get("book_id")}
+    if not book_ids:
+        return {}
+    return dict(db.session.query(Book.id, Book.title).filter(Book.id.in_(book_ids)))
+
+
+@handler("request.status_changed")
+def request_status_changed(payloads):
+    """
+    A pending request changed status (PATCH /pendingRequests/<id>, bulk decisions, purchases,
+    borrow confirmations): approved books go into the owner's purchase cart.
+    """
+    approved = [(p["user_id"], p["book_id"]) for p in payloads if p["status"] == "approved"]
+    if approved:
+        add_to_carts(approved)
+    titles = _titles(payloads)
+    for p in payloads:
+        events.request_changed(p["request_id"], p["user_id"], p["status"], p["book_id"])
+        log_activity(
+            p["actor_id"],
+            p["log_action"],
+            f"Request {p['request_id']} for book '{titles.get(p['book_id'], p['book_id'])}'",
+            book_id=p["book_id"],
+            request_id=p["request_id"]
+        )
+
+
+@handler("request.handled")
+def request_handled(payloads):
+    """
+    POST /admin/pending-requests/<id>: the request is gone, approvals became a lending or order.
+    """
+    titles = _titles(payloads)
+    for p in payloads:
+        events.request_changed(p["request_id"], p["user_id"], p["status"], p["book_id"])
+        if p["status"] == "approved":
+            log_activity(
+                p["user_id"], p["action"], titles.get(p["book_id"], p["book_id"]),
+                book_id=p["book_id"], request_id=p["request_id"], order_id=p.get("order_id")
+            )
+
+
+@handler("order.status_changed")
+def order_status_changed(payloads):
+    for p in payloads:
+        events.publish(events.user_channel(p["user_id"]), "order_status", {"id": p["order_id"], "status": p["status"]})
+        log_activity(p["actor_id"], f"Order {p['status'].title()}", f"Order {p['order_id']}", order_id=p["order_id"])
+
+
+@handler("payment.made")
+def payment_made(payloads):
+    for p in payloads:
+        if p["status"] == "completed":
+            counters.record_payment(Decimal(p["amount"]), datetime.fromisoformat(p["paid_at"]))
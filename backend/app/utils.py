@@ -1,4 +1,9 @@
+import base64
+import json
+from datetime import date, datetime
 from flask import request, current_app
+from sqlalchemy import Date, DateTime, and_, or_, cast, func
+from .extensions import db
 
 def paginate_query(query):
     try:
@@ -14,4 +19,114 @@ def paginate_query(query):
         "pages": items.pages,
         "per_page": items.per_page,
 
-    }
\ No newline at end of file
+    }
+
+def dialect_name():
+    """
+    Name of the database dialect in use ("sqlite" in development, "postgresql" in production).
+    """
+    return db.session.get_bind().dialect.name
+
+
+def day_bucket(column):
+    """
+    Calendar day of a DateTime column. Postgres returns a date, SQLite an ISO string;
+    pass results through as_date().
+    """
+    if dialect_name() == "postgresql":
+        return cast(column, Date)
+    return func.date(column)
+
+
+def as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def dialect_insert(table):
+    """
+    INSERT construct of the active dialect, which supports on_conflict_do_update / _do_nothing
+    (available on both SQLite and Postgres).
+    """
+    dialect = dialect_name()
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert(table)
+
+# -------------------------
+# Keyset (cursor) pagination
+# -------------------------
+def get_limit(default=None):
+    """
+    Read ?limit= from the request, clamped to MAX_PAGE_SIZE.
+    Returns `default` when the parameter is missing; raises ValueError when it is not a positive integer.
+    """
+    raw = request.args.get("limit")
+    if raw is None:
+        return default
+    limit = int(raw)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, current_app.config.get("MAX_PAGE_SIZE", 100))
+
+
+def encode_cursor(*values):
+    """
+    Encode the sort key of the last row of a page into an opaque, URL-safe token.
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Decode a token produced by encode_cursor. Raises ValueError on malformed input.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_paginate(query, sort_col, id_col, limit, after=None, descending=False):
+    """
+    Return (rows, next_cursor) for one page of `query` ordered on (sort_col, id_col).
+
+    Instead of OFFSET, the page starts right after the key stored in `after`, so every page
+    costs one index range scan no matter how deep it is. `next_cursor` is None on the last page.
+    """
+    if after:
+        values = decode_cursor(after)
+        if len(values) != 2:
+            raise ValueError("Invalid cursor")
+        sort_val, id_val = values
+        if sort_val is not None and isinstance(sort_col.type, DateTime):
+            try:
+                sort_val = datetime.fromisoformat(sort_val)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+        if descending:
+            query = query.filter(or_(sort_col < sort_val, and_(sort_col == sort_val, id_col < id_val)))
+        else:
+            query = query.filter(or_(sort_col > sort_val, and_(sort_col == sort_val, id_col > id_val)))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
@@ -0,0 +1,35 @@
+"""admin user listing indexes
+
+Revision ID: 1a7e4c9b2d05
+Revises: f5c3d8a1b7e6
+Create Date: 2026-10-18 13:20:44.081537
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a7e4c9b2d05'
+down_revision = 'f5c3d8a1b7e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # varchar_pattern_ops lets LIKE 'prefix%' use the index under any collation
+        op.execute("CREATE INDEX ix_users_email_lower ON users (lower(email) varchar_pattern_ops)")
+        op.execute("CREATE INDEX ix_users_name_lower ON users (lower(name) varchar_pattern_ops)")
+    else:
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
+        op.create_index('ix_users_name_lower', 'users', [sa.text('lower(name)')], unique=False)
+    op.create_index('ix_users_created_at', 'users', ['created_at'], unique=False)
+    op.create_index('ix_lendings_status_user_id', 'lendings', ['status', 'user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_lendings_status_user_id', table_name='lendings')
+    op.drop_index('ix_users_created_at', table_name='users')
+    op.drop_index('ix_users_name_lower', table_name='users')
+    op.drop_index('ix_users_email_lower', table_name='users')
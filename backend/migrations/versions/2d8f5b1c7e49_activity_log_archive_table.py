@@ -0,0 +1,33 @@
+"""activity log archive table
+
+Revision ID: 2d8f5b1c7e49
+Revises: 9c2e6a4d1f37
+Create Date: 2026-10-18 22:04:17.520913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d8f5b1c7e49'
+down_revision = '9c2e6a4d1f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('activity_log_archives',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_activity_log_archives_month', 'activity_log_archives', ['month'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_activity_log_archives_month', table_name='activity_log_archives')
+    op.drop_table('activity_log_archives')
@@ -0,0 +1,43 @@
+"""daily reporting rollups
+
+Revision ID: 3e8b5a2f9c71
+Revises: 9c2f7e1d4a60
+Create Date: 2026-10-18 14:41:52.730916
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8b5a2f9c71'
+down_revision = '9c2f7e1d4a60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('borrowings', sa.Integer(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'category')
+    )
+    op.create_table('rollup_state',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('processed_until', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # processed_until NULL: the first build folds in all history
+    op.execute("INSERT INTO rollup_state (name, processed_until) VALUES ('daily', NULL)")
+    op.create_index('ix_lendings_borrowed_at', 'lendings', ['borrowed_at'], unique=False)
+    op.create_index('ix_orders_approved_at', 'orders', ['approved_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_orders_approved_at', table_name='orders')
+    op.drop_index('ix_lendings_borrowed_at', table_name='lendings')
+    op.drop_table('rollup_state')
+    op.drop_table('daily_rollups')
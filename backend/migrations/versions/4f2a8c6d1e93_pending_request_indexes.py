@@ -0,0 +1,25 @@
+"""pending request queue indexes
+
+Revision ID: 4f2a8c6d1e93
+Revises: e9c3b7f2a518
+Create Date: 2026-10-18 17:05:12.640381
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2a8c6d1e93'
+down_revision = 'e9c3b7f2a518'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_pending_requests_status_created_at', 'pending_requests', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_pending_requests_user_id_status', 'pending_requests', ['user_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_pending_requests_user_id_status', table_name='pending_requests')
+    op.drop_index('ix_pending_requests_status_created_at', table_name='pending_requests')
@@ -0,0 +1,23 @@
+"""books keyset pagination index
+
+Revision ID: 5b1f0c2d9a31
+Revises: 43ede796f7c8
+Create Date: 2026-10-18 09:12:05.114210
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0c2d9a31'
+down_revision = '43ede796f7c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_books_created_at_id', 'books', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_books_created_at_id', table_name='books')
@@ -0,0 +1,25 @@
+"""purchase cart indexes
+
+Revision ID: 6b1e9d3c7a42
+Revises: c8e2a4f6b193
+Create Date: 2026-10-18 19:48:26.907134
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1e9d3c7a42'
+down_revision = 'c8e2a4f6b193'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_purchase_carts_user_id_created_at', 'purchase_carts', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_purchase_cart_items_cart_id_checked_out', 'purchase_cart_items', ['cart_id', 'checked_out', 'book_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_purchase_cart_items_cart_id_checked_out', table_name='purchase_cart_items')
+    op.drop_index('ix_purchase_carts_user_id_created_at', table_name='purchase_carts')
@@ -0,0 +1,26 @@
+"""rebuild rollups from order totals
+
+Revision ID: 7d4f1b9e2c60
+Revises: 6b1e9d3c7a42
+Create Date: 2026-10-18 21:12:08.331540
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4f1b9e2c60'
+down_revision = '6b1e9d3c7a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Revenue used to be derived from current book prices; the next build recomputes it
+    # from order totals over all history
+    op.execute("DELETE FROM daily_rollups")
+    op.execute("UPDATE rollup_state SET processed_until = NULL")
+
+
+def downgrade():
+    pass
@@ -0,0 +1,47 @@
+"""book full-text search index
+
+Revision ID: 8d3e6a47c0b2
+Revises: 5b1f0c2d9a31
+Create Date: 2026-10-18 10:02:41.530716
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3e6a47c0b2'
+down_revision = '5b1f0c2d9a31'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with app.search.PG_DOCUMENT
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE books_fts USING fts5("
+            "book_id UNINDEXED, title, author, category, description, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO books_fts (book_id, title, author, category, description) "
+            "SELECT id, title, author, category, description FROM books"
+        )
+    elif dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_books_search ON books USING gin (({PG_DOCUMENT}))")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE books_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX ix_books_search")
@@ -0,0 +1,23 @@
+"""books updated_at index
+
+Revision ID: 9c2e6a4d1f37
+Revises: 7d4f1b9e2c60
+Create Date: 2026-10-18 21:12:40.318254
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e6a4d1f37'
+down_revision = '7d4f1b9e2c60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_books_updated_at', 'books', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_books_updated_at', table_name='books')
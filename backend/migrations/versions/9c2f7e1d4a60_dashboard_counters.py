@@ -0,0 +1,37 @@
+"""dashboard counters
+
+Revision ID: 9c2f7e1d4a60
+Revises: 1a7e4c9b2d05
+Create Date: 2026-10-18 14:02:17.415203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2f7e1d4a60'
+down_revision = '1a7e4c9b2d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('counters',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('value', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed the counts; the monthly sales counter is filled by the first reconcile
+    op.execute(
+        "INSERT INTO counters (name, value, updated_at) "
+        "SELECT 'users', COUNT(*), CURRENT_TIMESTAMP FROM users "
+        "UNION ALL SELECT 'books', COUNT(*), CURRENT_TIMESTAMP FROM books "
+        "UNION ALL SELECT 'borrowed_lendings', COUNT(*), CURRENT_TIMESTAMP FROM lendings WHERE status = 'borrowed' "
+        "UNION ALL SELECT 'pending_requests', COUNT(*), CURRENT_TIMESTAMP FROM pending_requests WHERE status = 'pending'"
+    )
+
+
+def downgrade():
+    op.drop_table('counters')
@@ -0,0 +1,35 @@
+"""server-sent events table
+
+Revision ID: a3d7c5e1f804
+Revises: 4f2a8c6d1e93
+Create Date: 2026-10-18 18:21:40.513927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d7c5e1f804'
+down_revision = '4f2a8c6d1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('channel', sa.String(length=60), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_events_channel_id', 'events', ['channel', 'id'], unique=False)
+    op.create_index(op.f('ix_events_created_at'), 'events', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_events_created_at'), table_name='events')
+    op.drop_index('ix_events_channel_id', table_name='events')
+    op.drop_table('events')
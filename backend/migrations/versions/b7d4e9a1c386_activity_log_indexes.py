@@ -0,0 +1,27 @@
+"""activity log indexes
+
+Revision ID: b7d4e9a1c386
+Revises: 3e8b5a2f9c71
+Create Date: 2026-10-18 15:12:06.558102
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d4e9a1c386'
+down_revision = '3e8b5a2f9c71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_activity_logs_created_at_id', 'activity_logs', ['created_at', 'id'], unique=False)
+    op.create_index('ix_activity_logs_action_created_at', 'activity_logs', ['action', 'created_at', 'id'], unique=False)
+    op.create_index('ix_activity_logs_user_id_created_at', 'activity_logs', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_activity_logs_user_id_created_at', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_action_created_at', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_created_at_id', table_name='activity_logs')
@@ -0,0 +1,34 @@
+"""catalog version counter
+
+Revision ID: c47a91e5d2f8
+Revises: 8d3e6a47c0b2
+Create Date: 2026-10-18 10:48:13.902284
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a91e5d2f8'
+down_revision = '8d3e6a47c0b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('catalog_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('last_modified', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Seed from the newest book change so existing clients get a meaningful Last-Modified
+    op.execute(
+        "INSERT INTO catalog_version (id, version, last_modified) "
+        "SELECT 1, 1, max(coalesce(updated_at, created_at)) FROM books"
+    )
+
+
+def downgrade():
+    op.drop_table('catalog_version')
@@ -0,0 +1,38 @@
+"""domain event outbox
+
+Revision ID: c8e2a4f6b193
+Revises: a3d7c5e1f804
+Create Date: 2026-10-18 19:03:55.208716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2a4f6b193'
+down_revision = 'a3d7c5e1f804'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbox',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('topic', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('dispatched_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_undelivered', 'outbox', ['available_at', 'id'], unique=False,
+                    postgresql_where=sa.text('dispatched_at IS NULL'),
+                    sqlite_where=sa.text('dispatched_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_outbox_undelivered', table_name='outbox')
+    op.drop_table('outbox')
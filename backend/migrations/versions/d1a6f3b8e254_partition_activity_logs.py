@@ -0,0 +1,105 @@
+"""partition activity_logs by month (Postgres)
+
+Revision ID: d1a6f3b8e254
+Revises: b7d4e9a1c386
+Create Date: 2026-10-18 15:58:31.204417
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1a6f3b8e254'
+down_revision = 'b7d4e9a1c386'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_activity_logs_created_at_id', 'created_at, id'),
+    ('ix_activity_logs_action_created_at', 'action, created_at, id'),
+    ('ix_activity_logs_user_id_created_at', 'user_id, created_at, id'),
+)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _drop_indexes():
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_indexes():
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON activity_logs ({columns})")
+
+
+def upgrade():
+    # SQLite has no table partitioning; retention there deletes month ranges (app.archive)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE activity_logs RENAME TO activity_logs_unpartitioned")
+    op.execute("ALTER TABLE activity_logs_unpartitioned RENAME CONSTRAINT activity_logs_pkey TO activity_logs_unpartitioned_pkey")
+    _drop_indexes()
+
+    # The partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE activity_logs (
+            id VARCHAR(50) NOT NULL,
+            user_id VARCHAR(50) NOT NULL REFERENCES users (id),
+            action VARCHAR(50) NOT NULL,
+            item VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            description TEXT,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT")
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM activity_logs_unpartitioned")).scalar()
+    now = datetime.utcnow()
+    month = datetime((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(datetime(now.year, now.month, 1), 2)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE activity_logs_y{month.year:04d}m{month.month:02d} PARTITION OF activity_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(
+        "INSERT INTO activity_logs (id, user_id, action, item, created_at, description) "
+        "SELECT id, user_id, action, item, COALESCE(created_at, now() AT TIME ZONE 'utc'), description "
+        "FROM activity_logs_unpartitioned"
+    )
+    op.execute("DROP TABLE activity_logs_unpartitioned")
+    _create_indexes()
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE activity_logs RENAME TO activity_logs_partitioned")
+    _drop_indexes()
+    op.execute("""
+        CREATE TABLE activity_logs (
+            id VARCHAR(50) NOT NULL PRIMARY KEY,
+            user_id VARCHAR(50) NOT NULL REFERENCES users (id),
+            action VARCHAR(50) NOT NULL,
+            item VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            description TEXT
+        )
+    """)
+    op.execute(
+        "INSERT INTO activity_logs (id, user_id, action, item, created_at, description) "
+        "SELECT id, user_id, action, item, created_at, description FROM activity_logs_partitioned"
+    )
+    op.execute("DROP TABLE activity_logs_partitioned CASCADE")
+    _create_indexes()
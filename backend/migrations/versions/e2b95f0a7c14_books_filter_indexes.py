@@ -0,0 +1,25 @@
+"""books catalog filter indexes
+
+Revision ID: e2b95f0a7c14
+Revises: c47a91e5d2f8
+Create Date: 2026-10-18 11:36:50.227193
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b95f0a7c14'
+down_revision = 'c47a91e5d2f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_books_category_price', 'books', ['category', 'price'], unique=False)
+    op.create_index('ix_books_availability', 'books', ['is_available_for_sale', 'is_available_for_lending', 'copies_available'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_books_availability', table_name='books')
+    op.drop_index('ix_books_category_price', table_name='books')
@@ -0,0 +1,87 @@
+"""activity log entity columns
+
+Revision ID: e9c3b7f2a518
+Revises: d1a6f3b8e254
+Create Date: 2026-10-18 16:37:45.913270
+
+"""
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9c3b7f2a518'
+down_revision = 'd1a6f3b8e254'
+branch_labels = None
+depends_on = None
+
+# "Request 42 for book 'Dune'", "Purchased request 42 for book 'Dune'",
+# "Borrow confirmed for book 'Dune'"
+REQUEST_RE = re.compile(r"\brequest (\d+)\b", re.IGNORECASE)
+TITLE_RE = re.compile(r"for book '(.*)'$")
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    with op.batch_alter_table('activity_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('book_id', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('request_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('order_id', sa.String(length=50), nullable=True))
+
+    # Backfill from the free-form item text, BATCH_SIZE logs at a time in id order, so memory
+    # stays flat however large the tables are. Book ids come from the request when it still
+    # exists, otherwise from the title when exactly one book has it; both are looked up only
+    # for the requests and titles the batch mentions.
+    bind = op.get_bind()
+    select_logs = sa.text(
+        "SELECT id, item FROM activity_logs WHERE id > :last"
+        " AND (item LIKE '%equest %' OR item LIKE '%for book %') ORDER BY id LIMIT :limit"
+    )
+    select_requests = sa.text("SELECT id, book_id FROM pending_requests WHERE id IN :ids").bindparams(
+        sa.bindparam("ids", expanding=True)
+    )
+    select_titles = sa.text(
+        "SELECT title, MIN(id) FROM books WHERE title IN :titles GROUP BY title HAVING COUNT(*) = 1"
+    ).bindparams(sa.bindparam("titles", expanding=True))
+    statement = sa.text("UPDATE activity_logs SET book_id = :book_id, request_id = :request_id WHERE id = :log_id")
+
+    last = ""
+    while True:
+        rows = bind.execute(select_logs, {"last": last, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        last = rows[-1][0]
+        parsed = []
+        for log_id, item in rows:
+            match = REQUEST_RE.search(item)
+            request_id = int(match.group(1)) if match else None
+            match = TITLE_RE.search(item)
+            parsed.append((log_id, request_id, match.group(1) if match else None))
+
+        request_ids = {request_id for _, request_id, _ in parsed if request_id is not None}
+        request_books = dict(bind.execute(select_requests, {"ids": list(request_ids)}).all()) if request_ids else {}
+        titles = {title for _, _, title in parsed if title is not None}
+        title_books = dict(bind.execute(select_titles, {"titles": list(titles)}).all()) if titles else {}
+
+        updates = []
+        for log_id, request_id, title in parsed:
+            book_id = request_books.get(request_id) or title_books.get(title)
+            if request_id is not None or book_id is not None:
+                updates.append({"log_id": log_id, "book_id": book_id, "request_id": request_id})
+        if updates:
+            bind.execute(statement, updates)
+
+    op.create_index('ix_activity_logs_book_id_created_at', 'activity_logs', ['book_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_activity_logs_request_id_created_at', 'activity_logs', ['request_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_activity_logs_order_id_created_at', 'activity_logs', ['order_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_activity_logs_order_id_created_at', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_request_id_created_at', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_book_id_created_at', table_name='activity_logs')
+    with op.batch_alter_table('activity_logs', schema=None) as batch_op:
+        batch_op.drop_column('order_id')
+        batch_op.drop_column('request_id')
+        batch_op.drop_column('book_id')
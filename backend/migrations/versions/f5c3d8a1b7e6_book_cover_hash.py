@@ -0,0 +1,26 @@
+"""book cover hash for uploaded covers
+
+Revision ID: f5c3d8a1b7e6
+Revises: e2b95f0a7c14
+Create Date: 2026-10-18 12:41:09.615032
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c3d8a1b7e6'
+down_revision = 'e2b95f0a7c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cover_hash', sa.String(length=80), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('cover_hash')
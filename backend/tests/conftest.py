@@ -0,0 +1,100 @@
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from flask_migrate import upgrade
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.extensions import db as _db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+        # write side effects synchronously so tests can assert on them right away
+        ACTIVITY_LOG_ASYNC = False
+        OUTBOX_ASYNC = False
+        COVER_STORAGE_DIR = str(tmp_path / "covers")
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        upgrade(directory=os.path.join(BACKEND_DIR, "migrations"))
+    yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _create_user(app, name, email, role="customer"):
+    from app.models import User
+    with app.app_context():
+        user = User(name=name, email=email, role=role)
+        user.set_password("secret")
+        _db.session.add(user)
+        _db.session.commit()
+        return user.id
+
+
+def _headers(client, email):
+    token = client.post("/auth/login", json={"email": email, "password": "secret"}).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin(app, client):
+    user_id = _create_user(app, "Admin", "admin@example.com", role="admin")
+    return user_id, _headers(client, "admin@example.com")
+
+
+@pytest.fixture
+def customer(app, client):
+    user_id = _create_user(app, "Joe", "joe@example.com")
+    return user_id, _headers(client, "joe@example.com")
+
+
+@pytest.fixture
+def make_book(app):
+    from app.models import Book
+
+    def make(**fields):
+        fields.setdefault("title", "Book")
+        fields.setdefault("author", "Author")
+        fields.setdefault("location", "Library")
+        with app.app_context():
+            book = Book(**fields)
+            _db.session.add(book)
+            _db.session.commit()
+            return book.id
+    return make
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Context manager collecting the SQL statements run on the app's engine inside the block.
+    """
+    @contextmanager
+    def count():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+    return count
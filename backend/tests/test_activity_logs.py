@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import ActivityLog
+
+
+@pytest.mark.parametrize("path", ["/logs/books/1", "/logs/requests/1", "/logs/orders/1"])
+def test_entity_logs_are_admin_only(client, admin, customer, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=customer[1]).status_code == 403
+
+    response = client.get(path, headers=admin[1])
+    assert response.status_code == 200
+    assert response.get_json()["items"] == []
+
+
+def _add_logs(app, user_id, entries):
+    with app.app_context():
+        db.session.add_all([
+            ActivityLog(id=log_id, user_id=user_id, action=action, item=log_id, created_at=created_at)
+            for log_id, action, created_at in entries
+        ])
+        db.session.commit()
+
+
+def test_cursor_pages_cover_every_log_once(app, client, customer):
+    user_id, _ = customer
+    tie = datetime(2026, 5, 2, 9)
+    # Three logs share a timestamp, so the id breaks the tie across page boundaries
+    _add_logs(app, user_id, [
+        ("a", "Approved", tie), ("b", "Declined", tie), ("c", "Approved", tie),
+        ("d", "Approved", datetime(2026, 5, 1, 9)), ("e", "Pending", datetime(2026, 5, 3, 9)),
+    ])
+
+    seen, after = [], None
+    while True:
+        page = client.get("/logs?limit=2" + (f"&after={after}" if after else "")).get_json()
+        seen += [log["id"] for log in page["items"]]
+        after = page["next_cursor"]
+        if not after:
+            break
+    assert seen == ["e", "c", "b", "a", "d"]
+
+    approved = client.get("/logs?action=Approved&date=2026-05-02").get_json()
+    assert [log["id"] for log in approved["items"]] == ["c", "a"]
+    ranged = client.get("/logs?from=2026-05-01&to=2026-05-02T09:00:00").get_json()
+    assert [log["id"] for log in ranged["items"]] == ["d"]
+
+
+@pytest.mark.parametrize("query, message", [
+    ("after=garbage", "Invalid cursor"),
+    ("limit=0", "limit must be a positive integer"),
+    ("date=02-05-2026", "Invalid date format"),
+    ("from=yesterday", "from must be an ISO date or timestamp"),
+])
+def test_invalid_arguments_are_rejected(client, query, message):
+    response = client.get(f"/logs?{query}")
+    assert response.status_code == 400
+    assert response.get_json() == {"msg": message}
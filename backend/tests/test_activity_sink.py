@@ -0,0 +1,44 @@
+from app.activity import ActivitySink, log_activity
+from app.extensions import db
+from app.models import ActivityLog
+
+
+def _async_sink(app):
+    app.config.update(ACTIVITY_LOG_ASYNC=True, ACTIVITY_LOG_FLUSH_INTERVAL=2.0)
+    app.extensions["activity_sink"] = ActivitySink(app)
+    return app.extensions["activity_sink"]
+
+
+def _log_count(app):
+    with app.app_context():
+        return ActivityLog.query.count()
+
+
+def test_entries_are_queued_on_commit_and_drained_on_close(app, customer):
+    user_id, _ = customer
+    sink = _async_sink(app)
+    with app.app_context():
+        for i in range(3):
+            log_activity(user_id, "Approved", f"Request {i}")
+        db.session.commit()
+        log_activity(user_id, "Declined", "Rolled back")
+        db.session.rollback()
+
+    sink.close()
+    with app.app_context():
+        assert sorted(log.item for log in ActivityLog.query) == ["Request 0", "Request 1", "Request 2"]
+
+
+def test_full_queue_writes_synchronously(app, customer):
+    user_id, _ = customer
+    app.config["ACTIVITY_LOG_QUEUE_SIZE"] = 1
+    sink = _async_sink(app)
+    sink._stopping.set()  # keep the background thread from draining the queue
+    with app.app_context():
+        log_activity(user_id, "Approved", "queued")
+        log_activity(user_id, "Approved", "overflow")
+        db.session.commit()
+
+    assert _log_count(app) == 1
+    sink.close()
+    assert _log_count(app) == 2
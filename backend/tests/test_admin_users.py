@@ -0,0 +1,36 @@
+from app.extensions import db
+from app.models import Lending
+
+
+def test_users_sorted_by_borrowed_count(app, client, admin, customer, make_book):
+    admin_id, headers = admin
+    customer_id, _ = customer
+    book_id = make_book()
+    with app.app_context():
+        db.session.add_all([
+            Lending(user_id=customer_id, book_id=book_id),
+            Lending(user_id=customer_id, book_id=book_id),
+            Lending(user_id=customer_id, book_id=book_id, status="returned"),
+        ])
+        db.session.commit()
+
+    users = client.get("/admin/users?sort=-borrowed_count", headers=headers).get_json()["users"]
+    assert [(u["id"], u["borrowed_count"], u["status"]) for u in users] == [
+        (customer_id, 2, "Active"), (admin_id, 0, "Inactive"),
+    ]
+    ascending = client.get("/admin/users?sort=borrowed_count", headers=headers).get_json()["users"]
+    assert [u["id"] for u in ascending] == [admin_id, customer_id]
+
+
+def test_user_search_is_a_prefix_match(client, admin, customer):
+    _, headers = admin
+    found = client.get("/admin/users?search=JO", headers=headers).get_json()
+    assert [u["email"] for u in found["users"]] == ["joe@example.com"] and found["total"] == 1
+    # LIKE wildcards in the term are matched literally
+    assert client.get("/admin/users?search=%25", headers=headers).get_json()["users"] == []
+
+
+def test_unknown_sort_is_rejected(client, admin):
+    response = client.get("/admin/users?sort=password_hash", headers=admin[1])
+    assert response.status_code == 400
+    assert response.get_json()["msg"].startswith("sort must be one of:")
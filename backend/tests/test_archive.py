@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from app import archive
+from app.extensions import db
+from app.models import ActivityLog
+
+
+def _log(user_id, action, created_at):
+    db.session.add(ActivityLog(user_id=user_id, action=action, item="Book", created_at=created_at))
+
+
+def test_expired_months_move_into_the_database_archive(app, client, admin):
+    admin_id, headers = admin
+    with app.app_context():
+        _log(admin_id, "Approved", datetime(2024, 3, 5))
+        _log(admin_id, "Declined", datetime(2024, 3, 20))
+        _log(admin_id, "Approved", datetime(2026, 10, 1))
+        db.session.commit()
+
+        moved = archive.archive_expired(retention_months=12, now=datetime(2026, 10, 18))
+        assert moved["2024-03"] == 2
+        assert db.session.query(ActivityLog).count() == 1
+        assert archive.archived_months() == ["2024-03"]
+
+    response = client.get("/admin/activity-logs/archive/2024-03?limit=1", headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [log["action"] for log in body["items"]] == ["Declined"]
+    assert body["next_offset"] == 1
+    assert client.get("/admin/activity-logs/archive/2024-04", headers=headers).status_code == 404
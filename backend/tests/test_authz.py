@@ -0,0 +1,56 @@
+from app.extensions import db
+from app.models import User
+
+
+def test_role_change_applies_without_waiting_for_the_cache(app, client, admin):
+    admin_id, headers = admin
+    assert client.get("/admin/users", headers=headers).status_code == 200
+
+    with app.app_context():
+        db.session.get(User, admin_id).role = "customer"
+        db.session.commit()
+
+    # The token still claims "admin", which no longer matches
+    assert client.get("/admin/users", headers=headers).status_code == 403
+    assert client.get("/pendingRequests", headers=headers).status_code == 401
+
+
+def test_deleted_user_token_is_rejected(app, client, customer):
+    user_id, headers = customer
+    assert client.get("/shoppingCart/count", headers=headers).status_code == 200
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+
+    assert client.get("/shoppingCart", headers=headers).status_code == 401
+    assert client.get("/shoppingCart/count", headers=headers).status_code == 401
+
+
+def test_user_without_a_role_is_a_customer(app, client):
+    with app.app_context():
+        user = User(name="Nora", email="nora@example.com", role=None)
+        user.set_password("secret")
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(db.update(User).where(User.id == user.id).values(role=None))
+        db.session.commit()
+    token = client.post("/auth/login", json={"email": "nora@example.com", "password": "secret"}).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/shoppingCart/count", headers=headers).status_code == 200
+    assert client.get("/admin/users", headers=headers).status_code == 403
+
+
+def test_demoted_admin_cannot_decide_requests(app, client, admin, customer, make_book):
+    admin_id, headers = admin
+    book_id = make_book()
+    request_id = client.post("/pendingRequests", json={"book_id": book_id}, headers=customer[1]).get_json()["id"]
+
+    with app.app_context():
+        db.session.get(User, admin_id).role = "customer"
+        db.session.commit()
+
+    response = client.patch(f"/pendingRequests/{request_id}", json={"status": "approved"}, headers=headers)
+    assert response.status_code == 401
+    assert client.patch(f"/pendingRequests/confirm/{request_id}", headers=headers).status_code == 401
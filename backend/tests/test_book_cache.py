@@ -0,0 +1,23 @@
+from app.cache import get_book_cache
+
+
+def test_update_evicts_every_cover_size_of_the_book(app, client, admin, make_book):
+    _, headers = admin
+    book_id = make_book(title="Old title")
+    other_id = make_book(title="Other")
+    for size in (150, 300):
+        assert client.get(f"/books/{book_id}?cover_size={size}").status_code == 200
+    client.get(f"/books/{other_id}")
+
+    with app.app_context():
+        backend = get_book_cache().backend
+        assert set(backend.get(book_id)[1]) == {150, 300}
+
+    response = client.put(f"/books/{book_id}", json={"title": "New title"}, headers=headers)
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert backend.get(book_id) is None
+        assert backend.get(other_id) is not None
+    for size in (150, 300):
+        assert client.get(f"/books/{book_id}?cover_size={size}").get_json()["title"] == "New title"
@@ -0,0 +1,51 @@
+from app.extensions import db
+from app.models import Book, Order, PendingRequest, PurchaseCart, PurchaseCartItem
+
+
+def _cart(user_id, *book_ids):
+    cart = PurchaseCart(user_id=user_id)
+    db.session.add(cart)
+    db.session.flush()
+    db.session.add_all([PurchaseCartItem(cart_id=cart.id, book_id=b) for b in book_ids])
+    return cart.id
+
+
+def test_bulk_delete_clears_items_requests_and_emptied_carts(app, client, admin, customer, make_book):
+    user_id, _ = customer
+    gone, other, kept = make_book(), make_book(), make_book()
+    with app.app_context():
+        emptied = _cart(user_id, gone, other)
+        mixed = _cart(user_id, gone, kept)
+        ordered = _cart(user_id, gone)
+        db.session.add(Order(user_id=user_id, cart_id=ordered))
+        db.session.add(PendingRequest(user_id=user_id, book_id=gone, action="borrow", status="pending"))
+        db.session.commit()
+
+    response = client.post("/books/bulk-delete", json={"ids": [gone, other, "missing"]}, headers=admin[1])
+    assert response.get_json() == {"deleted": 2, "not_found": ["missing"]}
+
+    with app.app_context():
+        assert db.session.get(Book, kept) is not None
+        assert db.session.get(PurchaseCart, emptied) is None
+        # A cart with other items, or one an order points at, stays
+        assert [i.book_id for i in PurchaseCartItem.query.filter_by(cart_id=mixed)] == [kept]
+        assert db.session.get(PurchaseCart, ordered) is not None
+        assert PendingRequest.query.count() == 0
+
+
+def test_delete_runs_the_same_statements_whatever_the_cart_count(app, client, admin, customer, make_book, count_queries):
+    user_id, _ = customer
+
+    def statements_for(carts):
+        book_id = make_book()
+        with app.app_context():
+            for _ in range(carts):
+                _cart(user_id, book_id)
+            db.session.commit()
+        with count_queries() as statements:
+            assert client.delete(f"/books/{book_id}", headers=admin[1]).status_code == 200
+        return len(statements)
+
+    statements_for(1)  # first catalog change creates the version row
+    assert statements_for(1) == statements_for(20)
+    assert client.delete("/books/missing", headers=admin[1]).status_code == 404
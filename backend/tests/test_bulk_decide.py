@@ -0,0 +1,33 @@
+from app.extensions import db
+from app.inventory import reserve_many
+from app.models import Book, PendingRequest
+
+
+def test_borrow_without_a_copy_is_left_untouched(app, client, admin, customer, make_book):
+    book_id = make_book(copies_available=1)
+    ids = [
+        client.post("/pendingRequests", json={"book_id": book_id, "action": "borrow"}, headers=customer[1]).get_json()["id"]
+        for _ in range(2)
+    ]
+
+    response = client.post("/pendingRequests/bulk", json={"action": "approve", "ids": ids}, headers=admin[1])
+    assert response.status_code == 200
+
+    with app.app_context():
+        first, second = (db.session.get(PendingRequest, rid) for rid in ids)
+        assert (first.status, second.status) == ("approved", "pending")
+        assert first.updated_at is not None
+        assert second.updated_at is None
+
+
+def test_short_stock_is_reserved_in_fixed_statements(app, make_book, count_queries):
+    plenty, short, empty = make_book(copies_available=5), make_book(copies_available=2), make_book(copies_available=0)
+
+    with app.app_context(), count_queries() as statements:
+        reserved = reserve_many({plenty: 3, short: 4, empty: 1}, for_lending=True)
+        db.session.commit()
+
+    assert reserved == {plenty: 3, short: 2}
+    assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE BOOKS")]) == 1
+    with app.app_context():
+        assert [db.session.get(Book, b).copies_available for b in (plenty, short, empty)] == [2, 0, 0]
@@ -0,0 +1,35 @@
+import pytest
+
+from app.extensions import db
+from app.inventory import reserve_copies
+
+
+@pytest.mark.parametrize("path", ["/books", "/books/facets", "/books/search?q=dune"])
+def test_catalog_reads_revalidate_with_etag(client, admin, make_book, path):
+    _, headers = admin
+    book_id = make_book(title="Dune")
+
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+    again = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+    client.put(f"/books/{book_id}", json={"price": 12}, headers=headers)
+    changed = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_book_etag_follows_its_stock(app, client, make_book):
+    book_id = make_book(copies_available=2)
+    etag = client.get(f"/books/{book_id}").headers["ETag"]
+    assert client.get(f"/books/{book_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    with app.app_context():
+        assert reserve_copies(book_id)
+        db.session.commit()
+    response = client.get(f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["copies_available"] == 1
@@ -0,0 +1,19 @@
+from app import counters
+from app.extensions import db
+from app.models import Counter
+
+
+def test_reads_do_not_reconcile_and_reconcile_recounts(app, client, make_book):
+    make_book()
+    make_book()
+    with app.app_context():
+        db.session.get(Counter, counters.BOOKS).value = 99
+        db.session.commit()
+
+    assert client.get("/dashboardStats").get_json()["totalBooks"] == 99
+
+    with app.app_context():
+        assert counters.reconcile()[counters.BOOKS] == 2
+        counters.increment(counters.BOOKS)
+        db.session.commit()
+        assert counters.snapshot()[counters.BOOKS] == 3
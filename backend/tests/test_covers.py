@@ -0,0 +1,52 @@
+import io
+
+import pytest
+
+from app import covers
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png(width=600, height=900):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "navy").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _upload(client, headers, book_id, data, filename="cover.png"):
+    return client.post(
+        f"/books/{book_id}/cover", data={"file": (io.BytesIO(data), filename)},
+        headers=headers, content_type="multipart/form-data",
+    )
+
+
+def test_upload_serves_the_original_until_the_thumbnail_exists(app, client, admin, make_book, monkeypatch):
+    monkeypatch.setattr(covers, "schedule_thumbnails", lambda name: None)
+    _, headers = admin
+    book_id = make_book()
+    image = _png()
+
+    response = _upload(client, headers, book_id, image)
+    assert response.status_code == 200
+    name = response.get_json()["cover"].rsplit("/", 2)[-2]
+    assert response.get_json()["cover"].endswith(f"/books/covers/{name}/300.webp")
+    # Identical content is stored once under the same name
+    assert _upload(client, headers, make_book(), image).get_json()["cover"].rsplit("/", 2)[-2] == name
+
+    fallback = client.get(f"/books/covers/{name}/150.webp")
+    assert fallback.status_code == 200 and fallback.mimetype == "image/png"
+    assert not fallback.cache_control.immutable
+
+    covers.generate_thumbnails(name, app.config["COVER_STORAGE_DIR"], app.config["COVER_THUMBNAIL_SIZES"])
+    thumb = client.get(f"/books/covers/{name}/150.webp")
+    assert thumb.mimetype == "image/webp" and thumb.cache_control.immutable
+    assert Image.open(io.BytesIO(thumb.data)).size == (150, 225)
+    assert client.get(f"/books/covers/{name}/999.webp").status_code == 404
+
+
+def test_invalid_uploads_are_rejected(client, admin, make_book):
+    _, headers = admin
+    book_id = make_book()
+    assert _upload(client, headers, book_id, _png(), filename="cover.exe").status_code == 400
+    assert _upload(client, headers, book_id, b"not an image").get_json() == {"msg": "cover is not a valid image"}
+    assert _upload(client, headers, "missing", _png()).status_code == 404
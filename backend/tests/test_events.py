@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import events
+from app.extensions import db
+from app.models import Event
+
+
+def _insert(event_id, channel="user:1", age=0):
+    with db.engine.begin() as conn:
+        conn.execute(insert(Event.__table__), [{
+            "id": event_id, "channel": channel, "type": "request_status", "data": "{}",
+            "created_at": datetime.utcnow() - timedelta(seconds=age),
+        }])
+
+
+def _ids(chunks):
+    return [int(chunk.split("\n")[0][4:]) for chunk in chunks if chunk.startswith("id: ")]
+
+
+def test_stream_sends_an_event_that_commits_after_a_higher_id(app):
+    app.config.update(EVENTS_POLL_INTERVAL=0.01, EVENTS_STREAM_SECONDS=5)
+    with app.app_context():
+        _insert(1, age=60)
+        stream = events.stream(["user:1"], last_id=1)
+        assert next(stream).startswith("retry:")
+
+        _insert(5)
+        assert _ids([next(stream)]) == [5]
+        # Id 3 was taken before 5 but its transaction commits later
+        _insert(3)
+        _insert(4, channel="user:2")
+        assert _ids([next(stream)]) == [3]
+
+
+def test_resumed_stream_rereads_ids_that_may_not_have_settled(app):
+    app.config.update(EVENTS_POLL_INTERVAL=0.01, EVENTS_STREAM_SECONDS=0)
+    with app.app_context():
+        _insert(1, age=60)
+        _insert(2)
+        _insert(3)
+        # The client saw 3, which does not prove 2 had committed by then
+        assert _ids(events.stream(["user:1"], last_id=3)) == [2, 3]
@@ -0,0 +1,25 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+
+def test_since_returns_books_created_or_updated_after_it(client, make_book):
+    make_book(title="Old", created_at=datetime(2026, 1, 1))
+    make_book(title="Touched", created_at=datetime(2026, 1, 1), updated_at=datetime(2026, 6, 1))
+    make_book(title="New", created_at=datetime(2026, 6, 2))
+
+    response = client.get("/books/export?since=2026-05-01T00:00:00&fields=title")
+    assert response.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert rows == [{"title": "Touched"}, {"title": "New"}]
+
+    full = client.get("/books/export?format=csv&fields=title,location").get_data(as_text=True)
+    rows = list(csv.DictReader(io.StringIO(full)))
+    assert {row["title"] for row in rows} == {"Old", "Touched", "New"}
+    assert {row["location"] for row in rows} == {"Library"}
+
+
+def test_export_rejects_bad_arguments(client):
+    assert client.get("/books/export?format=xml").status_code == 400
+    assert client.get("/books/export?since=yesterday").get_json() == {"msg": "since must be an ISO 8601 timestamp"}
@@ -0,0 +1,35 @@
+def _buckets(payload):
+    return {b["bucket"]: b["count"] for b in payload["price_buckets"] if b["count"]}
+
+
+def test_facet_counts(client, make_book):
+    make_book(category="Fiction", price=5, location="Store")
+    make_book(category="Fiction", price=15, location="Store")
+    make_book(category="History", price=150, location="Store")
+    make_book(category="History")
+
+    facets = client.get("/books/facets").get_json()
+    assert facets["categories"] == [{"category": "Fiction", "count": 2}, {"category": "History", "count": 2}]
+    assert _buckets(facets) == {"0-10": 1, "10-20": 1, "100+": 1, "none": 1}
+    assert facets["total"] == 4
+
+    # The category facet ignores ?category= so the other choices keep their counts
+    fiction = client.get("/books/facets?category=Fiction").get_json()
+    assert fiction["categories"] == facets["categories"]
+    assert _buckets(fiction) == {"0-10": 1, "10-20": 1}
+    assert fiction["total"] == 2
+
+    store = client.get("/books/facets?location=Store&min_price=10").get_json()
+    assert store["categories"] == [{"category": "Fiction", "count": 1}, {"category": "History", "count": 1}]
+    assert store["total"] == 2
+
+
+def test_listing_filters_and_sort_validation(client, make_book):
+    make_book(title="Cheap", category="Fiction", price=5, location="Store", copies_available=0)
+    make_book(title="Dear", category="Fiction", price=50, location="Store")
+
+    titles = [b["title"] for b in client.get("/books?category=Fiction&sort=-price").get_json()]
+    assert titles == ["Dear", "Cheap"]
+    assert [b["title"] for b in client.get("/books?in_stock=true").get_json()] == ["Dear"]
+    assert client.get("/books?sort=isbn").status_code == 400
+    assert client.get("/books?min_price=abc").get_json() == {"msg": "min_price must be a number"}
@@ -0,0 +1,68 @@
+import io
+
+import pytest
+
+from app import importer
+from app.extensions import db
+from app.models import Book
+
+
+@pytest.mark.parametrize("record, message", [
+    ({"author": "A"}, "title is required"),
+    ({"title": "T"}, "author is required"),
+    ({"title": "T", "author": "A", "location": "Shelf"}, "location must be Library or Store"),
+    ({"title": "T", "author": "A", "location": "Store"}, "price is required for Store books"),
+    ({"title": "T", "author": "A", "price": "cheap"}, "price must be a number"),
+    ({"title": "T", "author": "A", "copies_available": "-1"}, "copies_available must not be negative"),
+])
+def test_invalid_records_are_rejected(record, message):
+    with pytest.raises(ValueError, match=message):
+        importer.validate_record(record)
+
+
+def test_import_upserts_on_isbn_and_reports_superseded_rows(app, client, admin):
+    _, headers = admin
+    data = (
+        "title,author,isbn,location,price\n"
+        "First,Ann,978-1,Store,10\n"
+        "Second,Ann,9781,Store,12\n"
+        ",Nobody,,Library,\n"
+    )
+    response = client.post("/books/import?format=csv", data=data, headers=headers)
+    report = response.get_json()
+    assert (report["rows"], report["imported"], report["superseded"], report["failed"]) == (3, 1, 1, 1)
+    assert report["errors"] == [{"line": 4, "error": "title is required"}]
+
+    client.post("/books/import?format=csv", data="title,author,isbn,location,price\nThird,Ann,9781,Store,15\n", headers=headers)
+    with app.app_context():
+        books = db.session.query(Book.title, Book.price).filter(Book.isbn == "9781").all()
+    assert [(title, float(price)) for title, price in books] == [("Third", 15.0)]
+
+
+def test_failed_batch_is_retried_row_by_row(app, monkeypatch):
+    upsert = importer._upsert_batch
+
+    def failing_upsert(rows):
+        if any(row["title"] == "Broken" for row in rows):
+            raise RuntimeError("bad row")
+        upsert(rows)
+
+    monkeypatch.setattr(importer, "_upsert_batch", failing_upsert)
+    lines = "\n".join(['{"title": "Good", "author": "A"}', '{"title": "Broken", "author": "A"}', '{"title": "Fine", "author": "A"}'])
+    with app.app_context():
+        report = importer.import_books(io.StringIO(lines), "ndjson").to_dict()
+        titles = sorted(db.session.scalars(db.select(Book.title)))
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert report["errors"] == [{"line": 2, "error": "RuntimeError: bad row"}]
+    assert titles == ["Fine", "Good"]
+
+
+def test_cli_import(app, tmp_path):
+    path = tmp_path / "books.ndjson"
+    path.write_text('{"title": "Dune", "author": "Herbert", "isbn": "42"}\n{"author": "Nobody"}\n')
+    result = app.test_cli_runner().invoke(args=["books", "import", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "1 of 2 row(s) imported" in result.output
+    assert "line 2: title is required" in result.stderr
+    with app.app_context():
+        assert db.session.query(Book).filter(Book.isbn == "42").count() == 1
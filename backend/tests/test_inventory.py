@@ -0,0 +1,82 @@
+from app.catalog import current_version
+from app.extensions import db
+from app.models import Book
+
+
+def _copies(app, book_id):
+    with app.app_context():
+        return db.session.get(Book, book_id).copies_available
+
+
+def _borrow_request(client, headers, book_id):
+    response = client.post("/pendingRequests", json={"book_id": book_id, "action": "borrow"}, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def test_reservation_keeps_the_catalog_version_but_changes_the_book_etag(app, client, admin, customer, make_book):
+    book_id = make_book(copies_available=2)
+    other_id = make_book()
+    with app.app_context():
+        catalog_before = current_version()[0].split(":")[0]
+    book_etag = client.get(f"/books/{book_id}").headers["ETag"]
+    other_etag = client.get(f"/books/{other_id}").headers["ETag"]
+    listing_etag = client.get("/books/").headers["ETag"]
+
+    request_id = _borrow_request(client, customer[1], book_id)
+    response = client.patch(f"/pendingRequests/{request_id}", json={"status": "approved"}, headers=admin[1])
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert current_version()[0].split(":")[0] == catalog_before
+    response = client.get(f"/books/{book_id}", headers={"If-None-Match": book_etag})
+    assert response.status_code == 200
+    assert response.get_json()["copies_available"] == 1
+    assert client.get(f"/books/{other_id}", headers={"If-None-Match": other_etag}).status_code == 304
+    assert client.get("/books/", headers={"If-None-Match": listing_etag}).status_code == 200
+
+
+def test_repeated_approve_and_decline_never_adds_copies(app, client, admin, customer, make_book):
+    book_id = make_book(copies_available=1)
+    request_id = _borrow_request(client, customer[1], book_id)
+    assert client.patch(f"/pendingRequests/{request_id}", json={"status": "approved"}, headers=admin[1]).status_code == 200
+
+    for _ in range(3):
+        for status in ("declined", "approved"):
+            response = client.patch(f"/pendingRequests/{request_id}", json={"status": status}, headers=admin[1])
+            assert response.status_code == 409
+            assert _copies(app, book_id) == 0
+
+    declined = _borrow_request(client, customer[1], book_id)
+    assert client.patch(f"/pendingRequests/{declined}", json={"status": "declined"}, headers=admin[1]).status_code == 200
+    assert client.patch(f"/pendingRequests/{declined}", json={"status": "approved"}, headers=admin[1]).status_code == 409
+    assert _copies(app, book_id) == 0
+
+
+def test_approved_return_gives_the_copy_back(app, client, admin, customer, make_book):
+    book_id = make_book(copies_available=1)
+    request_id = _borrow_request(client, customer[1], book_id)
+    client.patch(f"/pendingRequests/{request_id}", json={"status": "approved"}, headers=admin[1])
+    for status in ("confirm_borrow", "return_pending"):
+        assert client.patch(f"/pendingRequests/{request_id}", json={"status": status}, headers=customer[1]).status_code == 200
+    assert _copies(app, book_id) == 0
+
+    response = client.patch(f"/pendingRequests/{request_id}", json={"status": "return_approved"}, headers=admin[1])
+    assert response.status_code == 200
+    assert _copies(app, book_id) == 1
+
+
+def test_handling_an_approved_borrow_does_not_take_a_second_copy(app, client, admin, customer, make_book):
+    book_id = make_book(copies_available=2)
+    declined = _borrow_request(client, customer[1], book_id)
+    lent = _borrow_request(client, customer[1], book_id)
+    for request_id in (declined, lent):
+        client.patch(f"/pendingRequests/{request_id}", json={"status": "approved"}, headers=admin[1])
+    assert _copies(app, book_id) == 0
+
+    response = client.post(f"/admin/pending-requests/{declined}", json={"action": "decline"}, headers=admin[1])
+    assert response.status_code == 200
+    assert _copies(app, book_id) == 1
+    response = client.post(f"/admin/pending-requests/{lent}", json={"action": "approve"}, headers=admin[1])
+    assert response.status_code == 200
+    assert _copies(app, book_id) == 1
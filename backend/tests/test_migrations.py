@@ -0,0 +1,42 @@
+import os
+
+import sqlalchemy as sa
+from flask_migrate import upgrade
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+
+
+def test_activity_log_entity_backfill(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+        ACTIVITY_LOG_ASYNC = False
+        OUTBOX_ASYNC = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS, revision="d1a6f3b8e254")
+        with db.engine.begin() as conn:
+            conn.execute(sa.text("INSERT INTO users (id, email, password_hash) VALUES ('u', 'u@example.com', 'x')"))
+            conn.execute(sa.text(
+                "INSERT INTO books (id, title, author) VALUES"
+                " ('b1', 'Dune', 'Herbert'), ('b2', 'Emma', 'Austen'), ('b3', 'Emma', 'Other')"
+            ))
+            conn.execute(sa.text("INSERT INTO pending_requests (id, user_id, book_id) VALUES (42, 'u', 'b2')"))
+            conn.execute(sa.text(
+                "INSERT INTO activity_logs (id, user_id, action, item) VALUES"
+                " ('1', 'u', 'request', 'Request 42 for book ''Emma'''),"
+                " ('2', 'u', 'borrow', 'Borrow confirmed for book ''Dune'''),"
+                " ('3', 'u', 'borrow', 'Borrow confirmed for book ''Emma'''),"
+                " ('4', 'u', 'login', 'Signed in')"
+            ))
+        upgrade(directory=MIGRATIONS, revision="e9c3b7f2a518")
+        with db.engine.connect() as conn:
+            rows = conn.execute(sa.text("SELECT id, book_id, request_id FROM activity_logs ORDER BY id")).all()
+
+    # The request decides the book; an ambiguous title leaves it unset
+    assert [tuple(row) for row in rows] == [("1", "b2", 42), ("2", "b1", None), ("3", None, None), ("4", None, None)]
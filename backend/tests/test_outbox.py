@@ -0,0 +1,37 @@
+from app import create_app
+from app.config import Config
+from app.counters import sales_key
+from app.extensions import db
+from app.models import Order, Counter
+
+
+def test_dispatcher_starts_with_the_first_request(app):
+    class AsyncConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = app.config["SQLALCHEMY_DATABASE_URI"]
+        OUTBOX_ASYNC = True
+
+    async_app = create_app(AsyncConfig)
+    dispatcher = async_app.extensions["outbox_dispatcher"]
+    assert dispatcher._thread is None
+    try:
+        async_app.test_client().get("/health")
+        assert dispatcher._thread.is_alive()
+    finally:
+        dispatcher.close()
+
+
+def test_payment_counts_towards_sales(app, client, customer):
+    user_id, headers = customer
+    with app.app_context():
+        order = Order(user_id=user_id, status="approved", total_amount=12)
+        db.session.add(order)
+        db.session.commit()
+        order_id = order.id
+
+    response = client.post(f"/payments/{order_id}", json={"amount": "12.50"}, headers=headers)
+    assert response.status_code == 201
+
+    with app.app_context():
+        sales = db.session.query(Counter.value).filter(Counter.name == sales_key()).scalar()
+    assert float(sales) == 12.5
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models import PendingRequest
+
+
+def _add_requests(app, user_id, book_id, count, action="borrow", status="pending"):
+    with app.app_context():
+        db.session.add_all([
+            PendingRequest(user_id=user_id, book_id=book_id, action=action, status=status,
+                           created_at=datetime(2026, 5, 1, 9))
+            for _ in range(count)
+        ])
+        db.session.commit()
+
+
+def test_admin_pages_through_the_queue_oldest_first(app, client, admin, customer, make_book):
+    admin_id, headers = admin
+    customer_id, _ = customer
+    book_id = make_book(title="Dune")
+    _add_requests(app, customer_id, book_id, 3)
+    _add_requests(app, admin_id, book_id, 1, action="purchase")
+    _add_requests(app, customer_id, book_id, 1, status="declined")
+
+    ids, after = [], None
+    while True:
+        page = client.get(
+            "/pendingRequests?status=pending&limit=2" + (f"&after={after}" if after else ""), headers=headers
+        ).get_json()
+        ids += [item["id"] for item in page["items"]]
+        after = page["next_cursor"]
+        if not after:
+            break
+    assert ids == sorted(ids) and len(ids) == 4
+
+    borrows = client.get("/pendingRequests?status=pending&action=borrow", headers=headers).get_json()
+    assert len(borrows) == 3
+    assert borrows[0]["user"] == "Joe" and borrows[0]["book"]["title"] == "Dune"
+    assert client.get("/pendingRequests?after=garbage", headers=headers).status_code == 400
+
+
+def test_customers_only_see_their_own_requests(app, client, admin, customer, make_book):
+    admin_id, _ = admin
+    customer_id, headers = customer
+    book_id = make_book()
+    _add_requests(app, customer_id, book_id, 2)
+    _add_requests(app, admin_id, book_id, 2)
+    assert {r["user_id"] for r in client.get("/pendingRequests", headers=headers).get_json()} == {customer_id}
+
+
+def test_listing_runs_the_same_statements_whatever_the_size(app, client, admin, customer, make_book, count_queries):
+    _, headers = admin
+    customer_id, _ = customer
+
+    def statements_for(count):
+        _add_requests(app, customer_id, make_book(), count)
+        with count_queries() as statements:
+            assert client.get("/pendingRequests", headers=headers).status_code == 200
+        return len(statements)
+
+    statements_for(1)  # first request also looks up and caches the caller's role
+    assert statements_for(1) == statements_for(25)
@@ -0,0 +1,22 @@
+def test_fields_limit_list_and_detail_payloads(client, make_book):
+    book_id = make_book(title="Dune", author="Herbert", category="Fiction")
+
+    listing = client.get("/books?fields=title,id").get_json()
+    assert listing == [{"id": book_id, "title": "Dune"}]
+    detail = client.get(f"/books/{book_id}?fields=author").get_json()
+    assert detail == {"author": "Herbert"}
+
+
+def test_cursor_pages_keep_the_projection(client, make_book):
+    for title in ("A", "B", "C"):
+        make_book(title=title)
+    first = client.get("/books?fields=title&limit=2").get_json()
+    assert first["items"] == [{"title": "A"}, {"title": "B"}]
+    second = client.get(f"/books?fields=title&limit=2&after={first['next_cursor']}").get_json()
+    assert second["items"] == [{"title": "C"}]
+
+
+def test_unknown_fields_are_rejected(client, make_book):
+    book_id = make_book()
+    assert client.get("/books?fields=title,password").status_code == 400
+    assert client.get(f"/books/{book_id}?fields=nope").get_json() == {"msg": "Unknown field(s): nope"}
@@ -0,0 +1,48 @@
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import User, Book, PendingRequest, PurchaseCart, PurchaseCartItem
+
+
+def _checkout_statements(app, client, count_queries, size):
+    """
+    Check out a cart of `size` approved purchases; returns the number of SQL statements run.
+    """
+    with app.app_context():
+        user = User(name=f"Buyer {size}", email=f"buyer{size}@example.com")
+        user.set_password("secret")
+        db.session.add(user)
+        db.session.flush()
+        cart = PurchaseCart(user_id=user.id)
+        db.session.add(cart)
+        db.session.flush()
+        requests = []
+        for i in range(size):
+            book = Book(title=f"Book {size}-{i}", author="Author", location="Store", price=10)
+            db.session.add(book)
+            db.session.flush()
+            requests.append(PendingRequest(user_id=user.id, book_id=book.id, action="purchase", status="approved"))
+            db.session.add(PurchaseCartItem(cart_id=cart.id, book_id=book.id, quantity=1, checked_out=False))
+        db.session.add_all(requests)
+        db.session.commit()
+        request_id, user_id = requests[0].id, user.id
+        token = create_access_token(identity=user.id, additional_claims={"role": "customer"})
+
+    with count_queries() as statements:
+        response = client.patch(
+            f"/pendingRequests/{request_id}", json={"status": "purchased"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    assert response.status_code == 200, response.get_json()
+
+    with app.app_context():
+        left = PurchaseCartItem.query.join(PurchaseCart).filter(
+            PurchaseCart.user_id == user_id, PurchaseCartItem.checked_out.is_(False)
+        ).count()
+    assert left == 0
+    return len(statements)
+
+
+def test_purchase_runs_the_same_statements_whatever_the_cart_size(app, client, count_queries):
+    counts = [_checkout_statements(app, client, count_queries, size) for size in (1, 10, 100)]
+    assert len(set(counts)) == 1, counts
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
+from app import rollups
+from app.extensions import db
+from app.models import Book, DailyRollup, Order, OrderItem, Lending
+
+
+def test_revenue_comes_from_order_totals_and_survives_price_edits_and_deletes(app, client, admin, make_book, customer):
+    _, headers = admin
+    user_id, _ = customer
+    app.config["ROLLUP_LAG_SECONDS"] = 0
+    fiction = make_book(category="Fiction", price=10)
+    gone = make_book(category="History", price=20)
+    day = datetime(2026, 3, 5, 12)
+    with app.app_context():
+        order = Order(user_id=user_id, status="Approved", total_amount=30, approved_at=day)
+        db.session.add(order)
+        db.session.flush()
+        db.session.add_all([
+            OrderItem(order_id=order.id, book_id=fiction, quantity=2),
+            OrderItem(order_id=order.id, book_id=gone, quantity=1),
+            Lending(user_id=user_id, book_id=gone, borrowed_at=day),
+        ])
+        db.session.commit()
+
+        # Price edits and deleted books must not rewrite history
+        db.session.get(Book, fiction).price = 99
+        db.session.execute(delete(Book).where(Book.id == gone))
+        db.session.commit()
+        rollups.build(now=day + timedelta(days=1))
+
+    sales = client.get("/admin/sales-report?period=day&month=Mar", headers=headers).get_json()
+    assert sales == [{"period": "2026-03-05", "month": "Mar", "sales": 1, "revenue": 30.0}]
+    fiction_only = client.get("/admin/sales-report?category=Fiction", headers=headers).get_json()
+    assert fiction_only[0]["revenue"] == 20.0
+    borrowings = client.get("/admin/borrowing-report", headers=headers).get_json()
+    assert borrowings == [{"period": "2026-03", "month": "Mar", "borrowings": 1}]
+    assert client.get("/admin/sales-report?month=Apr", headers=headers).get_json() == []
+    assert client.get("/admin/sales-report?month=March", headers=headers).status_code == 400
+
+
+def test_revenue_split_keeps_cents(app, client, admin, make_book, customer):
+    _, headers = admin
+    user_id, _ = customer
+    app.config["ROLLUP_LAG_SECONDS"] = 0
+    books = [make_book(category="Fiction"), make_book(category="Fiction"), make_book(category="History")]
+    day = datetime(2026, 3, 5, 12)
+    with app.app_context():
+        order = Order(user_id=user_id, status="Approved", total_amount=10, approved_at=day)
+        db.session.add(order)
+        db.session.flush()
+        db.session.add_all([OrderItem(order_id=order.id, book_id=b, quantity=1) for b in books])
+        db.session.commit()
+        rollups.build(now=day + timedelta(days=1))
+
+    assert client.get("/admin/sales-report?category=Fiction", headers=headers).get_json()[0]["revenue"] == 6.67
+    assert client.get("/admin/sales-report?category=History", headers=headers).get_json()[0]["revenue"] == 3.33
+
+
+def test_report_includes_unbuilt_rows_without_writing(app, client, admin, make_book, customer):
+    _, headers = admin
+    user_id, _ = customer
+    book = make_book(category="Fiction")
+    with app.app_context():
+        db.session.add(Lending(user_id=user_id, book_id=book, borrowed_at=datetime.utcnow()))
+        db.session.commit()
+
+    borrowings = client.get("/admin/borrowing-report?period=year", headers=headers).get_json()
+    assert borrowings == [{"period": str(datetime.utcnow().year), "borrowings": 1}]
+    with app.app_context():
+        assert DailyRollup.query.count() == 0
+        assert rollups.processed_until() is None
@@ -0,0 +1,23 @@
+def _search(client, term):
+    return [book["title"] for book in client.get(f"/books/search?q={term}").get_json()["items"]]
+
+
+def test_index_follows_create_update_and_delete(client, admin):
+    _, headers = admin
+    book = client.post("/books", json={"title": "Dune Messiah", "author": "Herbert"}, headers=headers).get_json()
+    assert _search(client, "messiah") == ["Dune Messiah"]
+    assert _search(client, "herbert") == ["Dune Messiah"]
+
+    client.put(f"/books/{book['id']}", json={"title": "Children of Dune"}, headers=headers)
+    assert _search(client, "messiah") == []
+    assert _search(client, "children") == ["Children of Dune"]
+
+    client.delete(f"/books/{book['id']}", headers=headers)
+    assert _search(client, "dune") == []
+
+
+def test_title_matches_rank_above_description_matches(client, admin):
+    _, headers = admin
+    client.post("/books", json={"title": "A quiet life", "author": "Someone", "description": "Set on Arrakis"}, headers=headers)
+    client.post("/books", json={"title": "Arrakis", "author": "Someone", "description": "A desert planet"}, headers=headers)
+    assert _search(client, "arrakis") == ["Arrakis", "A quiet life"]
@@ -0,0 +1,32 @@
+from app.extensions import db
+from app.models import PendingRequest, PurchaseCart, PurchaseCartItem
+
+
+def test_count_matches_the_listed_cart(app, client, admin, customer, make_book):
+    admin_id, _ = admin
+    user_id, headers = customer
+    approved, pending, checked_out = make_book(title="Approved"), make_book(), make_book()
+    assert client.get("/shoppingCart/count", headers=headers).get_json() == {"count": 0}
+
+    with app.app_context():
+        cart = PurchaseCart(user_id=user_id)
+        other = PurchaseCart(user_id=admin_id)
+        db.session.add_all([cart, other])
+        db.session.flush()
+        db.session.add_all([
+            PurchaseCartItem(cart_id=cart.id, book_id=approved),
+            PurchaseCartItem(cart_id=cart.id, book_id=pending),
+            PurchaseCartItem(cart_id=cart.id, book_id=checked_out, checked_out=True),
+            PurchaseCartItem(cart_id=other.id, book_id=approved),
+            PendingRequest(user_id=user_id, book_id=approved, action="purchase", status="approved"),
+            PendingRequest(user_id=user_id, book_id=pending, action="purchase", status="pending"),
+            PendingRequest(user_id=user_id, book_id=checked_out, action="purchase", status="approved"),
+        ])
+        db.session.commit()
+
+    listed = client.get("/shoppingCart", headers=headers).get_json()
+    assert [item["title"] for item in listed["cart"]] == ["Approved"] and listed["count"] == 1
+    assert client.get("/shoppingCart/count", headers=headers).get_json() == {"count": 1}
+    # The admin's cart item has no approved request of theirs behind it
+    assert client.get("/shoppingCart/count", headers=admin[1]).get_json() == {"count": 0}
+    assert client.get("/shoppingCart/count").status_code == 401